@@ -0,0 +1,252 @@
+"""
+Async Google Drive calls for the async (ASGI) upload and delete views.
+
+googleapiclient is synchronous: every Drive call holds a thread for the whole
+network round trip, so a WSGI worker serves as many concurrent uploads as it
+has threads. The functions below call the Drive v3 REST API directly with an
+httpx.AsyncClient, so a single ASGI worker can keep hundreds of Drive calls in
+flight while its event loop serves other requests.
+
+Each event loop gets one AsyncDriveClient (see async_drive_clients), whose
+connection pool is shared by every request served on that loop. Access tokens
+come from the same cached service account credentials as the sync clients
+(drive_clients.get_drive_credentials); an expired token is refreshed in a
+worker thread, once per client.
+
+Like their counterparts in setoo_app.utils, the functions log Drive errors and
+report them in their return value instead of raising.
+"""
+import asyncio
+import json
+import logging
+import uuid
+import weakref
+
+import google_auth_httplib2
+import httpx
+import httplib2
+from django.conf import settings
+
+from . import metrics
+from .drive_clients import get_drive_credentials
+from .models import ExtractedText
+
+logger = logging.getLogger(__name__)
+
+DRIVE_API_URL = "https://www.googleapis.com/drive/v3"
+DRIVE_UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3"
+
+
+def _stored_bytes(response):
+    """Returns the bytes an upload session has stored, from the Range header ("bytes=0-<last byte>") of a 308 response."""
+    stored = response.headers.get('Range')
+    return int(stored.rsplit('-', 1)[1]) + 1 if stored else 0 # No Range header: nothing stored yet
+
+
+class AsyncDriveClient:
+    """
+    Drive v3 REST client for one event loop.
+
+    Args:
+        transport: httpx async transport (default: real network connections).
+        credentials: google.auth credentials (default drive_clients.get_drive_credentials()).
+    """
+
+    def __init__(self, transport=None, credentials=None):
+        self.credentials = credentials or get_drive_credentials()
+        self.http = httpx.AsyncClient(
+            transport=transport,
+            timeout=settings.DRIVE_HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=settings.DRIVE_ASYNC_MAX_CONNECTIONS),
+        )
+        self._refresh_lock = asyncio.Lock()
+
+    async def headers(self, **extra):
+        """Returns the request headers with a valid access token, refreshing it first if needed."""
+        if not self.credentials.valid:
+            async with self._refresh_lock: # Requests waiting for the same refresh don't each start one
+                if not self.credentials.valid:
+                    request = google_auth_httplib2.Request(httplib2.Http(timeout=settings.DRIVE_HTTP_TIMEOUT))
+                    await asyncio.to_thread(self.credentials.refresh, request)
+        return {'Authorization': f"Bearer {self.credentials.token}", **extra}
+
+    async def upload(self, uploaded_file, drive_folder_id):
+        """
+        Uploads a Django UploadedFile and returns its Drive file ID (raises on error).
+
+        Files up to settings.DRIVE_UPLOAD_CHUNK_SIZE are sent in a single multipart request,
+        larger ones in a resumable upload session, one chunk at a time, each starting after
+        the last byte Drive reports as stored.
+        """
+        metadata = {'name': uploaded_file.name, 'parents': [drive_folder_id]}
+        mimetype = uploaded_file.content_type or 'application/octet-stream'
+        chunk_size = settings.DRIVE_UPLOAD_CHUNK_SIZE
+        size = uploaded_file.size or 0
+        uploaded_file.seek(0)
+
+        if size <= chunk_size:
+            content = await asyncio.to_thread(uploaded_file.read) # A temporary upload file is read off the event loop
+            boundary = uuid.uuid4().hex
+            body = b"".join([
+                f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n".encode(),
+                json.dumps(metadata).encode(),
+                f"\r\n--{boundary}\r\nContent-Type: {mimetype}\r\n\r\n".encode(),
+                content,
+                f"\r\n--{boundary}--".encode(),
+            ])
+            response = await self.http.post(
+                f"{DRIVE_UPLOAD_URL}/files",
+                params={'uploadType': 'multipart', 'fields': 'id'},
+                content=body,
+                headers=await self.headers(**{'Content-Type': f"multipart/related; boundary={boundary}"}),
+            )
+            response.raise_for_status()
+            return response.json()['id']
+
+        response = await self.http.post(
+            f"{DRIVE_UPLOAD_URL}/files",
+            params={'uploadType': 'resumable', 'fields': 'id'},
+            json=metadata,
+            headers=await self.headers(**{'X-Upload-Content-Type': mimetype, 'X-Upload-Content-Length': str(size)}),
+        )
+        response.raise_for_status()
+        session_url = response.headers['Location']
+        offset = 0
+        while True:
+            uploaded_file.seek(offset)
+            chunk = await asyncio.to_thread(uploaded_file.read, chunk_size)
+            end = offset + len(chunk)
+            response = await self.http.put(
+                session_url, content=chunk, headers=await self.headers(**{'Content-Range': f"bytes {offset}-{end - 1}/{size}"}),
+            )
+            if response.status_code != 308:
+                response.raise_for_status()
+                return response.json()['id']
+            # 308 Resume Incomplete: Drive may have stored only part of the chunk; resume after the last byte it reports
+            stored = _stored_bytes(response)
+            if stored <= offset:
+                raise RuntimeError(f"Drive stored no bytes of the upload chunk at offset {offset} of {uploaded_file.name}")
+            offset = stored
+
+    async def delete(self, file_id):
+        """Deletes a Drive file (raises httpx.HTTPStatusError on error responses, including 404)."""
+        response = await self.http.delete(f"{DRIVE_API_URL}/files/{file_id}", headers=await self.headers())
+        response.raise_for_status()
+
+
+class AsyncDriveClients:
+    """
+    Hands out one AsyncDriveClient per running event loop, built on first use.
+
+    httpx connections belong to the loop that opened them, so clients are never shared
+    between loops; a client is dropped with its loop.
+
+    Args:
+        transport: httpx async transport for new clients (default: real network connections).
+        credentials: Credentials for new clients (default drive_clients.get_drive_credentials()).
+    """
+
+    def __init__(self, transport=None, credentials=None):
+        self.transport = transport
+        self.credentials = credentials
+        self._clients = weakref.WeakKeyDictionary()
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = AsyncDriveClient(self.transport, self.credentials)
+        return client
+
+    def clear(self):
+        """Forgets the existing clients, e.g. after changing transport or credentials."""
+        self._clients = weakref.WeakKeyDictionary()
+
+
+async_drive_clients = AsyncDriveClients()
+
+
+async def _gather_bounded(func, items, limit):
+    """Awaits func(item) for every item, at most limit at a time, and returns the results in item order."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def call(item):
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(call(item) for item in items))
+
+
+async def upload_to_drive(uploaded_file, drive_folder_id):
+    """
+    Uploads a file to Google Drive without blocking the event loop.
+
+    Args:
+        uploaded_file: Django UploadedFile object.
+        drive_folder_id: ID of the Google Drive folder to upload to.
+
+    Returns:
+        str: Google Drive file ID of the uploaded file, or None on error.
+    """
+    try:
+        with metrics.span('drive_upload', file=uploaded_file.name):
+            drive_file_id = await async_drive_clients.get().upload(uploaded_file, drive_folder_id)
+        metrics.DRIVE_BYTES.inc(uploaded_file.size or 0, direction='upload')
+        return drive_file_id
+    except Exception as e:
+        logger.error("Error during Drive upload of %s: %s", uploaded_file.name, e)
+        return None
+
+
+async def upload_files_to_drive(uploaded_files, drive_folder_id, max_concurrency=None):
+    """
+    Uploads many files to Google Drive concurrently.
+
+    Args:
+        uploaded_files (list): Django UploadedFile objects.
+        drive_folder_id: ID of the Google Drive folder to upload to.
+        max_concurrency (int): Uploads in flight at once (default settings.DRIVE_ASYNC_REQUEST_CONCURRENCY).
+
+    Returns:
+        list: (uploaded_file, drive_file_id) tuples in upload order; drive_file_id is None on error.
+    """
+    async def upload(uploaded_file):
+        return uploaded_file, await upload_to_drive(uploaded_file, drive_folder_id)
+
+    return await _gather_bounded(upload, uploaded_files, max_concurrency or settings.DRIVE_ASYNC_REQUEST_CONCURRENCY)
+
+
+async def _delete(file_id):
+    """Deletes one Drive file and returns None, or the error message. Files already gone from Drive count as deleted."""
+    try:
+        with metrics.span('drive_delete'):
+            await async_drive_clients.get().delete(file_id)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            logger.error("Error deleting file %s from Drive: %s", file_id, e)
+            return str(e)
+    except Exception as e:
+        logger.error("Error deleting file %s from Drive: %s", file_id, e)
+        return str(e)
+    return None
+
+
+async def delete_file_from_drive(file_id):
+    """Deletes a Drive file and drops its cached text. Returns True on success."""
+    if await _delete(file_id) is not None:
+        return False
+    await ExtractedText.objects.filter(drive_file_id=file_id).adelete() # Invalidate cached text for the deleted file
+    return True
+
+
+async def delete_files_from_drive(file_ids, max_concurrency=None):
+    """
+    Deletes many Drive files concurrently and drops their cached text.
+
+    Returns:
+        dict: Mapping of file ID -> error message, or None if the file was deleted.
+    """
+    file_ids = list(file_ids)
+    errors = dict(zip(file_ids, await _gather_bounded(_delete, file_ids, max_concurrency or settings.DRIVE_ASYNC_REQUEST_CONCURRENCY)))
+    await ExtractedText.objects.filter(drive_file_id__in=[file_id for file_id, error in errors.items() if error is None]).adelete()
+    return errors
@@ -0,0 +1,166 @@
+"""
+Helpers for the benchmark management commands: synthetic documents and measurement.
+
+Like pdf_extraction, this module must stay importable without configured
+Django settings, because measure_in_subprocess() runs functions from it in
+freshly spawned processes.
+"""
+import multiprocessing
+import random
+import time
+import tracemalloc
+
+import pymupdf
+
+WORDS = (
+    "python django flask sql postgresql java spring kotlin javascript react node aws docker kubernetes "
+    "terraform linux git agile scrum leadership communication analytics excel tableau marketing sales "
+    "accounting audit tax finance recruiting design figma testing selenium pandas numpy machine learning "
+    "project management customer support operations logistics security networking api rest graphql"
+).split()
+
+
+ROLE_SKILLS = {
+    'Backend Developer': "python django flask sql postgresql api rest graphql docker linux git".split(),
+    'Java Engineer': "java spring kotlin sql api rest docker kubernetes git testing".split(),
+    'Frontend Developer': "javascript react node design figma testing api git".split(),
+    'DevOps Engineer': "aws docker kubernetes terraform linux networking security git".split(),
+    'Data Analyst': "sql excel tableau pandas numpy analytics python machine learning".split(),
+    'Accountant': "accounting audit tax finance excel operations".split(),
+    'Sales Manager': "sales marketing communication leadership customer support".split(),
+    'Project Manager': "project management agile scrum leadership communication operations".split(),
+}
+
+
+def random_text(rng, n_words):
+    """Returns n_words random vocabulary words, split into lines of 12 words."""
+    words = rng.choices(WORDS, k=n_words)
+    return "\n".join(" ".join(words[i:i + 12]) for i in range(0, n_words, 12))
+
+
+def synthetic_jd_text(rng, role, words=250):
+    """Returns the text of a synthetic job description for one of ROLE_SKILLS' roles."""
+    skills = ROLE_SKILLS[role]
+    return "\n".join([
+        role,
+        "Responsibilities:",
+        random_text(rng, words // 2),
+        "Requirements:",
+        " ".join(rng.choices(skills, k=40)),
+        "Benefits:",
+        random_text(rng, words // 2),
+    ])
+
+
+def synthetic_resume_text(rng, role, words=300):
+    """Returns the text of a synthetic resume leaning towards one of ROLE_SKILLS' roles."""
+    return "\n".join([
+        f"Candidate {rng.randrange(10 ** 6)}",
+        "Experience:",
+        random_text(rng, words // 2),
+        "Skills:",
+        " ".join(rng.choices(ROLE_SKILLS[role], k=words // 2)),
+    ])
+
+
+def synthetic_results_payload(rng, resumes, roles, match_rate=0.7):
+    """
+    Returns synthetic (matched_resumes, unmatched_resumes, analytics) in the shape saved by the analysis pipeline.
+
+    Each of the resumes matches one of roles (ROLE_SKILLS names, repeated with a suffix
+    beyond 8 roles) with probability match_rate, with a random score.
+    """
+    role_names = [f"{list(ROLE_SKILLS)[i % len(ROLE_SKILLS)]} {i // len(ROLE_SKILLS) + 1}.pdf" for i in range(roles)]
+    matched_resumes = {role_name: [] for role_name in role_names}
+    unmatched_resumes = []
+    for resume_id in range(1, resumes + 1):
+        filename = f"candidate_{resume_id:06d}_{rng.choice(WORDS)}.pdf"
+        if rng.random() >= match_rate:
+            unmatched_resumes.append(filename)
+            continue
+        role_name = rng.choice(role_names)
+        score = rng.uniform(0.1, 0.9)
+        matched_resumes[role_name].append({
+            'resume_filename': filename,
+            'resume': {"id": resume_id, "filename": filename},
+            'role': role_name,
+            'score': score,
+            'explanation': f"Matched to {role_name} role based on cosine similarity score: {score:.2f}",
+        })
+    for matches in matched_resumes.values():
+        matches.sort(key=lambda match: match['score'], reverse=True)
+    analytics = {role_name: {"applied_count": len(matches), "passed_count": len(matches)} for role_name, matches in matched_resumes.items()}
+    return matched_resumes, unmatched_resumes, analytics
+
+
+def synthetic_pdf(page_texts, header=None, footer=None):
+    """Builds a PDF (as bytes) with one page per text, optionally repeating a header and footer on every page."""
+    document = pymupdf.open()
+    for number, text in enumerate(page_texts, start=1):
+        page = document.new_page()
+        if header:
+            page.insert_text((50, 40), header, fontsize=9)
+        page.insert_textbox(pymupdf.Rect(50, 60, 550, 780), text, fontsize=10)
+        if footer:
+            page.insert_text((50, 810), f"{footer} - Page {number} of {len(page_texts)}", fontsize=9)
+    pdf_bytes = document.tobytes()
+    document.close()
+    return pdf_bytes
+
+
+def synthetic_pdfs(count, pages, words_per_page=300, seed=0):
+    """Returns count synthetic PDFs of the given number of pages."""
+    rng = random.Random(seed)
+    return [synthetic_pdf([random_text(rng, words_per_page) for _ in range(pages)]) for _ in range(count)]
+
+
+def peak_rss_bytes():
+    """Returns the peak resident set size of the current process (VmHWM; ru_maxrss would include the parent's peak across exec)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError: # No /proc outside Linux
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Resets the peak RSS (VmHWM) of the current process, so the next measurement covers only what follows (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _measured_call(func, args, queue):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put({
+        'result': result,
+        'seconds': elapsed,
+        'python_peak_bytes': python_peak,
+        'max_rss_bytes': peak_rss_bytes(),
+    })
+
+
+def measure_in_subprocess(func, *args):
+    """
+    Runs func(*args) in a fresh spawned process and returns its result with timing and memory stats.
+
+    Returns:
+        dict: 'result', 'seconds', 'python_peak_bytes' (tracemalloc) and 'max_rss_bytes' (peak RSS of the process).
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measured_call, args=(func, args, queue))
+    process.start()
+    measurement = queue.get()
+    process.join()
+    return measurement
@@ -0,0 +1,173 @@
+"""
+Token counting and JD text compaction before LLM calls.
+
+Text extracted from PDFs carries page furniture (headers, footers, page
+numbers repeated on every page) and duplicated lines. compact_jd_text()
+removes those and then enforces a token budget by dropping or truncating the
+least useful sections first (benefits, company boilerplate, legal notices),
+keeping requirements, responsibilities and skills intact where possible.
+"""
+import logging
+import re
+from collections import Counter
+from functools import lru_cache
+
+import tiktoken
+
+from .pdf_extraction import PAGE_SEPARATOR
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_VERSION = 1  # Bump when the compaction rules change (part of the JD prompt version)
+FURNITURE_EDGE_LINES = 3  # Lines at the top and bottom of a page that may be headers/footers
+MIN_TRUNCATED_SECTION_TOKENS = 20  # Don't keep a section's head if less than this fits
+
+PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+HEADING_RE = re.compile(r"^[A-Z][A-Za-z &/,'()-]{1,60}:?$")
+
+# Section priority by heading keyword: lower is kept first when the budget is tight
+SECTION_PRIORITIES = (
+    (0, ('requirement', 'qualification', 'skill', 'responsibilit', 'duties', 'experience', 'education', 'must have', 'what you')),
+    (1, ('role', 'position', 'job', 'summary', 'overview', 'description', 'nice to have', 'preferred')),
+    (3, ('benefit', 'perk', 'compensation', 'salary', 'about us', 'about the company', 'who we are', 'our culture',
+         'equal opportunity', 'eeo', 'diversity', 'how to apply', 'privacy', 'disclaimer')),
+)
+DEFAULT_SECTION_PRIORITY = 2
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model):
+    """Returns the tiktoken encoding of a model, or None if it cannot be loaded (e.g. offline without a tiktoken cache)."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        logger.warning("Could not load the tiktoken encoding for %s, estimating token counts instead: %s", model, e)
+        return None
+
+
+def count_tokens(text, model):
+    """Counts the tokens of a text for a model (estimated at 4 characters per token if no encoding is available)."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens, model):
+    """Returns the longest head of a text that fits in max_tokens."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def _normalize_line(line):
+    return re.sub(r"\d+", "#", " ".join(line.split()).lower()) # Page-numbered furniture ("Page 2 of 5") compares equal
+
+
+def remove_page_furniture(text):
+    """
+    Removes headers/footers repeated on most pages and bare page numbers.
+
+    Pages are separated by PAGE_SEPARATOR. A line near the top or bottom of a page is
+    furniture if the same (digit-insensitive) line appears on at least half of the pages.
+    """
+    pages = [page.splitlines() for page in text.split(PAGE_SEPARATOR)]
+    furniture = set()
+    if len(pages) > 1:
+        edge_counts = Counter()
+        for lines in pages:
+            edges = [line for line in lines if line.strip()]
+            edges = edges[:FURNITURE_EDGE_LINES] + edges[-FURNITURE_EDGE_LINES:]
+            edge_counts.update({_normalize_line(line) for line in edges})
+        furniture = {line for line, count in edge_counts.items() if count >= max(2, len(pages) / 2)}
+
+    kept = []
+    for lines in pages:
+        kept.extend(line for line in lines if _normalize_line(line) not in furniture and not PAGE_NUMBER_RE.match(line.strip()))
+    return "\n".join(kept)
+
+
+def remove_duplicate_lines(text):
+    """Drops repeated non-blank lines (keeping the first occurrence) and collapses runs of blank lines."""
+    seen = set()
+    kept = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line.strip():
+            if kept and kept[-1]:
+                kept.append("")
+            continue
+        key = " ".join(line.split()).lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def split_sections(text):
+    """Splits a text into (heading, body) sections at heading-like lines; the first section's heading may be empty."""
+    sections = [["", []]]
+    for line in text.splitlines():
+        stripped = line.strip()
+        if HEADING_RE.match(stripped) and (stripped.endswith(':') or stripped.isupper() or len(stripped.split()) <= 4) and sections[-1][1]:
+            sections.append([stripped, []])
+        else:
+            sections[-1][1].append(line)
+    return [(heading, "\n".join(lines)) for heading, lines in sections]
+
+
+def section_priority(index, heading):
+    if index == 0:
+        return 0 # The opening lines usually carry the job title
+    heading = heading.lower()
+    for priority, keywords in SECTION_PRIORITIES:
+        if any(keyword in heading for keyword in keywords):
+            return priority
+    return DEFAULT_SECTION_PRIORITY
+
+
+def truncate_sections(text, max_tokens, model):
+    """
+    Fits a text into max_tokens, keeping whole sections in priority order.
+
+    Sections are added by priority (then position) while they fit; the first one that
+    does not fit is truncated to the remaining budget and the rest are dropped. Kept
+    sections stay in their original order.
+    """
+    sections = split_sections(text)
+    order = sorted(range(len(sections)), key=lambda i: (section_priority(i, sections[i][0]), i))
+    kept = {}
+    remaining = max_tokens
+    for i in order:
+        heading, body = sections[i]
+        section_text = f"{heading}\n{body}".strip()
+        tokens = count_tokens(section_text, model) + 1 # + the joining newline
+        if tokens <= remaining:
+            kept[i] = section_text
+            remaining -= tokens
+        else:
+            if remaining >= MIN_TRUNCATED_SECTION_TOKENS:
+                kept[i] = truncate_to_tokens(section_text, remaining - 1, model)
+            break
+    return "\n".join(kept[i] for i in sorted(kept))
+
+
+def compact_jd_text(text, max_tokens, model):
+    """
+    Compacts extracted JD text for a prompt: removes page furniture and duplicate lines, then enforces max_tokens.
+
+    Returns:
+        tuple: (compacted_text, stats) - stats has raw_tokens, compacted_tokens and truncated.
+    """
+    raw_tokens = count_tokens(text, model)
+    compacted = remove_duplicate_lines(remove_page_furniture(text))
+    truncated = max_tokens is not None and count_tokens(compacted, model) > max_tokens
+    if truncated:
+        compacted = truncate_sections(compacted, max_tokens, model)
+    return compacted, {'raw_tokens': raw_tokens, 'compacted_tokens': count_tokens(compacted, model), 'truncated': truncated}
@@ -0,0 +1,181 @@
+"""
+Compressed JSON storage for large payloads (the Results match, unmatched and analytics blobs).
+
+CompressedJSONField stores a JSON value as an orjson-serialized, zstandard-
+compressed bytea instead of jsonb. Loading a row only fetches the compressed
+bytes: each field is decompressed and parsed the first time it is accessed, so
+a view reading one section of a Results row does not pay for the others.
+
+A field can name a dictionary (e.g. 'results'). Values are then compressed
+with the most recently trained ZstdDictionary of that name, if any (see the
+train_results_dictionary command). The dictionary ID is recorded in each zstd
+frame, so rows compressed with older dictionaries (or none) stay readable;
+dictionaries are therefore never deleted.
+"""
+from functools import lru_cache
+
+import orjson
+import zstandard
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY  # Same key coercion as json.dumps, plus numpy scalars
+SAMPLE_LIST_CHUNK = 50  # List items per dictionary training sample
+
+
+@lru_cache(maxsize=32)
+def get_dictionary(dict_id):
+    """Returns the zstd dictionary with the given ID (cached per process; dictionaries never change)."""
+    from .models import ZstdDictionary
+
+    return zstandard.ZstdCompressionDict(ZstdDictionary.objects.get(dict_id=dict_id).data)
+
+
+def latest_dictionary_id(name):
+    """Returns the ID of the most recently trained dictionary of a name, or None."""
+    from .models import ZstdDictionary
+
+    return ZstdDictionary.objects.filter(name=name).order_by('-dict_id').values_list('dict_id', flat=True).first()
+
+
+def serialize(value):
+    return orjson.dumps(value, option=ORJSON_OPTIONS)
+
+
+def compress(data, dict_id=None, level=None):
+    """Compresses bytes with zstandard, using the dictionary dict_id if given."""
+    level = settings.RESULTS_ZSTD_LEVEL if level is None else level
+    if dict_id is None:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return zstandard.ZstdCompressor(level=level, dict_data=get_dictionary(dict_id)).compress(data)
+
+
+def decompress(data):
+    """Decompresses a zstd frame, loading the dictionary recorded in the frame if there is one."""
+    dict_id = zstandard.get_frame_parameters(data).dict_id
+    if not dict_id:
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zstandard.ZstdDecompressor(dict_data=get_dictionary(dict_id)).decompress(data)
+
+
+def encode(value, dictionary=None, level=None):
+    """Serializes a JSON value with orjson and compresses it (with the latest dictionary of that name, if any)."""
+    dict_id = latest_dictionary_id(dictionary) if dictionary else None
+    return compress(serialize(value), dict_id, level)
+
+
+def decode(data):
+    return orjson.loads(decompress(data))
+
+
+def training_samples(value):
+    """
+    Splits a JSON value into dictionary training samples.
+
+    zstd dictionaries learn from many small samples, so large payloads are split into
+    one sample per top-level key (or per SAMPLE_LIST_CHUNK items of a list), recursively
+    one level down.
+    """
+    if isinstance(value, dict) and len(value) > 1:
+        return [sample for key, item in value.items() for sample in training_samples({key: item})]
+    if isinstance(value, dict) and value:
+        (key, item), = value.items()
+        if isinstance(item, list) and len(item) > SAMPLE_LIST_CHUNK:
+            return [serialize({key: item[i:i + SAMPLE_LIST_CHUNK]}) for i in range(0, len(item), SAMPLE_LIST_CHUNK)]
+    if isinstance(value, list) and len(value) > SAMPLE_LIST_CHUNK:
+        return [serialize(value[i:i + SAMPLE_LIST_CHUNK]) for i in range(0, len(value), SAMPLE_LIST_CHUNK)]
+    return [serialize(value)]
+
+
+def train_dictionary(name, values, size=None):
+    """
+    Trains a zstd dictionary on JSON values and stores it as the latest dictionary of a name.
+
+    Args:
+        name (str): Dictionary set (the dictionary argument of the fields that should use it).
+        values (iterable): JSON values representative of the stored payloads.
+        size (int): Dictionary size in bytes (default settings.RESULTS_ZSTD_DICTIONARY_SIZE).
+
+    Returns:
+        ZstdDictionary: The stored dictionary.
+    """
+    from .models import ZstdDictionary
+
+    samples = [sample for value in values if value is not None for sample in training_samples(value)]
+    dict_id = (ZstdDictionary.objects.order_by('-dict_id').values_list('dict_id', flat=True).first() or 0) + 1
+    dictionary = zstandard.train_dictionary(size or settings.RESULTS_ZSTD_DICTIONARY_SIZE, samples, dict_id=dict_id)
+    return ZstdDictionary.objects.create(name=name, dict_id=dict_id, data=dictionary.as_bytes(), sample_count=len(samples))
+
+
+class CompressedValue:
+    """Compressed bytes of a field as loaded from the database, not decoded yet."""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __repr__(self):
+        return f"<CompressedValue: {len(self.data)} bytes>"
+
+
+class CompressedJSONDescriptor(DeferredAttribute):
+    """Decodes a CompressedJSONField on first access and caches the decoded value on the instance."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedValue):
+            value = instance.__dict__[self.field.attname] = decode(value.data) if value.data else None
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    JSON value stored as orjson + zstandard compressed bytes, decoded lazily on access.
+
+    Args:
+        dictionary (str): Name of the ZstdDictionary set used to compress new values, or None.
+    """
+    descriptor_class = CompressedJSONDescriptor
+
+    def __init__(self, *args, dictionary=None, **kwargs):
+        self.dictionary = dictionary
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.dictionary is not None:
+            kwargs['dictionary'] = self.dictionary
+        return name, path, args, kwargs
+
+    def get_default(self):
+        if self.has_default():
+            return super().get_default()
+        return None
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else CompressedValue(bytes(value))
+
+    def pre_save(self, model_instance, add):
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname] # Not through the descriptor, which would decode an unread value
+        return super().pre_save(model_instance, add)
+
+    def to_python(self, value):
+        if isinstance(value, str): # Fixtures store the decoded JSON text (see value_to_string)
+            return orjson.loads(value)
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        data = value.data if isinstance(value, CompressedValue) else encode(value, self.dictionary) # Unread values are saved as they are
+        return connection.Database.Binary(data)
+
+    def value_to_string(self, obj):
+        return serialize(self.value_from_object(obj)).decode()
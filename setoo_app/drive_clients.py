@@ -0,0 +1,164 @@
+"""
+Google Drive API clients: construction and a thread-safe client pool.
+
+googleapiclient services and their httplib2 transport are not thread-safe, so a
+client must only be used by one thread at a time. Building a client is cheap
+once the expensive parts are cached per process: the service account
+credentials (whose access token is then shared and refreshed in place) and the
+parsed discovery document (the one bundled with google-api-python-client, or a
+pinned copy, so no network access is needed to start).
+
+drive_client_pool hands out clients either for the duration of a block
+(pool.client()) or pinned to the calling thread (pool.thread_client()). Idle
+clients keep their HTTP connections open for the next user. Clients that hit a
+transport error, or are older than settings.DRIVE_CLIENT_MAX_AGE, are dropped
+and replaced.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
+
+import google_auth_httplib2
+import httplib2
+from django.conf import settings
+from google.oauth2 import service_account
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+logger = logging.getLogger(__name__)
+
+DRIVE_DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/drive/v3/rest"
+
+
+@lru_cache(maxsize=1)
+def get_drive_credentials():
+    """Returns the service account credentials, loaded once per process and shared by all clients."""
+    return service_account.Credentials.from_service_account_file(
+        settings.GOOGLE_DRIVE_CREDENTIALS_FILE, scopes=settings.GOOGLE_DRIVE_SCOPES)
+
+
+@lru_cache(maxsize=1)
+def get_drive_discovery_document():
+    """
+    Returns the parsed Drive v3 discovery document, loaded once per process.
+
+    Uses settings.GOOGLE_DRIVE_DISCOVERY_DOCUMENT if that file exists, else the copy bundled
+    with google-api-python-client. Only if neither is available is the document fetched
+    from Google, and then saved to GOOGLE_DRIVE_DISCOVERY_DOCUMENT for the next start.
+    """
+    path = settings.GOOGLE_DRIVE_DISCOVERY_DOCUMENT
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    document = discovery_cache.get_static_doc('drive', 'v3')
+    if document is None:
+        response, document = httplib2.Http(timeout=settings.DRIVE_HTTP_TIMEOUT).request(DRIVE_DISCOVERY_URL)
+        if response.status != 200:
+            raise RuntimeError(f"Could not fetch the Drive discovery document (HTTP {response.status})")
+        document = document.decode('utf-8')
+        if path:
+            with open(path, 'w') as f:
+                f.write(document)
+    return json.loads(document)
+
+
+def build_drive_client():
+    """Builds a new Drive v3 client with its own HTTP connection, from the cached credentials and discovery document."""
+    http = google_auth_httplib2.AuthorizedHttp(get_drive_credentials(), http=httplib2.Http(timeout=settings.DRIVE_HTTP_TIMEOUT))
+    return build_from_document(get_drive_discovery_document(), http=http)
+
+
+def is_transport_error(error):
+    """True for errors that leave a client's connection in an unknown state (anything but an HTTP error response)."""
+    return not hasattr(error, 'resp')
+
+
+class DriveClientPool:
+    """
+    Pool of Drive clients, each used by at most one thread at a time.
+
+    Args:
+        factory: Callable building a new client (default build_drive_client).
+        max_idle (int): Idle clients kept for reuse (default settings.DRIVE_CLIENT_POOL_MAX_IDLE).
+        max_age (float): Seconds after which a client is replaced (default settings.DRIVE_CLIENT_MAX_AGE).
+    """
+
+    def __init__(self, factory=None, max_idle=None, max_age=None):
+        self.factory = factory or build_drive_client
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self._idle = queue.LifoQueue() # Most recently used first: its connection is the most likely to still be open
+        self._created = weakref.WeakKeyDictionary()
+        self._broken = weakref.WeakSet()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _max_idle(self):
+        return self.max_idle if self.max_idle is not None else settings.DRIVE_CLIENT_POOL_MAX_IDLE
+
+    def _max_age(self):
+        return self.max_age if self.max_age is not None else settings.DRIVE_CLIENT_MAX_AGE
+
+    def _is_healthy(self, client):
+        with self._lock:
+            if client in self._broken:
+                return False
+            created = self._created.get(client)
+        return created is not None and time.monotonic() - created < self._max_age()
+
+    def _new_client(self):
+        client = self.factory()
+        with self._lock:
+            self._created[client] = time.monotonic()
+        return client
+
+    def acquire(self):
+        """Takes a healthy idle client, or builds a new one."""
+        while True:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new_client()
+            if self._is_healthy(client):
+                return client
+
+    def release(self, client):
+        """Returns a client to the pool (broken, expired or surplus clients are dropped)."""
+        if self._is_healthy(client) and self._idle.qsize() < self._max_idle():
+            self._idle.put(client)
+
+    @contextmanager
+    def client(self):
+        """Lends a client for the duration of a block; transport errors raised in the block retire it."""
+        client = self.acquire()
+        try:
+            yield client
+        except Exception as e:
+            self.report_error(client, e)
+            raise
+        finally:
+            self.release(client)
+
+    def thread_client(self):
+        """Returns the client pinned to the calling thread, replacing it first if it is broken or expired."""
+        client = getattr(self._local, 'client', None)
+        if client is None or not self._is_healthy(client):
+            client = self._local.client = self.acquire()
+        return client
+
+    def report_error(self, client, error):
+        """Marks a client as broken if error is a transport error, so it is replaced on its next checkout."""
+        if client is not None and is_transport_error(error):
+            logger.warning("Replacing Drive client after transport error: %s", error)
+            with self._lock:
+                self._broken.add(client)
+
+
+drive_client_pool = DriveClientPool()
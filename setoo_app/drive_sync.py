@@ -0,0 +1,292 @@
+"""
+Incremental sync of the JD and resume Drive folders into the JD/Resume tables.
+
+Files dropped straight into the Drive folders (rather than uploaded through
+manage_files) are picked up here. The first pass lists both folders in full
+and records a Drive changes page token taken just before the listing; every
+later pass reads only the changes feed from that token, so its cost is
+proportional to the number of changes, not to the size of the folders.
+
+Additions and renames are bulk-upserted by Drive file ID, skipping files
+whose content (Drive md5Checksum) is already stored under another file. Files
+that are deleted, trashed or moved out of the folders are deleted (with their
+cached text). Passes are serialized with a Postgres advisory lock, so overlapping
+runs of the periodic task skip instead of racing.
+"""
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from . import metrics
+from .drive_clients import drive_client_pool
+from .models import JD, DriveSyncState, ExtractedText, Resume
+
+logger = logging.getLogger(__name__)
+
+SYNC_FILE_FIELDS = 'id, name, mimeType, parents, trashed, md5Checksum'
+DRIVE_LIST_PAGE_SIZE = 1000  # Maximum page size of files.list and changes.list
+UPSERT_BATCH_SIZE = 1000
+DELETE_BATCH_SIZE = 1000
+FILENAME_MAX_LENGTH = 255  # JD/Resume.original_filename max_length
+
+
+def get_synced_folders():
+    """Returns the synced Drive folders as {folder ID: model}."""
+    return {settings.JD_DRIVE_FOLDER_ID: JD, settings.RESUME_DRIVE_FOLDER_ID: Resume}
+
+
+def is_syncable(metadata):
+    """True for regular files; folders and Google Docs/Sheets/... (which have no downloadable content) are ignored."""
+    return not metadata.get('trashed') and not metadata.get('mimeType', '').startswith('application/vnd.google-apps.')
+
+
+def _is_invalid_page_token(error):
+    return getattr(getattr(error, 'resp', None), 'status', None) in (400, 404, 410)
+
+
+def _advisory_lock_id(key):
+    return int.from_bytes(hashlib.sha256(f"drive_sync:{key}".encode()).digest()[:8], 'big', signed=True)
+
+
+def _disambiguate(filename, drive_file_id):
+    """Appends (part of) the Drive file ID to a filename, keeping the extension and the length limit."""
+    stem, extension = os.path.splitext(filename)
+    suffix = f" ({drive_file_id[:12]}){extension}"
+    return stem[:FILENAME_MAX_LENGTH - len(suffix)] + suffix
+
+
+def assign_filenames(model, files):
+    """
+    Picks an original_filename for each file to upsert, resolving name collisions.
+
+    original_filename is unique but Drive allows duplicate names, so a file whose
+    name is already used by another row (or by another file of the batch) gets its
+    Drive file ID appended.
+
+    Args:
+        model: JD or Resume.
+        files (dict): Drive file ID -> Drive file name.
+
+    Returns:
+        dict: Drive file ID -> filename to store.
+    """
+    names = {file_id: name[:FILENAME_MAX_LENGTH] for file_id, name in files.items()}
+    owners = dict(model.objects.filter(original_filename__in=set(names.values())).values_list('original_filename', 'drive_file_id'))
+    assigned = {}
+    for file_id, name in sorted(names.items()):
+        if owners.get(name, file_id) != file_id:
+            name = _disambiguate(name, file_id)
+        owners[name] = file_id
+        assigned[file_id] = name
+    return assigned
+
+
+def drop_duplicate_content(model, files):
+    """
+    Removes files whose content is already stored under another Drive file (or earlier in the batch).
+
+    Args:
+        model: JD or Resume.
+        files (dict): Drive file ID -> file metadata (with md5Checksum, if Drive has one).
+
+    Returns:
+        dict: The files to upsert.
+    """
+    owners = dict(
+        model.objects
+        .filter(content_hash__in={metadata['md5Checksum'] for metadata in files.values() if metadata.get('md5Checksum')})
+        .values_list('content_hash', 'drive_file_id')
+    )
+    kept = {}
+    for file_id, metadata in sorted(files.items()):
+        content_hash = metadata.get('md5Checksum')
+        if content_hash and owners.setdefault(content_hash, file_id) != file_id:
+            logger.info("Drive sync: skipping %s (%s), same content as Drive file %s", metadata['name'], file_id, owners[content_hash])
+            continue
+        kept[file_id] = metadata
+    duplicates = len(files) - len(kept)
+    if duplicates:
+        metrics.DRIVE_SYNC_FILES.inc(duplicates, action='duplicate')
+    return kept
+
+
+def upsert_files(model, folder_id, files):
+    """Inserts or updates the rows of the given Drive files ({file ID: metadata}) in one folder; returns the number upserted."""
+    files = drop_duplicate_content(model, files)
+    if not files:
+        return 0
+    filenames = assign_filenames(model, {file_id: metadata['name'] for file_id, metadata in files.items()})
+    model.objects.bulk_create(
+        [
+            model(original_filename=filenames[file_id], drive_file_id=file_id, drive_folder_id=folder_id, content_hash=metadata.get('md5Checksum'))
+            for file_id, metadata in files.items()
+        ],
+        batch_size=UPSERT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['drive_file_id'],
+        update_fields=['original_filename', 'drive_folder_id', 'content_hash'],
+    )
+    metrics.DRIVE_SYNC_FILES.inc(len(files), action='upserted')
+    return len(files)
+
+
+def delete_files(model, file_ids):
+    """Deletes the rows (and cached text) of Drive files that left the folder; returns the number of rows deleted."""
+    file_ids = list(file_ids)
+    deleted = 0
+    for start in range(0, len(file_ids), DELETE_BATCH_SIZE):
+        chunk = file_ids[start:start + DELETE_BATCH_SIZE]
+        rows, _ = model.objects.filter(drive_file_id__in=chunk).delete() # Also cascades to embeddings and stored scores
+        deleted += rows
+        ExtractedText.objects.filter(drive_file_id__in=chunk).delete()
+    if deleted:
+        metrics.DRIVE_SYNC_FILES.inc(deleted, action='deleted')
+    return deleted
+
+
+def list_folder_files(service, folder_id):
+    """Yields the metadata of every file in a Drive folder, one paginated list call per DRIVE_LIST_PAGE_SIZE files."""
+    page_token = None
+    while True:
+        with metrics.span('drive_list'):
+            response = service.files().list(
+                q=f"'{folder_id}' in parents and trashed = false",
+                fields=f'nextPageToken, files({SYNC_FILE_FIELDS})',
+                pageSize=DRIVE_LIST_PAGE_SIZE,
+                pageToken=page_token,
+            ).execute()
+        yield from response.get('files', [])
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def full_sync(service, state, folders):
+    """
+    Lists the folders in full, upserting every file and deleting rows of files no longer there.
+
+    The changes page token is taken before listing, so changes made during the
+    listing are replayed (harmlessly) by the next incremental pass.
+    """
+    with metrics.span('drive_changes'):
+        start_page_token = service.changes().getStartPageToken().execute()['startPageToken']
+
+    stats = {'mode': 'full', 'changes': 0, 'upserted': 0, 'deleted': 0}
+    for folder_id, model in folders.items():
+        files = {metadata['id']: metadata for metadata in list_folder_files(service, folder_id) if is_syncable(metadata)}
+        stats['changes'] += len(files)
+        stale = set(model.objects.filter(drive_folder_id=folder_id).values_list('drive_file_id', flat=True)) - set(files)
+        stats['deleted'] += delete_files(model, stale)
+        stats['upserted'] += upsert_files(model, folder_id, files)
+
+    state.page_token = start_page_token
+    state.last_full_sync_at = state.last_synced_at = timezone.now()
+    state.save()
+    return stats
+
+
+def apply_changes(changes, folders):
+    """
+    Applies one page of the changes feed: upserts files now in a synced folder, deletes the rest.
+
+    Returns:
+        tuple: (upserted, deleted) row counts.
+    """
+    present = {folder_id: {} for folder_id in folders} # Folder ID -> {file ID: metadata}
+    gone = set()
+    for change in changes:
+        file_id = change.get('fileId')
+        if not file_id: # Shared drive changes carry no file
+            continue
+        metadata = change.get('file') or {}
+        folder_id = next((parent for parent in metadata.get('parents', []) if parent in folders), None)
+        if change.get('removed') or folder_id is None or not is_syncable(metadata):
+            gone.add(file_id)
+        else:
+            present[folder_id][file_id] = metadata
+
+    upserted = deleted = 0
+    for folder_id, model in folders.items():
+        files = present[folder_id]
+        # A file moved between the synced folders leaves one table and enters the other
+        deleted += delete_files(model, gone.union(*(ids for other, ids in present.items() if other != folder_id)))
+        upserted += upsert_files(model, folder_id, files)
+    return upserted, deleted
+
+
+def incremental_sync(service, state, folders):
+    """Applies the changes feed from state.page_token, saving the token after each page."""
+    stats = {'mode': 'incremental', 'changes': 0, 'upserted': 0, 'deleted': 0}
+    page_token = state.page_token
+    while True:
+        with metrics.span('drive_changes'):
+            response = service.changes().list(
+                pageToken=page_token,
+                pageSize=DRIVE_LIST_PAGE_SIZE,
+                spaces='drive',
+                includeRemoved=True,
+                fields=f'nextPageToken, newStartPageToken, changes(fileId, removed, file({SYNC_FILE_FIELDS}))',
+            ).execute()
+        changes = response.get('changes', [])
+        upserted, deleted = apply_changes(changes, folders)
+        stats['changes'] += len(changes)
+        stats['upserted'] += upserted
+        stats['deleted'] += deleted
+
+        page_token = response.get('nextPageToken') or response['newStartPageToken']
+        state.page_token = page_token
+        if 'newStartPageToken' in response:
+            state.last_synced_at = timezone.now()
+            state.save()
+            return stats
+        state.save(update_fields=['page_token']) # A later failure resumes from this page
+
+
+def sync_drive_folders(service=None, full=False):
+    """
+    Runs one sync pass over the JD and resume Drive folders.
+
+    Args:
+        service: Drive service to use (default: a client borrowed from drive_client_pool).
+        full (bool): List the folders in full even if a changes page token is stored.
+
+    Returns:
+        dict: Pass statistics (mode, changes, upserted, deleted), or None if another pass was already running.
+    """
+    folders = get_synced_folders()
+    key = ",".join(sorted(folders))
+    lock_id = _advisory_lock_id(key)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+        if not cursor.fetchone()[0]:
+            logger.info("Drive sync of %s is already running, skipping this pass", key)
+            return None
+    try:
+        state, _ = DriveSyncState.objects.get_or_create(key=key)
+        with metrics.span('drive_sync'):
+            if service is None:
+                with drive_client_pool.client() as client:
+                    stats = _sync(client, state, folders, full)
+            else:
+                stats = _sync(service, state, folders, full)
+        logger.info("Drive sync (%s): %d changes, %d upserted, %d deleted", stats['mode'], stats['changes'], stats['upserted'], stats['deleted'])
+        return stats
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+
+def _sync(service, state, folders, full):
+    if full or not state.page_token:
+        return full_sync(service, state, folders)
+    try:
+        return incremental_sync(service, state, folders)
+    except Exception as e:
+        if not _is_invalid_page_token(e):
+            raise
+        logger.warning("Drive changes page token %s was rejected (%s), falling back to a full sync", state.page_token, e)
+        return full_sync(service, state, folders)
@@ -0,0 +1,140 @@
+"""
+Embedding layer for semantic resume/JD matching.
+
+Vectors are computed once per document version and persisted in the
+ResumeEmbedding/JDEmbedding tables as raw float32 bytes, so a run only embeds
+new or changed documents and loads everything else straight from the database.
+
+HashingEmbedder is a deterministic local embedder (no network, no model
+download) used by default and for offline testing; OpenAIEmbedder calls the
+OpenAI embeddings API in batches.
+"""
+import numpy as np
+from django.conf import settings
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+VECTOR_DTYPE = np.dtype('<f4')  # Storage format of the vector columns
+
+
+class Embedder:
+    """Base class for embedders: turns texts into L2-normalized float32 vectors."""
+    name = None
+    batch_size = 256  # Texts per embedding call
+
+    def embed(self, texts):
+        """Returns a (len(texts), dimensions) float32 array of L2-normalized embeddings."""
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic local embedder based on signed feature hashing of words and word pairs.
+
+    The signed hashing acts as a random projection of the bag of words, so the
+    same text always maps to the same vector, on any machine.
+    """
+
+    def __init__(self, dimensions=512):
+        self.dimensions = dimensions
+        self.name = f"hashing-v1-{dimensions}"
+        self._vectorizer = HashingVectorizer(
+            n_features=dimensions,
+            ngram_range=(1, 2),
+            stop_words='english',
+            alternate_sign=True,
+            norm=None,
+            dtype=np.float32,
+        )
+
+    def embed(self, texts):
+        matrix = normalize(self._vectorizer.transform(texts), norm='l2', copy=False)
+        return matrix.toarray()
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeds texts with the OpenAI embeddings API."""
+    batch_size = 512
+
+    def __init__(self, model, openai_api_key):
+        from langchain_openai import OpenAIEmbeddings  # Only needed when this backend is selected
+
+        self.name = model
+        self._client = OpenAIEmbeddings(model=model, openai_api_key=openai_api_key, chunk_size=self.batch_size)
+
+    def embed(self, texts):
+        vectors = np.asarray(self._client.embed_documents(list(texts)), dtype=np.float32)
+        return normalize(vectors, norm='l2', copy=False) if len(vectors) else vectors
+
+
+def get_embedder(openai_api_key=None):
+    """Returns the embedder selected by settings.EMBEDDING_BACKEND ('hashing' or 'openai')."""
+    if settings.EMBEDDING_BACKEND == 'hashing':
+        return HashingEmbedder(settings.EMBEDDING_DIMENSIONS)
+    if settings.EMBEDDING_BACKEND == 'openai':
+        return OpenAIEmbedder(settings.EMBEDDING_MODEL, openai_api_key)
+    raise ValueError(f"Unknown embedding backend: {settings.EMBEDDING_BACKEND!r}")
+
+
+def vector_to_bytes(vector):
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+
+def bytes_to_vector(data):
+    """Returns a read-only float32 view of stored vector bytes (no copy)."""
+    return np.frombuffer(data, dtype=VECTOR_DTYPE)
+
+
+def get_embeddings(embedding_model, owner_field, owners, fingerprints, get_texts, embedder):
+    """
+    Returns the embeddings of the given owners (JDs or Resumes), embedding only stale ones.
+
+    Stored vectors whose fingerprint matches the current one are loaded from the
+    database; the other owners' texts are fetched with get_texts(), embedded in
+    batches of embedder.batch_size and upserted, one batch at a time.
+
+    Args:
+        embedding_model: ResumeEmbedding or JDEmbedding.
+        owner_field (str): Name of the owner foreign key on embedding_model ('resume' or 'jd').
+        owners (list): Resume or JD objects.
+        fingerprints (dict): Owner id -> current fingerprint of the owner's content.
+        get_texts: Callable(list of owners) -> dict of owner id -> text (missing or empty: cannot be embedded).
+        embedder (Embedder): Embedder to use; its name selects the stored vectors.
+
+    Returns:
+        tuple: (matrix, embedded_owners) - a float32 array with one row per embedded owner, and those owners in row order.
+    """
+    owner_id_field = f"{owner_field}_id"
+    stored = (
+        embedding_model.objects
+        .filter(**{f"{owner_id_field}__in": [owner.id for owner in owners]}, model_name=embedder.name)
+        .values_list(owner_id_field, 'fingerprint', 'vector')
+    )
+    vectors = {}
+    for owner_id, fingerprint, vector in stored.iterator(chunk_size=10000):
+        if fingerprint == fingerprints.get(owner_id):
+            vectors[owner_id] = bytes_to_vector(vector)
+
+    stale = [owner for owner in owners if owner.id not in vectors and fingerprints.get(owner.id)]
+    for start in range(0, len(stale), embedder.batch_size):
+        batch = stale[start:start + embedder.batch_size]
+        texts = get_texts(batch)
+        batch = [owner for owner in batch if texts.get(owner.id)]
+        if not batch:
+            continue
+        new_vectors = embedder.embed([texts[owner.id] for owner in batch])
+        embedding_model.objects.bulk_create(
+            [
+                embedding_model(**{owner_field: owner}, model_name=embedder.name, fingerprint=fingerprints[owner.id], vector=vector_to_bytes(vector))
+                for owner, vector in zip(batch, new_vectors)
+            ],
+            update_conflicts=True,
+            unique_fields=[owner_field, 'model_name'],
+            update_fields=['fingerprint', 'vector'],
+        )
+        vectors.update((owner.id, vector) for owner, vector in zip(batch, new_vectors))
+
+    embedded_owners = [owner for owner in owners if owner.id in vectors]
+    if not embedded_owners:
+        return np.zeros((0, 0), dtype=np.float32), []
+    return np.vstack([vectors[owner.id] for owner in embedded_owners]), embedded_owners
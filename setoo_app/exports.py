@@ -0,0 +1,261 @@
+"""
+Paginated and streaming access to the matches of an analysis run.
+
+Matches are read from ResumeMatch rows. Pages use keyset pagination on
+(role, score descending, id descending), which the (results, role, -score)
+index serves, so each page is one short index scan however deep it is. The
+cursor is opaque: the base64 of the last row's key.
+
+Exports write rows from a generator as they are read from a server-side
+cursor (QuerySet.iterator), in chunks of settings.RESULTS_EXPORT_CHUNK_SIZE
+rows, so a response of any size is streamed in constant memory. Under ASGI,
+StreamingHttpResponse reads a sync iterator whole (sync_to_async(list)) before
+sending it, so async requests get async generators, which read one chunk at a
+time in the database thread.
+
+Unmatched resumes are UnmatchedResume rows, paged by id, and their number is
+stored on the Results row, so neither is read from the unmatched_resumes blob.
+
+Results saved before ResumeMatch (or UnmatchedResume) rows existed fall back to
+the matched_resumes (or unmatched_resumes) JSON blob, which is decoded whole.
+"""
+import base64
+import csv
+import itertools
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Q
+
+MATCH_FIELDS = ('role', 'resume_id', 'resume_filename', 'score', 'explanation')
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode()
+
+
+def decode_cursor(value):
+    """Returns the key of an opaque cursor, or None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        key = orjson.loads(base64.urlsafe_b64decode(value.encode()))
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        return None
+    return key if isinstance(key, list) else None
+
+
+def parse_page_size(value):
+    """Returns the page size from a request parameter, clamped to 1..settings.RESULTS_MAX_PAGE_SIZE."""
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return settings.RESULTS_PAGE_SIZE
+    return max(1, min(page_size, settings.RESULTS_MAX_PAGE_SIZE))
+
+
+def has_match_rows(results):
+    """Whether a Results row has ResumeMatch rows (checked once per instance)."""
+    if not hasattr(results, '_has_match_rows'):
+        results._has_match_rows = results.matches.exists()
+    return results._has_match_rows
+
+
+async def ahas_match_rows(results):
+    """Async variant of has_match_rows."""
+    if not hasattr(results, '_has_match_rows'):
+        results._has_match_rows = await results.matches.aexists()
+    return results._has_match_rows
+
+
+def legacy_matches(results, role=None):
+    """Yields the match dicts of a Results row saved without ResumeMatch rows, in page order, from its JSON blob."""
+    matched_resumes = results.matched_resumes or {}
+    for match_role in sorted(matched_resumes):
+        if role is not None and match_role != role:
+            continue
+        matches = [match for match in matched_resumes[match_role] if isinstance(match, dict)]
+        for match in sorted(matches, key=lambda match: match.get('score') or 0, reverse=True):
+            yield {
+                'role': match_role,
+                'resume_id': (match.get('resume') or {}).get('id'),
+                'resume_filename': match.get('resume_filename'),
+                'score': match.get('score') or 0.0,
+                'explanation': match.get('explanation', ''),
+            }
+
+
+def role_counts(results):
+    """Returns role -> number of matches of a Results row, ordered by role."""
+    counts = dict(results.matches.order_by('role').values_list('role').annotate(count=Count('id')))
+    if counts:
+        return counts
+    return {role: len(matches) for role, matches in sorted((results.matched_resumes or {}).items())}
+
+
+def _is_match_key(key):
+    return (
+        isinstance(key, list) and len(key) == 3 and isinstance(key[0], str)
+        and isinstance(key[1], (int, float)) and isinstance(key[2], int)
+    )
+
+
+def _offset(key):
+    return key[0] if isinstance(key, list) and len(key) == 1 and isinstance(key[0], int) and key[0] > 0 else 0
+
+
+def match_page(results, role=None, after=None, page_size=None):
+    """
+    Returns one page of a Results row's matches, best score first within each role.
+
+    Args:
+        results (Results): The analysis run.
+        role (str): Only return the matches of this role (None: all roles, in role order).
+        after (list): Cursor key returned for the previous page (see decode_cursor), or None for the first page.
+        page_size (int): Matches per page (default settings.RESULTS_PAGE_SIZE).
+
+    Returns:
+        tuple: (matches, next_cursor) - match dicts with MATCH_FIELDS, and the opaque cursor of the next page (None on the last page).
+    """
+    page_size = page_size or settings.RESULTS_PAGE_SIZE
+    if not has_match_rows(results):
+        offset = _offset(after)
+        rows = list(itertools.islice(legacy_matches(results, role), offset, offset + page_size + 1))
+        next_cursor = encode_cursor([offset + page_size]) if len(rows) > page_size else None
+        return rows[:page_size], next_cursor
+
+    queryset = results.matches.all()
+    if role is not None:
+        queryset = queryset.filter(role=role)
+    if _is_match_key(after):
+        after_role, after_score, after_id = after
+        below = Q(score__lt=after_score) | Q(score=after_score, id__lt=after_id)
+        queryset = queryset.filter(below if role is not None else Q(role=after_role) & below | Q(role__gt=after_role))
+    rows = list(queryset.order_by('role', '-score', '-id').values('id', *MATCH_FIELDS)[:page_size + 1]) # One extra row tells whether there is a next page
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = encode_cursor([last['role'], last['score'], last['id']])
+    return [{field: row[field] for field in MATCH_FIELDS} for row in rows[:page_size]], next_cursor
+
+
+def unmatched_count(results):
+    """Returns the number of unmatched resumes of a Results row (only decoding the JSON blob of legacy rows)."""
+    if results.unmatched_count is not None:
+        return results.unmatched_count
+    return len(results.unmatched_resumes or [])
+
+
+def unmatched_page(results, after=None, page_size=None):
+    """
+    Returns one page of a Results row's unmatched resume filenames, in the order the run listed them.
+
+    Pages use keyset pagination on the UnmatchedResume id; results saved before those rows
+    existed (unmatched_count is null) are paged by offset in their unmatched_resumes JSON list.
+
+    Returns:
+        tuple: (filenames, next_cursor) - next_cursor is None on the last page.
+    """
+    page_size = page_size or settings.RESULTS_PAGE_SIZE
+    if results.unmatched_count is None:
+        offset = _offset(after)
+        filenames = (results.unmatched_resumes or [])[offset:offset + page_size + 1]
+        next_cursor = encode_cursor([offset + page_size]) if len(filenames) > page_size else None
+        return filenames[:page_size], next_cursor
+
+    queryset = results.unmatched.all()
+    if _offset(after): # [id] of the last row of the previous page
+        queryset = queryset.filter(id__gt=after[0])
+    rows = list(queryset.order_by('id').values_list('id', 'resume_filename')[:page_size + 1]) # One extra row tells whether there is a next page
+    next_cursor = encode_cursor([rows[page_size - 1][0]]) if len(rows) > page_size else None
+    return [filename for _, filename in rows[:page_size]], next_cursor
+
+
+def _match_rows(results, role):
+    queryset = results.matches.all()
+    if role is not None:
+        queryset = queryset.filter(role=role)
+    return queryset.order_by('role', '-score', '-id').values_list(*MATCH_FIELDS)
+
+
+def iter_match_rows(results, role=None):
+    """Yields every match of a Results row as a MATCH_FIELDS tuple, in page order, without materializing them."""
+    if not has_match_rows(results):
+        for match in legacy_matches(results, role):
+            yield tuple(match[field] for field in MATCH_FIELDS)
+        return
+    yield from _match_rows(results, role).iterator(chunk_size=settings.RESULTS_EXPORT_CHUNK_SIZE)
+
+
+async def aiter_match_rows(results, role=None):
+    """Async variant of iter_match_rows."""
+    if not await ahas_match_rows(results):
+        for match in await sync_to_async(list)(legacy_matches(results, role)): # The blob is decoded whole anyway
+            yield tuple(match[field] for field in MATCH_FIELDS)
+        return
+    # Not QuerySet.aiterator(): for values_list() querysets, Django 5.1 runs the query on the event loop.
+    # The server-side cursor generator is advanced one chunk at a time in the database thread instead.
+    chunk_size = settings.RESULTS_EXPORT_CHUNK_SIZE
+    rows = _match_rows(results, role).iterator(chunk_size=chunk_size) # Nothing is run before the first chunk
+    while True:
+        chunk = await sync_to_async(list)(itertools.islice(rows, chunk_size))
+        for row in chunk:
+            yield row
+        if len(chunk) < chunk_size:
+            return
+
+
+def _chunks(rows):
+    chunk_size = settings.RESULTS_EXPORT_CHUNK_SIZE
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _achunks(rows):
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == settings.RESULTS_EXPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Echo:
+    """File-like object whose write() returns the written value, so csv.writer formats rows without buffering them."""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(rows):
+    """Yields a CSV export (header row first) of MATCH_FIELDS tuples, one chunk of rows per piece."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(MATCH_FIELDS)
+    for chunk in _chunks(iter(rows)):
+        yield "".join(writer.writerow(row) for row in chunk)
+
+
+def ndjson_stream(rows):
+    """Yields an NDJSON export (one JSON object per match) of MATCH_FIELDS tuples, one chunk of rows per piece."""
+    for chunk in _chunks(iter(rows)):
+        yield b"".join(orjson.dumps(dict(zip(MATCH_FIELDS, row))) + b"\n" for row in chunk)
+
+
+async def acsv_stream(rows):
+    """Async variant of csv_stream, for an async iterator of rows (see aiter_match_rows)."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(MATCH_FIELDS)
+    async for chunk in _achunks(rows):
+        yield "".join(writer.writerow(row) for row in chunk)
+
+
+async def andjson_stream(rows):
+    """Async variant of ndjson_stream, for an async iterator of rows (see aiter_match_rows)."""
+    async for chunk in _achunks(rows):
+        yield b"".join(orjson.dumps(dict(zip(MATCH_FIELDS, row))) + b"\n" for row in chunk)
@@ -0,0 +1,389 @@
+"""
+In-memory stand-ins for external services, for exercising the pipeline offline.
+
+FakeDriveService implements the subset of the Google Drive v3 API used by
+setoo_app.utils, so it can be passed wherever a get_drive_service() client is
+expected (or returned from a service_factory). FakeDriveTransport serves the
+same files to the async Drive client of setoo_app.async_drive. FakeLLM answers
+JD structuring prompts like the OpenAI LLM client (see utils.structure_jds).
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+
+class _FakeRequest:
+    def __init__(self, drive, func):
+        self._drive = drive
+        self._func = func
+
+    def execute(self, *args, **kwargs):
+        if self._drive.latency:
+            time.sleep(self._drive.latency) # Simulated network round trip
+        try:
+            return self._func()
+        except KeyError as e: # Unknown file ID, answered like Drive does
+            raise FakeHttpError(404, f"File not found: {e}") from None
+
+    def next_chunk(self, *args, **kwargs):
+        return None, self.execute() # Uploads complete in a single "chunk"
+
+
+class _FakeBatchRequest:
+    def __init__(self, drive, callback=None):
+        self._drive = drive
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request, callback or self._callback, request_id or str(len(self._requests))))
+
+    def execute(self, *args, **kwargs):
+        if self._drive.latency:
+            time.sleep(self._drive.latency) # One round trip for the whole batch
+        for request, callback, request_id in self._requests:
+            try:
+                response, exception = request._func(), None
+            except KeyError as e:
+                response, exception = None, FakeHttpError(404, f"File not found: {e}")
+            except Exception as e: # Batch calls fail individually, like real Drive batch responses
+                response, exception = None, e
+            callback(request_id, response, exception)
+
+
+class FakeHttpError(Exception):
+    """Mimics googleapiclient.errors.HttpError closely enough for status checks."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.resp = type('FakeResponse', (), {'status': status})()
+
+
+class _FakeFilesResource:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def list(self, q="", fields=None, pageSize=100, pageToken=None, **kwargs):
+        folder_id = q.split("'")[1] if "in parents" in q else None
+        return _FakeRequest(self._drive, lambda: self._drive._list(folder_id, pageSize, pageToken))
+
+    def get(self, fileId, fields=None, **kwargs):
+        return _FakeRequest(self._drive, lambda: self._drive._metadata(fileId))
+
+    def get_media(self, fileId, **kwargs):
+        return _FakeRequest(self._drive, lambda: self._drive._content(fileId))
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        content = media_body.getbytes(0, media_body.size()) if media_body is not None else b""
+        return _FakeRequest(self._drive, lambda: self._drive._create(body or {}, content))
+
+    def delete(self, fileId, **kwargs):
+        return _FakeRequest(self._drive, lambda: self._drive._delete(fileId))
+
+    def update(self, fileId, body=None, addParents=None, removeParents=None, fields=None, **kwargs):
+        return _FakeRequest(self._drive, lambda: self._drive._update(fileId, body or {}, addParents, removeParents))
+
+
+class _FakeChangesResource:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def getStartPageToken(self, **kwargs):
+        return _FakeRequest(self._drive, self._drive._start_page_token)
+
+    def list(self, pageToken, pageSize=100, fields=None, **kwargs):
+        return _FakeRequest(self._drive, lambda: self._drive._changes(pageToken, pageSize))
+
+
+class FakeDriveService:
+    """
+    Thread-safe in-memory Drive service.
+
+    Args:
+        latency (float): Seconds every executed request sleeps, to simulate network round trips.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.request_count = 0
+        self._files = {}
+        self._ids = itertools.count(1)
+        self._change_log = [] # File IDs in order of change; a page token is a position in this log
+        self._lock = threading.Lock()
+
+    def files(self):
+        return _FakeFilesResource(self)
+
+    def changes(self):
+        return _FakeChangesResource(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _FakeBatchRequest(self, callback)
+
+    def add_file(self, name, content, folder_id, mime_type='application/pdf'):
+        """Stores a file directly (without counting a request) and returns its ID."""
+        return self._create({'name': name, 'parents': [folder_id], 'mimeType': mime_type}, content, count=False)['id']
+
+    def trash_file(self, file_id):
+        """Moves a file to the trash directly (without counting a request)."""
+        with self._lock:
+            self._files[file_id]['trashed'] = True
+            self._change_log.append(file_id)
+
+    def _metadata_for(self, file_id):
+        entry = self._files[file_id]
+        return {
+            'id': file_id,
+            'name': entry['name'],
+            'mimeType': entry['mimeType'],
+            'parents': entry['parents'],
+            'md5Checksum': hashlib.md5(entry['content']).hexdigest(),
+            'modifiedTime': entry['modifiedTime'],
+            'size': str(len(entry['content'])),
+            'trashed': entry.get('trashed', False),
+        }
+
+    def _count(self):
+        with self._lock:
+            self.request_count += 1
+
+    def _list(self, folder_id, page_size, page_token):
+        self._count()
+        with self._lock:
+            file_ids = sorted(
+                (fid for fid, entry in self._files.items() if (folder_id is None or folder_id in entry['parents']) and not entry.get('trashed')),
+                key=lambda fid: int(fid.split('-')[1]),
+            )
+        start = int(page_token or 0)
+        response = {'files': [self._metadata_for(fid) for fid in file_ids[start:start + page_size]]}
+        if start + page_size < len(file_ids):
+            response['nextPageToken'] = str(start + page_size)
+        return response
+
+    def _metadata(self, file_id):
+        self._count()
+        with self._lock:
+            return self._metadata_for(file_id)
+
+    def _content(self, file_id):
+        self._count()
+        with self._lock:
+            return self._files[file_id]['content']
+
+    def _create(self, body, content, count=True):
+        if count:
+            self._count()
+        with self._lock:
+            file_id = f"fake-{next(self._ids)}"
+            self._files[file_id] = {
+                'name': body.get('name', file_id),
+                'parents': list(body.get('parents', [])),
+                'mimeType': body.get('mimeType', 'application/octet-stream'),
+                'content': content,
+                'modifiedTime': datetime.now(timezone.utc).isoformat(),
+            }
+            self._change_log.append(file_id)
+        return {'id': file_id}
+
+    def _delete(self, file_id):
+        self._count()
+        with self._lock:
+            del self._files[file_id]
+            self._change_log.append(file_id)
+        return ""
+
+    def _update(self, file_id, body, add_parents, remove_parents):
+        self._count()
+        with self._lock:
+            entry = self._files[file_id]
+            if 'name' in body:
+                entry['name'] = body['name']
+            if remove_parents:
+                entry['parents'] = [p for p in entry['parents'] if p not in remove_parents.split(',')]
+            if add_parents:
+                entry['parents'].extend(add_parents.split(','))
+            entry['modifiedTime'] = datetime.now(timezone.utc).isoformat()
+            self._change_log.append(file_id)
+            return self._metadata_for(file_id)
+
+    def _start_page_token(self):
+        self._count()
+        with self._lock:
+            return {'startPageToken': str(len(self._change_log))}
+
+    def _changes(self, page_token, page_size):
+        self._count()
+        with self._lock:
+            start = int(page_token)
+            end = min(start + page_size, len(self._change_log))
+            changes = []
+            for file_id in self._change_log[start:end]:
+                if file_id in self._files:
+                    changes.append({'fileId': file_id, 'removed': False, 'file': self._metadata_for(file_id)})
+                else:
+                    changes.append({'fileId': file_id, 'removed': True})
+            response = {'changes': changes}
+            if end < len(self._change_log):
+                response['nextPageToken'] = str(end)
+            else:
+                response['newStartPageToken'] = str(end)
+            return response
+
+
+class FakeCredentials:
+    """Service account credentials stand-in whose token never expires."""
+    valid = True
+    token = 'fake-token'
+
+
+class FakeDriveTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport serving the Drive v3 REST calls of setoo_app.async_drive from a FakeDriveService.
+
+    Files uploaded through it are stored in (and deleted from) the same in-memory Drive as the
+    sync fake, and every request sleeps the service's latency without blocking the event loop.
+
+    Args:
+        drive (FakeDriveService): The in-memory Drive.
+        max_chunk_bytes (int): Store at most this many bytes of each resumable upload chunk, as Drive
+            may, so clients have to resume from the Range it reports (None stores whole chunks).
+    """
+
+    def __init__(self, drive, max_chunk_bytes=None):
+        self._drive = drive
+        self.max_chunk_bytes = max_chunk_bytes
+        self._sessions = {} # Resumable upload session ID -> [metadata, received bytes]
+        self._session_ids = itertools.count(1)
+
+    async def handle_async_request(self, request):
+        if self._drive.latency:
+            await asyncio.sleep(self._drive.latency) # Simulated network round trip
+        body = await request.aread()
+        path, params = request.url.path, request.url.params
+        try:
+            if request.method == 'POST' and path == '/upload/drive/v3/files' and params.get('uploadType') == 'multipart':
+                metadata, content = self._parse_multipart(body, request.headers['Content-Type'])
+                return httpx.Response(200, json=self._drive._create(metadata, content))
+            if request.method == 'POST' and path == '/upload/drive/v3/files' and params.get('uploadType') == 'resumable':
+                session_id = str(next(self._session_ids))
+                self._sessions[session_id] = [json.loads(body), b""]
+                return httpx.Response(200, headers={'Location': f"https://www.googleapis.com/upload/drive/v3/sessions/{session_id}"})
+            if request.method == 'PUT' and path.startswith('/upload/drive/v3/sessions/'):
+                session = self._sessions[path.rsplit('/', 1)[1]]
+                content_range, total = request.headers['Content-Range'].removeprefix('bytes ').split('/')
+                start = int(content_range.split('-')[0])
+                if start > len(session[1]):
+                    return httpx.Response(400, json={'error': {'message': f"Chunk starts at byte {start}, {len(session[1])} stored"}})
+                session[1] = session[1][:start] + body[:self.max_chunk_bytes]
+                if len(session[1]) < int(total):
+                    return httpx.Response(308, headers={'Range': f"bytes=0-{len(session[1]) - 1}"} if session[1] else {})
+                del self._sessions[path.rsplit('/', 1)[1]]
+                return httpx.Response(200, json=self._drive._create(session[0], session[1]))
+            if request.method == 'DELETE' and path.startswith('/drive/v3/files/'):
+                self._drive._delete(path.rsplit('/', 1)[1])
+                return httpx.Response(204)
+        except KeyError as e:
+            return httpx.Response(404, json={'error': {'message': f"File not found: {e}"}})
+        return httpx.Response(404, json={'error': {'message': f"Unsupported fake Drive call: {request.method} {path}"}})
+
+    @staticmethod
+    def _parse_multipart(body, content_type):
+        boundary = content_type.split('boundary=', 1)[1].encode()
+        parts = [part.partition(b"\r\n\r\n")[2] for part in body.split(b"--" + boundary)[1:-1]]
+        return json.loads(parts[0].rstrip(b"\r\n")), parts[1][:-2] # Each part ends with the CRLF before the next boundary
+
+
+class FakeRateLimitError(Exception):
+    """Mimics openai.RateLimitError closely enough for utils/llm rate-limit checks."""
+    status_code = 429
+
+
+class FakeLLM:
+    """
+    Offline LLM answering JD structuring and resume profile prompts with a JSON block derived from the text.
+
+    The job title is the first line of the JD and the skills are the distinct words of its
+    Requirements line (of the whole JD if there is none). Resume skills are the distinct
+    words of the Skills line.
+
+    Args:
+        latency (float): Seconds every call takes, to simulate the OpenAI round trip.
+        rate_limit_every (int): Fail every n-th call with FakeRateLimitError (None never fails).
+    """
+
+    def __init__(self, latency=0.0, rate_limit_every=None):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.call_count = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt):
+        match = re.search(r"```text\s*(.*?)\s*```", prompt, re.DOTALL)
+        jd_text = match.group(1) if match else prompt
+        if '"years_experience"' in prompt: # Resume profile prompt
+            return self._respond_to_resume(jd_text)
+        lines = [line.strip() for line in jd_text.splitlines() if line.strip()]
+        requirements = re.search(r"^Requirements:\s*\n(.*)$", jd_text, re.MULTILINE)
+        words = list(dict.fromkeys(re.findall(r"[a-z][a-z+#.]+", (requirements.group(1) if requirements else jd_text).lower())))
+        data = {
+            'job_title': lines[0] if lines else "",
+            'department': "",
+            'responsibilities': " ".join(lines[1:3]),
+            'skills': ", ".join(words[:20]),
+            'experience': "",
+            'education': "",
+        }
+        return f"```json\n{json.dumps(data)}\n```"
+
+    def _respond_to_resume(self, resume_text):
+        skills = re.search(r"^Skills:\s*\n(.*)$", resume_text, re.MULTILINE)
+        words = list(dict.fromkeys(re.findall(r"[a-z][a-z+#.]+", (skills.group(1) if skills else resume_text).lower())))
+        years = re.search(r"(\d+)\+? years", resume_text)
+        data = {
+            'skills': ", ".join(words[:20]),
+            'years_experience': years.group(1) if years else "",
+            'education_level': "",
+            'titles': "",
+        }
+        return f"```json\n{json.dumps(data)}\n```"
+
+    def _start_call(self):
+        with self._lock:
+            self.call_count += 1
+            if self.rate_limit_every and self.call_count % self.rate_limit_every == 0:
+                raise FakeRateLimitError("Rate limit reached (fake)")
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def _end_call(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def invoke(self, prompt):
+        self._start_call()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return self._respond(prompt)
+        finally:
+            self._end_call()
+
+    __call__ = invoke
+
+    async def ainvoke(self, prompt):
+        self._start_call()
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self._respond(prompt)
+        finally:
+            self._end_call()
@@ -0,0 +1,85 @@
+"""
+Paginated, searchable listings of JDs and resumes.
+
+Pages use keyset pagination on the primary key (newest first): a page is the
+next page_size rows below the last id of the previous page, so every page is
+one short index scan no matter how deep it is or how large the table grows.
+Filename search compiles to UPPER(original_filename::text) LIKE UPPER(...),
+which the trigram GIN indexes on JD and Resume serve for both prefix and
+substring patterns.
+"""
+from django.conf import settings
+
+FILE_LIST_FIELDS = ('id', 'original_filename', 'uploaded_at') # Columns the listings need
+SEARCH_MODES = ('contains', 'prefix')
+
+
+def search_files(queryset, query, mode='contains'):
+    """Filters a JD/Resume queryset by case-insensitive filename substring (or prefix, with mode='prefix')."""
+    if not query:
+        return queryset
+    if mode == 'prefix':
+        return queryset.filter(original_filename__istartswith=query)
+    return queryset.filter(original_filename__icontains=query)
+
+
+def parse_cursor(value):
+    """Returns the keyset cursor (an id) from a request parameter, or None if absent or invalid."""
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_page_size(value):
+    """Returns the page size from a request parameter, clamped to 1..settings.FILE_LIST_MAX_PAGE_SIZE."""
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return settings.FILE_LIST_PAGE_SIZE
+    return max(1, min(page_size, settings.FILE_LIST_MAX_PAGE_SIZE))
+
+
+def _page_query(queryset, after, page_size):
+    if after is not None:
+        queryset = queryset.filter(pk__lt=after)
+    return queryset.order_by('-pk')[:page_size + 1] # One extra row tells whether there is a next page
+
+
+def _split_page(rows, page_size):
+    next_cursor = rows[page_size - 1].pk if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def keyset_page(queryset, after=None, page_size=None):
+    """
+    Returns one page of a queryset in descending primary key order.
+
+    Args:
+        queryset: JD or Resume queryset (filtered and column-limited as needed).
+        after (int): Cursor returned for the previous page (None for the first page).
+        page_size (int): Rows per page (default settings.FILE_LIST_PAGE_SIZE).
+
+    Returns:
+        tuple: (rows, next_cursor) - next_cursor is None on the last page.
+    """
+    page_size = page_size or settings.FILE_LIST_PAGE_SIZE
+    return _split_page(list(_page_query(queryset, after, page_size)), page_size)
+
+
+async def akeyset_page(queryset, after=None, page_size=None):
+    """Async variant of keyset_page."""
+    page_size = page_size or settings.FILE_LIST_PAGE_SIZE
+    return _split_page([row async for row in _page_query(queryset, after, page_size)], page_size)
+
+
+def list_files(model, query='', mode='contains', after=None, page_size=None):
+    """Returns a page of a model's files (limited to FILE_LIST_FIELDS) matching a filename search, and the next cursor."""
+    queryset = search_files(model.objects.only(*FILE_LIST_FIELDS), query, mode)
+    return keyset_page(queryset, after, page_size)
+
+
+async def alist_files(model, query='', mode='contains', after=None, page_size=None):
+    """Async variant of list_files."""
+    queryset = search_files(model.objects.only(*FILE_LIST_FIELDS), query, mode)
+    return await akeyset_page(queryset, after, page_size)
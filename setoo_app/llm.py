@@ -0,0 +1,140 @@
+"""
+Concurrent, rate-limited LLM calls.
+
+complete_concurrently() runs many prompts at once on an asyncio event loop,
+capped by a concurrency limit and a tokens-per-minute budget, and retries
+rate-limited calls with exponential backoff. The event loop runs on a helper
+thread and results are handed back to the calling thread as they complete, so
+callers stay synchronous and can use the ORM between results.
+"""
+import asyncio
+import queue
+import threading
+import time
+
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from . import metrics
+
+
+def estimate_tokens(text):
+    """Rough token count of a text (about 4 characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 errors (openai.RateLimitError and look-alikes)."""
+    return getattr(error, 'status_code', None) == 429
+
+
+class TokenBucket:
+    """
+    Async token bucket enforcing a tokens-per-minute budget.
+
+    The bucket starts full and refills continuously; acquire() waits until the
+    requested number of tokens is available. Waiters are served in order.
+    """
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens):
+        tokens = min(tokens, self.capacity) # A single oversized prompt must not wait forever
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
+async def _complete_all(prompts, llm, max_concurrency, tokens_per_minute, completion_tokens, max_retries, token_counter, emit):
+    semaphore = asyncio.Semaphore(max_concurrency)
+    bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def complete(key, prompt):
+        async with semaphore:
+            try:
+                retrying = AsyncRetrying(
+                    retry=retry_if_exception(is_rate_limit_error),
+                    wait=wait_random_exponential(multiplier=0.5, max=30),
+                    stop=stop_after_attempt(max_retries),
+                    reraise=True,
+                )
+                async for attempt in retrying:
+                    with attempt:
+                        if bucket is not None:
+                            await bucket.acquire(token_counter(prompt) + completion_tokens)
+                        start = time.perf_counter()
+                        try:
+                            response = await llm.ainvoke(prompt)
+                        except Exception as e:
+                            if is_rate_limit_error(e):
+                                metrics.LLM_RATE_LIMITED.inc()
+                            raise
+                        finally:
+                            metrics.observe('llm_call', time.perf_counter() - start)
+                emit((key, response, None))
+            except Exception as e: # Reported per prompt; the other calls carry on
+                metrics.STAGE_ERRORS.inc(stage='llm_call')
+                emit((key, None, e))
+
+    await asyncio.gather(*(complete(key, prompt) for key, prompt in prompts.items()))
+
+
+_LOOP_DONE = object()  # Marker posted by the event loop thread when it exits
+
+
+def complete_concurrently(prompts, llm, max_concurrency, tokens_per_minute=None, completion_tokens=256, max_retries=6, token_counter=estimate_tokens):
+    """
+    Sends many prompts to an LLM concurrently, yielding each result as it completes.
+
+    Args:
+        prompts (dict): Key -> prompt text.
+        llm: LangChain-style LLM with an async ainvoke(prompt) method returning text.
+        max_concurrency (int): Maximum number of calls in flight.
+        tokens_per_minute (int): Token budget across all calls (prompt estimate plus completion_tokens per call), or None.
+        completion_tokens (int): Tokens reserved per call for the completion.
+        max_retries (int): Attempts per prompt when the API answers with a rate-limit error.
+        token_counter: Callable(prompt) -> number of prompt tokens charged to the budget (default estimate_tokens).
+
+    Yields:
+        tuple: (key, response, error) - response is None and error the exception if the call failed
+            (or if the event loop stopped before answering the prompt).
+    """
+    if not prompts:
+        return
+    results = queue.Queue()
+    coroutine = _complete_all(prompts, llm, max_concurrency, tokens_per_minute, completion_tokens, max_retries, token_counter, results.put)
+
+    def run():
+        error = None
+        try:
+            asyncio.run(coroutine)
+        except BaseException as e: # e.g. CancelledError escaping a call: the loop stops with prompts unanswered
+            error = e
+        finally:
+            results.put((_LOOP_DONE, None, error)) # Always posted last, so the caller never waits for results that will not come
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    pending = set(prompts)
+    while pending:
+        key, response, error = results.get()
+        if key is _LOOP_DONE:
+            error = RuntimeError(f"LLM event loop stopped before completing every prompt: {error!r}")
+            for key in list(pending):
+                yield key, None, error
+            break
+        pending.discard(key)
+        yield key, response, error
+    thread.join()
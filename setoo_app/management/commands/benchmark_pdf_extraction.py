@@ -0,0 +1,62 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand
+
+from setoo_app import pdf_extraction
+from setoo_app.benchmarking import synthetic_pdfs, measure_in_subprocess
+
+
+def _extract_all(backend, documents):
+    extractor = pdf_extraction.get_extractor(backend)
+    return sum(len(extractor.extract_pages(document)) for document in documents)
+
+
+def _extract_all_parallel(backend, documents, processes):
+    results = pdf_extraction.extract_texts_parallel(enumerate(documents), backend, max_workers=processes)
+    return sum(text.count(pdf_extraction.PAGE_SEPARATOR) + 1 for _, text, _, _ in results if text is not None)
+
+
+def _or_na(value):
+    return "n/a" if value is None else value
+
+
+class Command(BaseCommand):
+    help = "Compares the PDF extraction backends on synthetic documents (pages per second and memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=200, help="Number of synthetic PDFs.")
+        parser.add_argument('--pages', type=int, default=5, help="Pages per PDF.")
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help="Worker processes for the process-pool mode.")
+        parser.add_argument('--output', help="Also write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        documents = synthetic_pdfs(options['documents'], options['pages'])
+        self.stdout.write(f"{len(documents)} documents x {options['pages']} pages, {sum(map(len, documents)) / 2**20:.1f} MiB of PDF")
+
+        runs = [(name, _extract_all, (name, documents)) for name, extractor in pdf_extraction.EXTRACTORS.items() if extractor.is_available()]
+        runs.append((f"pymupdf x{options['processes']} processes", _extract_all_parallel, ('pymupdf', documents, options['processes'])))
+
+        rows = []
+        for label, func, func_args in runs:
+            measurement = measure_in_subprocess(func, *func_args) # Fresh process per backend, so peak RSS is comparable
+            pages = measurement['result']
+            rows.append({
+                'backend': label,
+                'pages': pages,
+                'seconds': round(measurement['seconds'], 3),
+                'pages_per_second': round(pages / measurement['seconds'], 1) if measurement['seconds'] else None,
+                'python_peak_mib': round(measurement['python_peak_bytes'] / 2**20, 1),
+                'max_rss_mib': round(measurement['max_rss_bytes'] / 2**20, 1) if measurement['max_rss_bytes'] is not None else None, # None without /proc
+            })
+
+        self.stdout.write(f"{'backend':<28}{'pages':>8}{'seconds':>10}{'pages/s':>10}{'py peak MiB':>13}{'max RSS MiB':>13}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['backend']:<28}{row['pages']:>8}{row['seconds']:>10}{_or_na(row['pages_per_second']):>10}"
+                f"{row['python_peak_mib']:>13}{_or_na(row['max_rss_mib']):>13}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(rows, f, indent=2)
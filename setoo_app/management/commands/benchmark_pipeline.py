@@ -0,0 +1,190 @@
+import json
+import random
+import resource
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases, override_settings
+
+from setoo_app.benchmarking import (
+    ROLE_SKILLS, synthetic_jd_text, synthetic_resume_text, synthetic_pdf, random_text, peak_rss_bytes, reset_peak_rss,
+)
+from setoo_app import metrics
+from setoo_app.fakes import FakeDriveService, FakeLLM
+from setoo_app.models import JD, Resume
+from setoo_app.pipeline import run_analysis
+
+JD_FOLDER_ID = 'benchmark-jds'
+RESUME_FOLDER_ID = 'benchmark-resumes'
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _stage_totals():
+    """Returns {stage: (observations, total seconds)} of setoo_stage_duration_seconds so far."""
+    return {stage: (sum(values[:-1]), values[-1]) for (stage,), values in metrics.STAGE_SECONDS.snapshot()}
+
+
+def _mib(n_bytes):
+    return "n/a" if n_bytes is None else f"{n_bytes / 2**20:.0f} MiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the analysis pipeline end to end on a synthetic corpus, against a throwaway test database, "
+        "with Google Drive and the LLM replaced by local fakes. Reports per-stage timing, throughput and peak memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resumes', default='1000', help="Resume pool size, or a comma-separated list of sizes to run one after another (e.g. 10000,50000,100000).")
+        parser.add_argument('--jds', type=int, default=20, help="Number of job descriptions.")
+        parser.add_argument('--pages', type=int, default=2, help="Pages per resume PDF.")
+        parser.add_argument('--unique-documents', type=int, default=2000, help="Distinct resume PDFs generated; larger pools reuse them (each file is still downloaded and extracted).")
+        parser.add_argument('--drive-latency', type=float, default=0.02, help="Seconds per fake Drive request.")
+        parser.add_argument('--llm-latency', type=float, default=1.0, help="Seconds per fake LLM call.")
+        parser.add_argument('--matching-backend', choices=['terms', 'embeddings'], default=settings.MATCHING_BACKEND)
+        parser.add_argument('--skill-prefilter', type=int, default=settings.SKILL_PREFILTER_MIN_SHARED, help="Skills a resume must share with a role to be scored (see SKILL_PREFILTER_MIN_SHARED; 0 disables).")
+        parser.add_argument('--match-source', choices=['text', 'profile'], default=settings.RESUME_MATCH_SOURCE, help="Match resumes on their text or their profile.")
+        parser.add_argument('--incremental', action='store_true', help="Run the first (cold) analysis in incremental mode.")
+        parser.add_argument('--rerun', action='store_true', help="Also time a second, incremental run on the warm caches.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keepdb', action='store_true', help="Keep the test database between invocations.")
+        parser.add_argument('--output', help="Append one JSON line per pool size to this file.")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['resumes'].split(',')]
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            with override_settings(
+                MATCHING_BACKEND=options['matching_backend'],
+                SKILL_PREFILTER_MIN_SHARED=options['skill_prefilter'] or None,
+                RESUME_MATCH_SOURCE=options['match_source'],
+            ):
+                for size in sizes:
+                    record = self.benchmark(size, options)
+                    self.report(record)
+                    if options['output']:
+                        with open(options['output'], 'a') as f:
+                            f.write(json.dumps(record) + "\n")
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+    def build_corpus(self, service, n_resumes, options):
+        """Stores n_resumes resume PDFs and the JD PDFs in the fake Drive and creates their database rows."""
+        rng = random.Random(options['seed'])
+        roles = list(ROLE_SKILLS)
+        jds = []
+        for i in range(options['jds']):
+            role = roles[i % len(roles)]
+            filename = f"jd_{i:04d}_{role.replace(' ', '_').lower()}.pdf"
+            file_id = service.add_file(filename, synthetic_pdf([synthetic_jd_text(rng, role)], footer="careers.example.com"), JD_FOLDER_ID)
+            jds.append(JD(original_filename=filename, drive_file_id=file_id, drive_folder_id=JD_FOLDER_ID))
+        JD.objects.bulk_create(jds)
+
+        documents = [
+            synthetic_pdf([synthetic_resume_text(rng, roles[i % len(roles)])] + [random_text(rng, 300) for _ in range(options['pages'] - 1)])
+            for i in range(min(n_resumes, options['unique_documents']))
+        ]
+        resumes = []
+        for i in range(n_resumes):
+            filename = f"resume_{i:06d}.pdf"
+            file_id = service.add_file(filename, documents[i % len(documents)], RESUME_FOLDER_ID)
+            resumes.append(Resume(original_filename=filename, drive_file_id=file_id, drive_folder_id=RESUME_FOLDER_ID))
+        Resume.objects.bulk_create(resumes, batch_size=5000)
+
+    def run_pipeline(self, name, service, options, incremental):
+        llm = FakeLLM(latency=options['llm_latency'])
+        requests_before = service.request_count
+        marks = []
+
+        def progress(stage, percent):
+            if not marks or marks[-1][0] != stage:
+                marks.append((stage, time.perf_counter()))
+
+        reset_peak_rss()
+        totals_before = _stage_totals()
+        start = time.perf_counter()
+        results, _ = run_analysis(None, progress=progress, service_factory=lambda: service, incremental=incremental, llm=llm)
+        total = time.perf_counter() - start
+
+        phases = {stage: round(marks[i + 1][1] - at, 3) for i, (stage, at) in enumerate(marks[:-1])}
+        stages = {}
+        for stage, (count, seconds) in sorted(_stage_totals().items()):
+            count_before, seconds_before = totals_before.get(stage, (0, 0.0))
+            if count > count_before: # Summed over every call, so concurrent stages can add up to more than the wall time
+                stages[stage] = {'count': count - count_before, 'seconds': round(seconds - seconds_before, 3)}
+        n_resumes = Resume.objects.count()
+        return {
+            'name': name,
+            'incremental': incremental,
+            'total_seconds': round(total, 3),
+            'phases': phases,
+            'stages': stages,
+            'resumes_per_second': round(n_resumes / total, 1) if total else None,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'children_peak_rss_bytes': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024, # Extraction/vectorizing workers (KiB on Linux)
+            'drive_requests': service.request_count - requests_before,
+            'llm_calls': llm.call_count,
+            'matched_resumes': sum(len(matches) for matches in results.matched_resumes.values()),
+            'unmatched_resumes': results.unmatched_count,
+        }
+
+    def benchmark(self, n_resumes, options):
+        call_command('flush', interactive=False, verbosity=0)
+        service = FakeDriveService(latency=options['drive_latency'])
+        start = time.perf_counter()
+        self.build_corpus(service, n_resumes, options)
+        corpus_seconds = time.perf_counter() - start
+
+        runs = [self.run_pipeline('cold', service, options, incremental=options['incremental'])]
+        if options['rerun']:
+            runs.append(self.run_pipeline('warm', service, options, incremental=True))
+
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': _git_commit(),
+            'resumes': n_resumes,
+            'jds': options['jds'],
+            'pages': options['pages'],
+            'unique_documents': options['unique_documents'],
+            'drive_latency': options['drive_latency'],
+            'llm_latency': options['llm_latency'],
+            'matching_backend': options['matching_backend'],
+            'corpus_seconds': round(corpus_seconds, 3),
+            'settings': {
+                'DRIVE_DOWNLOAD_CONCURRENCY': settings.DRIVE_DOWNLOAD_CONCURRENCY,
+                'LLM_MAX_CONCURRENCY': settings.LLM_MAX_CONCURRENCY,
+                'PDF_EXTRACTOR_BACKEND': settings.PDF_EXTRACTOR_BACKEND,
+                'PDF_EXTRACTION_PROCESSES': settings.PDF_EXTRACTION_PROCESSES,
+                'SKILL_PREFILTER_MIN_SHARED': settings.SKILL_PREFILTER_MIN_SHARED,
+                'RESUME_MATCH_SOURCE': settings.RESUME_MATCH_SOURCE,
+            },
+            'runs': runs,
+        }
+
+    def report(self, record):
+        self.stdout.write(
+            f"{record['resumes']} resumes x {record['jds']} JDs ({record['matching_backend']} matching), "
+            f"corpus built in {record['corpus_seconds']}s"
+        )
+        for run in record['runs']:
+            self.stdout.write(
+                f"  {run['name']}: {run['total_seconds']}s, {run['resumes_per_second']} resumes/s, "
+                f"peak RSS {_mib(run['peak_rss_bytes'])} (workers {_mib(run['children_peak_rss_bytes'])}), "
+                f"{run['drive_requests']} Drive requests, {run['llm_calls']} LLM calls, "
+                f"{run['matched_resumes']} matched / {run['unmatched_resumes']} unmatched"
+            )
+            for phase, seconds in run['phases'].items():
+                self.stdout.write(f"    {phase:<32}{seconds:>10.3f}s")
+            self.stdout.write("    per stage (summed over calls):")
+            for stage, totals in run['stages'].items():
+                self.stdout.write(f"      {stage:<30}{totals['seconds']:>10.3f}s {totals['count']:>8} calls")
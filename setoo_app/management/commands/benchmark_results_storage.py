@@ -0,0 +1,127 @@
+import json
+import random
+import statistics
+import time
+
+import orjson
+import zstandard
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from setoo_app import compressed_json
+from setoo_app.benchmarking import synthetic_results_payload
+
+SECTIONS = ('matched_resumes', 'unmatched_resumes', 'analytics')
+
+
+def _median_seconds(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares Results payload storage: jsonb (the former JSONField) against orjson + zstandard "
+        "(CompressedJSONField), with and without a trained dictionary. Reports stored row size and "
+        "fetch + decode latency, using a temporary table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resumes', default='1000,20000,100000', help="Comma-separated resume counts per synthetic Results row.")
+        parser.add_argument('--roles', type=int, default=20, help="Job roles per Results row.")
+        parser.add_argument('--level', type=int, default=settings.RESULTS_ZSTD_LEVEL, help="zstandard compression level.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed repetitions (the median is reported).")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Also write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # The dictionary is trained on other runs than the measured ones, as it would be in production
+        training_payloads = [synthetic_results_payload(rng, 2000, options['roles']) for _ in range(20)]
+        samples = [sample for payload in training_payloads for value in payload for sample in compressed_json.training_samples(value)]
+        dictionary = zstandard.train_dictionary(settings.RESULTS_ZSTD_DICTIONARY_SIZE, samples)
+        compressors = {
+            'orjson+zstd': zstandard.ZstdCompressor(level=options['level']),
+            'orjson+zstd+dict': zstandard.ZstdCompressor(level=options['level'], dict_data=dictionary),
+        }
+        decompressors = {
+            'orjson+zstd': zstandard.ZstdDecompressor(),
+            'orjson+zstd+dict': zstandard.ZstdDecompressor(dict_data=dictionary),
+        }
+
+        rows = []
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE results_storage_benchmark (id serial PRIMARY KEY, format text, matched_resumes bytea, unmatched_resumes bytea, analytics bytea)")
+            cursor.execute("CREATE TEMP TABLE results_storage_benchmark_jsonb (id serial PRIMARY KEY, matched_resumes jsonb, unmatched_resumes jsonb, analytics jsonb)")
+            try:
+                for size in [int(size) for size in options['resumes'].split(',')]:
+                    payload = synthetic_results_payload(rng, size, options['roles'])
+                    rows.extend(self.benchmark(cursor, size, payload, compressors, decompressors, options['repeat']))
+            finally:
+                cursor.execute("DROP TABLE results_storage_benchmark, results_storage_benchmark_jsonb")
+
+        self.stdout.write(f"{'resumes':>8} {'format':<18} {'json MiB':>9} {'stored KiB':>11} {'ratio':>6} {'write ms':>9} {'decode all ms':>14} {'analytics ms':>13}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['resumes']:>8} {row['format']:<18} {row['json_bytes'] / 2**20:>9.2f} {row['stored_bytes'] / 1024:>11.1f} "
+                f"{row['json_bytes'] / row['stored_bytes']:>6.1f} {row['encode_seconds'] * 1000:>9.1f} "
+                f"{row['decode_all_seconds'] * 1000:>14.1f} {row['decode_analytics_seconds'] * 1000:>13.1f}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(rows, f, indent=2)
+
+    def benchmark(self, cursor, size, payload, compressors, decompressors, repeat):
+        json_bytes = sum(len(json.dumps(value)) for value in payload)
+
+        # jsonb, read as Django's JSONField does: the column's text, parsed with json.loads
+        cursor.execute("INSERT INTO results_storage_benchmark_jsonb (matched_resumes, unmatched_resumes, analytics) VALUES (%s, %s, %s) RETURNING id", [json.dumps(value) for value in payload])
+        jsonb_id = cursor.fetchone()[0]
+        cursor.execute("SELECT pg_column_size(matched_resumes) + pg_column_size(unmatched_resumes) + pg_column_size(analytics) FROM results_storage_benchmark_jsonb WHERE id = %s", [jsonb_id])
+        jsonb_bytes = cursor.fetchone()[0]
+
+        def fetch_jsonb():
+            cursor.execute("SELECT matched_resumes::text, unmatched_resumes::text, analytics::text FROM results_storage_benchmark_jsonb WHERE id = %s", [jsonb_id])
+            return [json.loads(value) for value in cursor.fetchone()]
+
+        rows = [{
+            'resumes': size,
+            'format': 'jsonb',
+            'json_bytes': json_bytes,
+            'stored_bytes': jsonb_bytes,
+            'encode_seconds': _median_seconds(lambda: [json.dumps(value) for value in payload], repeat),
+            'decode_all_seconds': _median_seconds(fetch_jsonb, repeat),
+            'decode_analytics_seconds': _median_seconds(fetch_jsonb, repeat), # jsonb rows are decoded whole
+        }]
+
+        for name, compressor in compressors.items():
+            decompressor = decompressors[name]
+
+            def encode():
+                return [compressor.compress(compressed_json.serialize(value)) for value in payload]
+
+            cursor.execute("INSERT INTO results_storage_benchmark (format, matched_resumes, unmatched_resumes, analytics) VALUES (%s, %s, %s, %s) RETURNING id", [name, *encode()])
+            row_id = cursor.fetchone()[0]
+            cursor.execute("SELECT pg_column_size(matched_resumes) + pg_column_size(unmatched_resumes) + pg_column_size(analytics) FROM results_storage_benchmark WHERE id = %s", [row_id])
+            stored_bytes = cursor.fetchone()[0]
+
+            def fetch(sections):
+                cursor.execute("SELECT matched_resumes, unmatched_resumes, analytics FROM results_storage_benchmark WHERE id = %s", [row_id])
+                values = dict(zip(SECTIONS, cursor.fetchone()))
+                return [orjson.loads(decompressor.decompress(bytes(values[section]))) for section in sections]
+
+            rows.append({
+                'resumes': size,
+                'format': name,
+                'json_bytes': json_bytes,
+                'stored_bytes': stored_bytes,
+                'encode_seconds': _median_seconds(encode, repeat),
+                'decode_all_seconds': _median_seconds(lambda: fetch(SECTIONS), repeat),
+                'decode_analytics_seconds': _median_seconds(lambda: fetch(['analytics']), repeat), # CompressedJSONField decodes only accessed fields
+            })
+        return rows
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from setoo_app import profiles
+from setoo_app.models import Resume, ResumeProfile
+from setoo_app.utils import get_current_fingerprints, get_drive_service, get_resume_profiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Parses the profiles of new or changed resumes ahead of the next analysis (e.g. after a change of "
+        "the extractor version), and optionally deletes the profiles of older extractor versions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true', help="Delete profiles of other extractor versions.")
+
+    def handle(self, *args, **options):
+        service = get_drive_service()
+        resumes = list(Resume.objects.all())
+        fingerprints = get_current_fingerprints(service, resumes)
+        resume_profiles = get_resume_profiles(service, resumes, fingerprints)
+        self.stdout.write(f"{len(resume_profiles)} of {len(resumes)} resumes have a {profiles.extractor_version()} profile")
+        if options['prune']:
+            deleted, _ = ResumeProfile.objects.exclude(extractor_version=profiles.extractor_version()).delete()
+            self.stdout.write(f"Deleted {deleted} profiles of other extractor versions")
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import AsyncClient, Client
+from django.test.utils import setup_databases, teardown_databases, override_settings
+from django.urls import reverse
+
+from setoo_app.async_drive import async_drive_clients
+from setoo_app.drive_clients import drive_client_pool
+from setoo_app.fakes import FakeCredentials, FakeDriveService, FakeDriveTransport
+from setoo_app.models import Resume
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the file upload and delete views: fires many concurrent requests at the sync (WSGI) "
+        "manage_files view from a bounded thread pool, like a threaded WSGI worker, and at manage_files_async "
+        "from a single event loop, like one ASGI worker. Runs against a throwaway test database, with Google "
+        "Drive replaced by a local fake. Reports throughput and latency of both paths."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Concurrent requests per path.")
+        parser.add_argument('--scenario', choices=['upload', 'delete'], default='upload', help="Upload one resume per request, or delete one.")
+        parser.add_argument('--files-per-request', type=int, default=1, help="Resumes uploaded per request (upload scenario).")
+        parser.add_argument('--file-size', type=int, default=50_000, help="Bytes per uploaded resume.")
+        parser.add_argument('--drive-latency', type=float, default=0.2, help="Seconds per fake Drive request.")
+        parser.add_argument('--wsgi-threads', type=int, default=8, help="Request threads of the simulated WSGI worker.")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the test database between invocations.")
+        parser.add_argument('--output', help="Append the results as one JSON line to this file.")
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        old_factory, old_transport, old_credentials = drive_client_pool.factory, async_drive_clients.transport, async_drive_clients.credentials
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                record = self.benchmark(options)
+            self.report(record) # Before the teardown, so a teardown error does not lose the results
+            if options['output']:
+                with open(options['output'], 'a') as f:
+                    f.write(json.dumps(record) + "\n")
+        finally:
+            drive_client_pool.factory = old_factory
+            async_drive_clients.transport, async_drive_clients.credentials = old_transport, old_credentials
+            async_drive_clients.clear()
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+    def benchmark(self, options):
+        call_command('flush', interactive=False, verbosity=0)
+        service = FakeDriveService(latency=options['drive_latency'])
+        drive_client_pool.factory = lambda: service
+        async_drive_clients.transport, async_drive_clients.credentials = FakeDriveTransport(service), FakeCredentials()
+        async_drive_clients.clear()
+
+        session = SessionStore()
+        session['openai_api_key'] = 'loadtest'
+        session.create()
+
+        runs = []
+        for name in ('wsgi', 'asgi'):
+            requests = self.build_requests(name, service, options)
+            start = time.perf_counter()
+            if name == 'wsgi':
+                responses = self.run_wsgi(reverse('manage_files'), requests, session.session_key, options['wsgi_threads'])
+            else:
+                responses = asyncio.run(self.run_asgi(reverse('manage_files_async'), requests, session.session_key))
+            total_seconds = time.perf_counter() - start
+            latencies = sorted(seconds for seconds, _ in responses)
+            runs.append({
+                'name': name,
+                'total_seconds': round(total_seconds, 3),
+                'requests_per_second': round(len(requests) / total_seconds, 1),
+                'p50_seconds': round(statistics.median(latencies), 3),
+                'p95_seconds': round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+                'errors': sum(1 for _, status in responses if status != 302),
+                'resumes_stored': Resume.objects.filter(original_filename__startswith=f"{name}_").count(),
+            })
+
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'scenario': options['scenario'],
+            'requests': options['requests'],
+            'files_per_request': options['files_per_request'],
+            'file_size': options['file_size'],
+            'drive_latency': options['drive_latency'],
+            'wsgi_threads': options['wsgi_threads'],
+            'settings': {
+                'DRIVE_UPLOAD_CONCURRENCY': settings.DRIVE_UPLOAD_CONCURRENCY,
+                'DRIVE_ASYNC_MAX_CONNECTIONS': settings.DRIVE_ASYNC_MAX_CONNECTIONS,
+                'DRIVE_ASYNC_REQUEST_CONCURRENCY': settings.DRIVE_ASYNC_REQUEST_CONCURRENCY,
+            },
+            'runs': runs,
+            'speedup': round(runs[0]['total_seconds'] / runs[1]['total_seconds'], 2),
+        }
+
+    def build_requests(self, name, service, options):
+        """Returns the POST data of each request; resumes to delete are created first, in the fake Drive and the database."""
+        n = options['requests']
+        if options['scenario'] == 'delete':
+            resumes = Resume.objects.bulk_create([
+                Resume(original_filename=f"{name}_{i:06d}.pdf", drive_file_id=service.add_file(f"{name}_{i:06d}.pdf", b"%PDF-1.4", settings.RESUME_DRIVE_FOLDER_ID),
+                       drive_folder_id=settings.RESUME_DRIVE_FOLDER_ID, content_hash=f"{name}-{i}")
+                for i in range(n)
+            ])
+            return [{'delete_resume': '1', 'resume_to_delete': resume.id} for resume in resumes]
+
+        padding = b"x" * max(0, options['file_size'] - 64)
+        return [
+            {
+                'add_resumes': '1',
+                'resume_files': [
+                    SimpleUploadedFile(f"{name}_{i:06d}_{j}.pdf", f"%PDF-1.4 {name} {i} {j}\n".encode() + padding, 'application/pdf')
+                    for j in range(options['files_per_request'])
+                ],
+            }
+            for i in range(n)
+        ]
+
+    def run_wsgi(self, url, requests, session_key, threads):
+        """Sends every request through the sync handler from a pool of threads; returns (seconds, status) per request."""
+        def call(data):
+            client = Client() # One client per request, so no messages cookie piles up between requests
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            start = time.perf_counter()
+            try:
+                response = client.post(url, data)
+            finally:
+                # The test client skips the request_finished cleanup of a WSGI server; a connection left open
+                # by a pool thread would make teardown_databases fail ("being accessed by other users")
+                close_old_connections()
+            return time.perf_counter() - start, response.status_code
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(call, requests))
+
+    async def run_asgi(self, url, requests, session_key):
+        """Sends every request through the async handler at once, on this event loop; returns (seconds, status) per request."""
+        async def call(data):
+            client = AsyncClient()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            start = time.perf_counter()
+            response = await client.post(url, data)
+            return time.perf_counter() - start, response.status_code
+
+        try:
+            return await asyncio.gather(*(call(data) for data in requests))
+        finally:
+            await sync_to_async(close_old_connections)() # Closes the connection of the thread running the views' ORM calls
+
+    def report(self, record):
+        self.stdout.write(
+            f"{record['requests']} concurrent {record['scenario']} requests "
+            f"({record['files_per_request']} file(s) of {record['file_size']} bytes), Drive latency {record['drive_latency']}s"
+        )
+        for run in record['runs']:
+            self.stdout.write(
+                f"  {run['name']}: {run['total_seconds']}s, {run['requests_per_second']} requests/s, "
+                f"p50 {run['p50_seconds']}s, p95 {run['p95_seconds']}s, {run['errors']} errors, {run['resumes_stored']} resumes stored"
+            )
+        self.stdout.write(f"  ASGI speedup: {record['speedup']}x")
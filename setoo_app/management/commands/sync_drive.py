@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from setoo_app import drive_sync
+
+
+class Command(BaseCommand):
+    help = "Syncs the JD and resume tables with their Google Drive folders (only changes since the last pass, unless --full)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="List the folders in full instead of reading the changes feed.")
+
+    def handle(self, *args, **options):
+        stats = drive_sync.sync_drive_folders(full=options['full'])
+        if stats is None:
+            self.stdout.write("Another sync pass is already running.")
+            return
+        self.stdout.write(f"{stats['mode']} sync: {stats['changes']} changes, {stats['upserted']} upserted, {stats['deleted']} deleted")
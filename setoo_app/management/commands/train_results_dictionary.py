@@ -0,0 +1,31 @@
+import zstandard
+from django.core.management.base import BaseCommand, CommandError
+
+from setoo_app.compressed_json import train_dictionary
+from setoo_app.models import Results
+
+
+class Command(BaseCommand):
+    help = (
+        "Trains a zstd dictionary on recent analysis results. New Results rows are compressed with it; "
+        "existing rows keep (and stay readable with) the dictionary they were written with."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--results', type=int, default=200, help="Number of most recent Results rows to sample.")
+        parser.add_argument('--size', type=int, help="Dictionary size in bytes (default settings.RESULTS_ZSTD_DICTIONARY_SIZE).")
+
+    def handle(self, *args, **options):
+        rows = Results.objects.order_by('-timestamp')[:options['results']]
+
+        def payloads():
+            for results in rows.iterator(chunk_size=20):
+                yield results.matched_resumes
+                yield results.unmatched_resumes
+                yield results.analytics
+
+        try:
+            dictionary = train_dictionary('results', payloads(), options['size'])
+        except zstandard.ZstdError as e:
+            raise CommandError(f"Could not train a dictionary (too few or too small samples?): {e}")
+        self.stdout.write(f"Trained dictionary {dictionary.dict_id}: {len(dictionary.data)} bytes from {dictionary.sample_count} samples")
@@ -0,0 +1,125 @@
+"""
+Vectorized resume/JD matching.
+
+Resumes and job descriptions are turned into sparse, L2-normalized term-weight
+matrices, so the cosine similarity of every resume x JD pair is one sparse
+matrix product. The vectorizer is stateless (feature hashing, no fitted
+vocabulary or IDF), so a document's vector never depends on the rest of the
+corpus and matrices can be built and scored chunk by chunk.
+"""
+import numpy as np
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+N_FEATURES = 2 ** 20
+SCORE_CHUNK_SIZE = 4096  # Resume rows scored per matrix product; bounds the dense score block in memory
+PARALLEL_VECTORIZE_MIN_TEXTS = 5000  # Below this, worker start-up costs more than it saves
+VECTORIZE_CHUNK_SIZE = 2000
+
+_vectorizer = HashingVectorizer(
+    n_features=N_FEATURES,
+    stop_words='english',
+    alternate_sign=False,
+    norm=None,
+    dtype=np.float32,
+)
+
+
+def _vectorize_chunk(texts):
+    matrix = _vectorizer.transform(texts)
+    np.log1p(matrix.data, out=matrix.data)
+    return normalize(matrix, norm='l2', copy=False)
+
+
+def vectorize(texts, n_jobs=-1):
+    """
+    Converts texts to a sparse (n_texts, N_FEATURES) float32 CSR matrix.
+
+    Term counts are dampened with log(1 + tf) and each row is L2-normalized,
+    so the dot product of two rows is their cosine similarity. Large inputs are
+    split into chunks and tokenized on n_jobs worker processes.
+    """
+    texts = list(texts)
+    if len(texts) < PARALLEL_VECTORIZE_MIN_TEXTS or n_jobs == 1:
+        return _vectorize_chunk(texts)
+
+    chunks = [texts[i:i + VECTORIZE_CHUNK_SIZE] for i in range(0, len(texts), VECTORIZE_CHUNK_SIZE)]
+    matrices = Parallel(n_jobs=n_jobs)(delayed(_vectorize_chunk)(chunk) for chunk in chunks)
+    return sp.vstack(matrices, format='csr')
+
+
+def iter_score_blocks(resume_matrix, jd_matrix, chunk_size=SCORE_CHUNK_SIZE):
+    """
+    Yields (row_offset, scores) blocks of the resume x JD cosine similarity matrix.
+
+    Works with the sparse term matrices of vectorize() as well as dense embedding
+    matrices. Each block is a dense float32 array of shape (<= chunk_size, n_jds).
+    """
+    if not sp.issparse(jd_matrix):
+        for start in range(0, resume_matrix.shape[0], chunk_size):
+            yield start, resume_matrix[start:start + chunk_size] @ jd_matrix.T
+        return
+
+    jd_matrix_t = jd_matrix.T.tocsc()
+    for start in range(0, resume_matrix.shape[0], chunk_size):
+        block = resume_matrix[start:start + chunk_size] @ jd_matrix_t
+        yield start, block.toarray()
+
+
+def iter_pairs_above(resume_matrix, jd_matrix, threshold, chunk_size=SCORE_CHUNK_SIZE):
+    """
+    Yields (resume_indices, jd_indices, scores) arrays for every pair scoring at least threshold.
+    """
+    if resume_matrix.shape[0] == 0 or jd_matrix.shape[0] == 0:
+        return
+    for start, scores in iter_score_blocks(resume_matrix, jd_matrix, chunk_size):
+        rows, cols = np.nonzero(scores >= threshold)
+        yield rows + start, cols, scores[rows, cols]
+
+
+def best_matches(resume_matrix, jd_matrix, chunk_size=SCORE_CHUNK_SIZE, allowed=None):
+    """
+    Finds the best-scoring JD for every resume.
+
+    Args:
+        allowed (np.ndarray): Optional (n_resumes, n_jds) boolean mask of the pairs that may match
+            (e.g. skill pre-filter candidates); resumes without an allowed JD get index -1.
+
+    Returns:
+        tuple: (best_jd_index, best_score) arrays of length n_resumes.
+    """
+    n_resumes = resume_matrix.shape[0]
+    best_index = np.zeros(n_resumes, dtype=np.intp)
+    best_score = np.zeros(n_resumes, dtype=np.float32)
+    if n_resumes == 0 or jd_matrix.shape[0] == 0:
+        return best_index, best_score
+
+    for start, scores in iter_score_blocks(resume_matrix, jd_matrix, chunk_size):
+        stop = start + scores.shape[0]
+        if allowed is not None:
+            scores = np.where(allowed[start:stop], scores, -np.inf)
+        best_index[start:stop] = scores.argmax(axis=1)
+        best_score[start:stop] = scores[np.arange(scores.shape[0]), best_index[start:stop]]
+
+    if allowed is not None:
+        no_candidate = np.isneginf(best_score)
+        best_index[no_candidate] = -1
+        best_score[no_candidate] = 0.0
+    return best_index, best_score
+
+
+def top_k_indices(values, k=None):
+    """
+    Returns the indices of the k largest values, highest first.
+
+    Uses a partial sort (argpartition), so only the selected k values are fully sorted.
+    """
+    n = len(values)
+    if k is None or k >= n:
+        return np.argsort(-values, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-values, k - 1)[:k]
+    return top[np.argsort(-values[top], kind='stable')]
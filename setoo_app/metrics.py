@@ -0,0 +1,221 @@
+"""
+Pipeline instrumentation: timing spans, counters and latency histograms.
+
+Metrics are kept in memory per process and rendered in the Prometheus text
+exposition format by the /metrics view. The pipeline runs in Celery worker
+processes, so when settings.METRICS_MULTIPROCESS_DIR is set every process also
+writes a snapshot of its metrics to that directory (at most every
+settings.METRICS_FLUSH_INTERVAL seconds, and at the end of each analysis), and
+/metrics serves the sum over all snapshots.
+
+Usage:
+    with span('drive_download'):
+        ...
+"""
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        """Returns the current values as a JSON-serializable list of [label_values, value] pairs."""
+        with self._lock:
+            return [[list(key), value if not isinstance(value, list) else list(value)] for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    """Monotonically increasing count, optionally labelled."""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        REGISTRY.maybe_flush()
+
+
+class Histogram(Metric):
+    """Distribution of observed values (e.g. durations in seconds) over fixed buckets."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # [count per bucket..., count above the last bucket, sum]
+            values = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    values[i] += 1
+                    break
+            else:
+                values[len(self.buckets)] += 1
+            values[-1] += value
+        REGISTRY.maybe_flush()
+
+
+class Registry:
+    """All metrics of the process, plus the snapshot files shared with other processes."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def _snapshot_dir(self):
+        return getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+
+    def flush(self):
+        """Writes this process's snapshot file (if a multiprocess directory is configured)."""
+        snapshot_dir = self._snapshot_dir()
+        if not snapshot_dir:
+            return
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+            try:
+                os.makedirs(snapshot_dir, exist_ok=True)
+                path = os.path.join(snapshot_dir, f"{socket.gethostname()}-{os.getpid()}.json")
+                temp_path = f"{path}.tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(temp_path, path) # Readers never see a half-written snapshot
+            except OSError as e:
+                logger.warning("Could not write metrics snapshot to %s: %s", snapshot_dir, e)
+
+    def maybe_flush(self):
+        if self._snapshot_dir() and time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def collect(self):
+        """Returns the merged {metric name: {label values: value}} of all processes (or just this one)."""
+        snapshot_dir = self._snapshot_dir()
+        if not snapshot_dir:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for filename in os.listdir(snapshot_dir):
+                if filename.endswith('.json'):
+                    try:
+                        with open(os.path.join(snapshot_dir, filename)) as f:
+                            snapshots.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue # Removed or unreadable snapshot
+
+        merged = {name: {} for name in self.metrics}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                if name not in merged:
+                    continue
+                for key, value in values:
+                    key = tuple(key)
+                    current = merged[name].get(key)
+                    if current is None:
+                        merged[name][key] = value
+                    elif isinstance(value, list):
+                        merged[name][key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        merged[name][key] = current + value
+        return merged
+
+    def render(self):
+        """Renders all metrics in the Prometheus text exposition format (version 0.0.4)."""
+        merged = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key, value in sorted(merged[name].items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.type == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(list(metric.buckets) + [math.inf], value[:-1]):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else repr(float(bound))
+                        lines.append(f"{name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {value[-1]}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram('setoo_stage_duration_seconds', "Time spent in a pipeline stage or external call.", ['stage'])
+STAGE_ERRORS = Counter('setoo_stage_errors_total', "Pipeline stages or external calls that raised an error.", ['stage'])
+DRIVE_BYTES = Counter('setoo_drive_bytes_total', "Bytes transferred to and from Google Drive.", ['direction'])
+TEXT_CACHE_LOOKUPS = Counter('setoo_text_cache_lookups_total', "Extracted text cache lookups.", ['result'])
+DOCUMENTS_EXTRACTED = Counter('setoo_documents_extracted_total', "PDF documents run through text extraction.", ['result'])
+LLM_TOKENS = Counter('setoo_llm_prompt_tokens_total', "Prompt tokens sent to the LLM, before and after compaction.", ['kind'])
+LLM_RATE_LIMITED = Counter('setoo_llm_rate_limited_total', "LLM calls rejected with a rate-limit error (and retried).")
+ANALYSES = Counter('setoo_analyses_total', "Analysis pipeline runs.", ['status'])
+DRIVE_SYNC_FILES = Counter('setoo_drive_sync_files_total', "Files upserted, deleted or skipped as duplicate content by the Drive folder sync.", ['action'])
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Times a block as one observation of setoo_stage_duration_seconds{stage=...}.
+
+    Errors raised in the block are counted in setoo_stage_errors_total and re-raised.
+    Each span is also logged at DEBUG level with its duration and any extra fields.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        logger.debug("stage=%s seconds=%.3f %s", stage, seconds, " ".join(f"{k}={v}" for k, v in fields.items()))
+
+
+def observe(stage, seconds):
+    """Records a duration measured elsewhere (e.g. in a worker process) under setoo_stage_duration_seconds."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('drive_file_id', models.CharField(help_text='Google Drive File ID the text was extracted from.', max_length=255, unique=True)),
+                ('fingerprint', models.CharField(help_text='Drive md5Checksum (or modifiedTime) of the extracted file version.', max_length=255)),
+                ('text', models.TextField(help_text='Plain text extracted from the file.')),
+                ('extracted_at', models.DateTimeField(auto_now=True, help_text='Timestamp of when the text was last extracted.')),
+            ],
+            options={
+                'verbose_name': 'Extracted Text',
+                'verbose_name_plural': 'Extracted Texts',
+            },
+        ),
+    ]
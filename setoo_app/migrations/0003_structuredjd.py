@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0002_extractedtext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StructuredJD',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(help_text='SHA-256 of the extracted JD text.', max_length=64)),
+                ('prompt_version', models.CharField(help_text='Version of the structuring prompt and output schema.', max_length=64)),
+                ('data', models.JSONField(help_text='Structured JD fields (job_title, skills, ...) returned by the LLM.')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp of when the JD was structured.')),
+            ],
+            options={
+                'verbose_name': 'Structured Job Description',
+                'verbose_name_plural': 'Structured Job Descriptions',
+                'constraints': [models.UniqueConstraint(fields=('text_hash', 'prompt_version'), name='unique_structured_jd_per_prompt_version')],
+            },
+        ),
+    ]
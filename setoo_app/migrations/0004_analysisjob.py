@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0003_structuredjd'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', help_text='Current state of the job.', max_length=20)),
+                ('stage', models.CharField(blank=True, help_text='Pipeline stage the job is currently in.', max_length=100)),
+                ('percent_complete', models.PositiveSmallIntegerField(default=0, help_text='Progress of the job, from 0 to 100.')),
+                ('message', models.TextField(blank=True, help_text='Warnings or the error message produced by the job.')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp of when the job was queued.')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp of the last progress update.')),
+                ('results', models.ForeignKey(blank=True, help_text='Results produced by the job, once it has succeeded.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='setoo_app.results')),
+            ],
+            options={
+                'verbose_name': 'Analysis Job',
+                'verbose_name_plural': 'Analysis Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
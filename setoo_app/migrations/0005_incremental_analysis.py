@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0004_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='incremental',
+            field=models.BooleanField(default=False, help_text='Only score new or changed resumes and JDs, reusing stored scores.'),
+        ),
+        migrations.AddField(
+            model_name='jd',
+            name='scored_fingerprint',
+            field=models.CharField(blank=True, default='', help_text='Fingerprint of the JD version whose scores are stored in MatchScore (empty if never scored).', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='scored_fingerprint',
+            field=models.CharField(blank=True, default='', help_text='Fingerprint of the Resume version whose scores are stored in MatchScore (empty if never scored).', max_length=255),
+        ),
+        migrations.CreateModel(
+            name='MatchScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Cosine similarity of the resume and the structured JD.')),
+                ('jd', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='setoo_app.jd')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='setoo_app.resume')),
+            ],
+            options={
+                'verbose_name': 'Match Score',
+                'verbose_name_plural': 'Match Scores',
+                'constraints': [models.UniqueConstraint(fields=('resume', 'jd'), name='unique_match_score_per_pair')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0005_incremental_analysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(help_text='Job role (JD filename) the resume was matched to.', max_length=255)),
+                ('resume_filename', models.CharField(help_text='Filename of the matched resume at analysis time.', max_length=255)),
+                ('score', models.FloatField(help_text='Match score of the resume for the role.')),
+                ('explanation', models.TextField(blank=True, help_text='Explanation of the match.')),
+                ('results', models.ForeignKey(help_text='Analysis run the match belongs to.', on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='setoo_app.results')),
+                ('resume', models.ForeignKey(blank=True, help_text='Matched resume, if it still exists.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='setoo_app.resume')),
+            ],
+            options={
+                'verbose_name': 'Resume Match',
+                'verbose_name_plural': 'Resume Matches',
+                'indexes': [models.Index(fields=['results', 'role', '-score'], name='resume_match_role_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0006_resumematch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JDEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(help_text='Name of the embedder that produced the vector.', max_length=100)),
+                ('fingerprint', models.CharField(help_text='Hash of the embedded structured JD text.', max_length=255)),
+                ('vector', models.BinaryField(help_text='Embedding as little-endian float32 bytes.')),
+                ('jd', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='embeddings', to='setoo_app.jd')),
+            ],
+            options={
+                'verbose_name': 'JD Embedding',
+                'verbose_name_plural': 'JD Embeddings',
+                'constraints': [models.UniqueConstraint(fields=('jd', 'model_name'), name='unique_jd_embedding_per_model')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumeEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(help_text='Name of the embedder that produced the vector.', max_length=100)),
+                ('fingerprint', models.CharField(help_text='Drive fingerprint of the embedded resume version.', max_length=255)),
+                ('vector', models.BinaryField(help_text='Embedding as little-endian float32 bytes.')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='embeddings', to='setoo_app.resume')),
+            ],
+            options={
+                'verbose_name': 'Resume Embedding',
+                'verbose_name_plural': 'Resume Embeddings',
+                'constraints': [models.UniqueConstraint(fields=('resume', 'model_name'), name='unique_resume_embedding_per_model')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0007_embeddings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='structuredjd',
+            name='prompt_token_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Tokens of the prompt actually sent, after compaction.', null=True),
+        ),
+        migrations.AddField(
+            model_name='structuredjd',
+            name='raw_token_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Tokens of the extracted JD text before compaction.', null=True),
+        ),
+        migrations.AddField(
+            model_name='structuredjd',
+            name='was_truncated',
+            field=models.BooleanField(default=False, help_text='Whether the JD text was cut to the prompt token budget.'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:33
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False # Indexes are built concurrently, without locking the tables against writes
+
+    dependencies = [
+        ('setoo_app', '0008_structuredjd_token_stats'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='jd',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('original_filename', output_field=models.TextField())), name='gin_trgm_ops'), name='jd_filename_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='resume',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('original_filename', output_field=models.TextField())), name='gin_trgm_ops'), name='resume_filename_trgm_idx'),
+        ),
+    ]
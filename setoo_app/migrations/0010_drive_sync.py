@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0009_filename_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriveSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Identifies the synced folders (JD and resume folder IDs).', max_length=255, unique=True)),
+                ('page_token', models.CharField(blank=True, help_text='Drive changes page token to continue from.', max_length=255)),
+                ('last_full_sync_at', models.DateTimeField(blank=True, help_text='Timestamp of the last full listing of the folders.', null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, help_text='Timestamp of the last completed sync pass.', null=True)),
+            ],
+            options={
+                'verbose_name': 'Drive Sync State',
+                'verbose_name_plural': 'Drive Sync States',
+            },
+        ),
+        migrations.AlterField(
+            model_name='jd',
+            name='drive_file_id',
+            field=models.CharField(help_text='Google Drive File ID of the uploaded JD.', max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='resume',
+            name='drive_file_id',
+            field=models.CharField(help_text='Google Drive File ID of the uploaded Resume.', max_length=255, unique=True),
+        ),
+    ]
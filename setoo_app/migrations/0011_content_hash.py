@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0010_drive_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jd',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text="MD5 of the file content (as Drive's md5Checksum), used to reject duplicate uploads.", max_length=32, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text="MD5 of the file content (as Drive's md5Checksum), used to reject duplicate uploads.", max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:52
+
+import setoo_app.compressed_json
+from django.db import migrations, models
+
+RESULTS_FIELDS = ('matched_resumes', 'unmatched_resumes', 'analytics')
+BATCH_SIZE = 50  # Results rows can be several MB each
+
+
+def copy_fields(Results, source_suffix, target_suffix):
+    batch = []
+    fields = ['id', *(f"{name}{source_suffix}" for name in RESULTS_FIELDS)]
+    for results in Results.objects.only(*fields).iterator(chunk_size=BATCH_SIZE):
+        for name in RESULTS_FIELDS:
+            setattr(results, f"{name}{target_suffix}", getattr(results, f"{name}{source_suffix}"))
+        batch.append(results)
+        if len(batch) >= BATCH_SIZE:
+            Results.objects.bulk_update(batch, [f"{name}{target_suffix}" for name in RESULTS_FIELDS])
+            batch = []
+    if batch:
+        Results.objects.bulk_update(batch, [f"{name}{target_suffix}" for name in RESULTS_FIELDS])
+
+
+def compress_results(apps, schema_editor):
+    copy_fields(apps.get_model('setoo_app', 'Results'), '', '_compressed')
+
+
+def decompress_results(apps, schema_editor):
+    copy_fields(apps.get_model('setoo_app', 'Results'), '_compressed', '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0011_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZstdDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text="Dictionary set the dictionary belongs to (e.g. 'results').", max_length=100)),
+                ('dict_id', models.PositiveIntegerField(help_text='zstd dictionary ID.', unique=True)),
+                ('data', models.BinaryField(help_text='Dictionary content.')),
+                ('sample_count', models.PositiveIntegerField(default=0, help_text='Number of samples the dictionary was trained on.')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp of when the dictionary was trained.')),
+            ],
+            options={
+                'verbose_name': 'Zstd Dictionary',
+                'verbose_name_plural': 'Zstd Dictionaries',
+            },
+        ),
+        # Existing rows are converted through temporary columns: jsonb -> orjson + zstd bytea
+        migrations.AddField(
+            model_name='results',
+            name='matched_resumes_compressed',
+            field=setoo_app.compressed_json.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='results',
+            name='unmatched_resumes_compressed',
+            field=setoo_app.compressed_json.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='results',
+            name='analytics_compressed',
+            field=setoo_app.compressed_json.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_results, decompress_results),
+        migrations.RemoveField(
+            model_name='results',
+            name='matched_resumes',
+        ),
+        migrations.RemoveField(
+            model_name='results',
+            name='unmatched_resumes',
+        ),
+        migrations.RemoveField(
+            model_name='results',
+            name='analytics',
+        ),
+        migrations.RenameField(
+            model_name='results',
+            old_name='matched_resumes_compressed',
+            new_name='matched_resumes',
+        ),
+        migrations.RenameField(
+            model_name='results',
+            old_name='unmatched_resumes_compressed',
+            new_name='unmatched_resumes',
+        ),
+        migrations.RenameField(
+            model_name='results',
+            old_name='analytics_compressed',
+            new_name='analytics',
+        ),
+        migrations.AlterField(
+            model_name='results',
+            name='matched_resumes',
+            field=setoo_app.compressed_json.CompressedJSONField(blank=True, dictionary='results', help_text='JSON data of matched resumes per job role (compressed).', null=True),
+        ),
+        migrations.AlterField(
+            model_name='results',
+            name='unmatched_resumes',
+            field=setoo_app.compressed_json.CompressedJSONField(blank=True, dictionary='results', help_text='JSON list of filenames of unmatched resumes (compressed).', null=True),
+        ),
+        migrations.AlterField(
+            model_name='results',
+            name='analytics',
+            field=setoo_app.compressed_json.CompressedJSONField(blank=True, dictionary='results', help_text='JSON data containing analytics of the analysis (compressed).', null=True),
+        ),
+    ]
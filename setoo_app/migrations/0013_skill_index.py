@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0012_compressed_results'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(help_text='Normalized skill term.', max_length=100, unique=True)),
+                ('indexed_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp of when the term was added to the index.')),
+            ],
+            options={
+                'verbose_name': 'Indexed Skill',
+                'verbose_name_plural': 'Indexed Skills',
+            },
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='skills_fingerprint',
+            field=models.CharField(blank=True, default='', help_text='Skill index version and fingerprint of the Resume version indexed in ResumeSkill (empty if never indexed).', max_length=255),
+        ),
+        migrations.CreateModel(
+            name='ResumeSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.CharField(help_text='Normalized skill term.', max_length=100)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skills', to='setoo_app.resume')),
+            ],
+            options={
+                'verbose_name': 'Resume Skill',
+                'verbose_name_plural': 'Resume Skills',
+                'constraints': [models.UniqueConstraint(fields=('skill', 'resume'), name='unique_resume_skill')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0013_skill_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('extractor_version', models.CharField(help_text='Version of the extractor (rules and LLM prompt) that produced the profile.', max_length=64)),
+                ('fingerprint', models.CharField(help_text='Drive fingerprint of the parsed resume version.', max_length=255)),
+                ('skills', models.JSONField(default=list, help_text='Normalized skill terms, sorted.')),
+                ('years_experience', models.FloatField(blank=True, help_text='Total years of professional experience (empty if unknown).', null=True)),
+                ('education_level', models.CharField(blank=True, choices=[('', 'Unknown'), ('high_school', 'High school'), ('associate', 'Associate / diploma'), ('bachelor', "Bachelor's"), ('master', "Master's"), ('doctorate', 'Doctorate')], default='', help_text='Highest education level found.', max_length=20)),
+                ('titles', models.JSONField(default=list, help_text='Job titles held, most recent first.')),
+                ('parsed_with_llm', models.BooleanField(default=False, help_text='Whether the LLM pass refined the rule-based fields.')),
+                ('parsed_at', models.DateTimeField(auto_now=True, help_text='Timestamp of when the profile was parsed.')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profiles', to='setoo_app.resume')),
+            ],
+            options={
+                'verbose_name': 'Resume Profile',
+                'verbose_name_plural': 'Resume Profiles',
+                'constraints': [models.UniqueConstraint(fields=('resume', 'extractor_version'), name='unique_resume_profile_per_version')],
+            },
+        ),
+    ]
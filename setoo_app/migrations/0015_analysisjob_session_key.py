@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0014_resume_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='session_key',
+            field=models.CharField(blank=True, help_text='Session of the user who queued the job; the worker reads the OpenAI API key from it. Cleared when the job finishes.', max_length=40),
+        ),
+    ]
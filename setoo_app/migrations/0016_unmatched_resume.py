@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('setoo_app', '0015_analysisjob_session_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='results',
+            name='unmatched_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Number of unmatched resumes (UnmatchedResume rows); null for runs saved before those rows existed.', null=True),
+        ),
+        migrations.CreateModel(
+            name='UnmatchedResume',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resume_filename', models.CharField(help_text='Filename of the unmatched resume at analysis time.', max_length=255)),
+                ('results', models.ForeignKey(help_text='Analysis run the resume was left unmatched by.', on_delete=django.db.models.deletion.CASCADE, related_name='unmatched', to='setoo_app.results')),
+            ],
+            options={
+                'verbose_name': 'Unmatched Resume',
+                'verbose_name_plural': 'Unmatched Resumes',
+                'indexes': [models.Index(fields=['results', 'id'], name='unmatched_resume_page_idx')],
+            },
+        ),
+    ]
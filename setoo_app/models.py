@@ -1,13 +1,26 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import TextField
+from django.db.models.functions import Cast, Upper
+
+from .compressed_json import CompressedJSONField
+
+
+def filename_search_index(name):
+    """Trigram index matching the UPPER(original_filename::text) LIKE ... SQL of istartswith/icontains lookups."""
+    return GinIndex(OpClass(Upper(Cast('original_filename', output_field=TextField())), name='gin_trgm_ops'), name=name)
+
 
 class JD(models.Model):
     """
     Model to store Job Description files and their metadata.
     """
     original_filename = models.CharField(max_length=255, unique=True, help_text="Original name of the uploaded JD file.")
-    drive_file_id = models.CharField(max_length=255, help_text="Google Drive File ID of the uploaded JD.")
+    drive_file_id = models.CharField(max_length=255, unique=True, help_text="Google Drive File ID of the uploaded JD.")
+    content_hash = models.CharField(max_length=32, unique=True, null=True, blank=True, help_text="MD5 of the file content (as Drive's md5Checksum), used to reject duplicate uploads.")
     drive_folder_id = models.CharField(max_length=255, help_text="Google Drive Folder ID where JDs are stored.")
     uploaded_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp of when the JD was uploaded.")
+    scored_fingerprint = models.CharField(max_length=255, blank=True, default='', help_text="Fingerprint of the JD version whose scores are stored in MatchScore (empty if never scored).")
 
     def __str__(self):
         return self.original_filename
@@ -15,15 +28,21 @@ class JD(models.Model):
     class Meta:
         verbose_name = "Job Description"
         verbose_name_plural = "Job Descriptions"
+        indexes = [
+            filename_search_index('jd_filename_trgm_idx'),
+        ]
 
 class Resume(models.Model):
     """
     Model to store Resume files and their metadata.
     """
     original_filename = models.CharField(max_length=255, unique=True, help_text="Original name of the uploaded Resume file.")
-    drive_file_id = models.CharField(max_length=255, help_text="Google Drive File ID of the uploaded Resume.")
+    drive_file_id = models.CharField(max_length=255, unique=True, help_text="Google Drive File ID of the uploaded Resume.")
+    content_hash = models.CharField(max_length=32, unique=True, null=True, blank=True, help_text="MD5 of the file content (as Drive's md5Checksum), used to reject duplicate uploads.")
     drive_folder_id = models.CharField(max_length=255, help_text="Google Drive Folder ID where Resumes are stored.")
     uploaded_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp of when the Resume was uploaded.")
+    scored_fingerprint = models.CharField(max_length=255, blank=True, default='', help_text="Fingerprint of the Resume version whose scores are stored in MatchScore (empty if never scored).")
+    skills_fingerprint = models.CharField(max_length=255, blank=True, default='', help_text="Skill index version and fingerprint of the Resume version indexed in ResumeSkill (empty if never indexed).")
 
     def __str__(self):
         return self.original_filename
@@ -31,15 +50,19 @@ class Resume(models.Model):
     class Meta:
         verbose_name = "Resume"
         verbose_name_plural = "Resumes"
+        indexes = [
+            filename_search_index('resume_filename_trgm_idx'),
+        ]
 
 class Results(models.Model):
     """
     Model to store the results of the resume analysis process.
     """
     timestamp = models.DateTimeField(auto_now_add=True, help_text="Timestamp of when the analysis was run.")
-    matched_resumes = models.JSONField(null=True, blank=True, help_text="JSON data of matched resumes per job role.")
-    unmatched_resumes = models.JSONField(null=True, blank=True, help_text="JSON list of filenames of unmatched resumes.")
-    analytics = models.JSONField(null=True, blank=True, help_text="JSON data containing analytics of the analysis.")
+    matched_resumes = CompressedJSONField(null=True, blank=True, dictionary='results', help_text="JSON data of matched resumes per job role (compressed).")
+    unmatched_resumes = CompressedJSONField(null=True, blank=True, dictionary='results', help_text="JSON list of filenames of unmatched resumes (compressed).")
+    analytics = CompressedJSONField(null=True, blank=True, dictionary='results', help_text="JSON data containing analytics of the analysis (compressed).")
+    unmatched_count = models.PositiveIntegerField(null=True, blank=True, help_text="Number of unmatched resumes (UnmatchedResume rows); null for runs saved before those rows existed.")
 
     def __str__(self):
         return f"Results - {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
@@ -47,4 +70,296 @@ class Results(models.Model):
     class Meta:
         verbose_name = "Analysis Result"
         verbose_name_plural = "Analysis Results"
-        ordering = ['-timestamp'] # Default ordering by timestamp, newest first
\ No newline at end of file
+        ordering = ['-timestamp'] # Default ordering by timestamp, newest first
+
+class ResumeMatch(models.Model):
+    """
+    One matched resume of an analysis run, stored as a row so top-N queries can use an index.
+    """
+    results = models.ForeignKey(Results, on_delete=models.CASCADE, related_name='matches', help_text="Analysis run the match belongs to.")
+    role = models.CharField(max_length=255, help_text="Job role (JD filename) the resume was matched to.")
+    resume = models.ForeignKey(Resume, null=True, blank=True, on_delete=models.SET_NULL, related_name='+', help_text="Matched resume, if it still exists.")
+    resume_filename = models.CharField(max_length=255, help_text="Filename of the matched resume at analysis time.")
+    score = models.FloatField(help_text="Match score of the resume for the role.")
+    explanation = models.TextField(blank=True, help_text="Explanation of the match.")
+
+    def __str__(self):
+        return f"{self.resume_filename} -> {self.role} ({self.score:.2f})"
+
+    class Meta:
+        verbose_name = "Resume Match"
+        verbose_name_plural = "Resume Matches"
+        indexes = [
+            models.Index(fields=['results', 'role', '-score'], name='resume_match_role_score_idx'),
+        ]
+
+class UnmatchedResume(models.Model):
+    """
+    One unmatched resume of an analysis run, stored as a row so the list can be paged without decoding it whole.
+    """
+    results = models.ForeignKey(Results, on_delete=models.CASCADE, related_name='unmatched', help_text="Analysis run the resume was left unmatched by.")
+    resume_filename = models.CharField(max_length=255, help_text="Filename of the unmatched resume at analysis time.")
+
+    def __str__(self):
+        return self.resume_filename
+
+    class Meta:
+        verbose_name = "Unmatched Resume"
+        verbose_name_plural = "Unmatched Resumes"
+        indexes = [
+            models.Index(fields=['results', 'id'], name='unmatched_resume_page_idx'),
+        ]
+
+class ResumeSkill(models.Model):
+    """
+    Posting of the skill inverted index: a normalized skill term mentioned by a resume (see setoo_app.skills).
+    """
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='skills')
+    skill = models.CharField(max_length=100, help_text="Normalized skill term.")
+
+    def __str__(self):
+        return f"{self.skill}: {self.resume}"
+
+    class Meta:
+        verbose_name = "Resume Skill"
+        verbose_name_plural = "Resume Skills"
+        constraints = [
+            models.UniqueConstraint(fields=['skill', 'resume'], name='unique_resume_skill'), # Also the term -> resumes lookup index
+        ]
+
+class IndexedSkill(models.Model):
+    """
+    Skill term whose ResumeSkill postings are complete for every indexed resume.
+    """
+    term = models.CharField(max_length=100, unique=True, help_text="Normalized skill term.")
+    indexed_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp of when the term was added to the index.")
+
+    def __str__(self):
+        return self.term
+
+    class Meta:
+        verbose_name = "Indexed Skill"
+        verbose_name_plural = "Indexed Skills"
+
+class ResumeProfile(models.Model):
+    """
+    Structured fields parsed from a resume's text (see setoo_app.profiles).
+
+    One row per resume and extractor version; fingerprint is the Drive content
+    fingerprint of the resume version the profile was parsed from.
+    """
+    EDUCATION_NONE = ''
+    EDUCATION_HIGH_SCHOOL = 'high_school'
+    EDUCATION_ASSOCIATE = 'associate'
+    EDUCATION_BACHELOR = 'bachelor'
+    EDUCATION_MASTER = 'master'
+    EDUCATION_DOCTORATE = 'doctorate'
+    EDUCATION_CHOICES = [ # Lowest to highest
+        (EDUCATION_NONE, 'Unknown'),
+        (EDUCATION_HIGH_SCHOOL, 'High school'),
+        (EDUCATION_ASSOCIATE, 'Associate / diploma'),
+        (EDUCATION_BACHELOR, "Bachelor's"),
+        (EDUCATION_MASTER, "Master's"),
+        (EDUCATION_DOCTORATE, 'Doctorate'),
+    ]
+
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='profiles')
+    extractor_version = models.CharField(max_length=64, help_text="Version of the extractor (rules and LLM prompt) that produced the profile.")
+    fingerprint = models.CharField(max_length=255, help_text="Drive fingerprint of the parsed resume version.")
+    skills = models.JSONField(default=list, help_text="Normalized skill terms, sorted.")
+    years_experience = models.FloatField(null=True, blank=True, help_text="Total years of professional experience (empty if unknown).")
+    education_level = models.CharField(max_length=20, choices=EDUCATION_CHOICES, blank=True, default=EDUCATION_NONE, help_text="Highest education level found.")
+    titles = models.JSONField(default=list, help_text="Job titles held, most recent first.")
+    parsed_with_llm = models.BooleanField(default=False, help_text="Whether the LLM pass refined the rule-based fields.")
+    parsed_at = models.DateTimeField(auto_now=True, help_text="Timestamp of when the profile was parsed.")
+
+    def __str__(self):
+        return f"{self.resume} ({self.extractor_version})"
+
+    class Meta:
+        verbose_name = "Resume Profile"
+        verbose_name_plural = "Resume Profiles"
+        constraints = [
+            models.UniqueConstraint(fields=['resume', 'extractor_version'], name='unique_resume_profile_per_version'),
+        ]
+
+class ExtractedText(models.Model):
+    """
+    Cache of the plain text extracted from a Google Drive file, keyed by the file's
+    Drive ID and a fingerprint of the file version the text was extracted from.
+    """
+    drive_file_id = models.CharField(max_length=255, unique=True, help_text="Google Drive File ID the text was extracted from.")
+    fingerprint = models.CharField(max_length=255, help_text="Drive md5Checksum (or modifiedTime) of the extracted file version.")
+    text = models.TextField(help_text="Plain text extracted from the file.")
+    extracted_at = models.DateTimeField(auto_now=True, help_text="Timestamp of when the text was last extracted.")
+
+    def __str__(self):
+        return f"{self.drive_file_id} ({self.fingerprint})"
+
+    class Meta:
+        verbose_name = "Extracted Text"
+        verbose_name_plural = "Extracted Texts"
+
+class StructuredJD(models.Model):
+    """
+    Store of LLM-structured job descriptions, keyed by a hash of the extracted JD text
+    and the version of the prompt/schema that produced the structured output.
+    """
+    text_hash = models.CharField(max_length=64, help_text="SHA-256 of the extracted JD text.")
+    prompt_version = models.CharField(max_length=64, help_text="Version of the structuring prompt and output schema.")
+    data = models.JSONField(help_text="Structured JD fields (job_title, skills, ...) returned by the LLM.")
+    raw_token_count = models.PositiveIntegerField(null=True, blank=True, help_text="Tokens of the extracted JD text before compaction.")
+    prompt_token_count = models.PositiveIntegerField(null=True, blank=True, help_text="Tokens of the prompt actually sent, after compaction.")
+    was_truncated = models.BooleanField(default=False, help_text="Whether the JD text was cut to the prompt token budget.")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp of when the JD was structured.")
+
+    def __str__(self):
+        return f"{self.text_hash[:12]} (prompt {self.prompt_version})"
+
+    class Meta:
+        verbose_name = "Structured Job Description"
+        verbose_name_plural = "Structured Job Descriptions"
+        constraints = [
+            models.UniqueConstraint(fields=['text_hash', 'prompt_version'], name='unique_structured_jd_per_prompt_version'),
+        ]
+
+class MatchScore(models.Model):
+    """
+    Cosine similarity of a resume/JD pair from the latest incremental analysis.
+
+    Only pairs scoring at least settings.MATCH_SCORE_THRESHOLD are stored; deleting
+    a JD or Resume drops its pairs.
+    """
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='match_scores')
+    jd = models.ForeignKey(JD, on_delete=models.CASCADE, related_name='match_scores')
+    score = models.FloatField(help_text="Cosine similarity of the resume and the structured JD.")
+
+    def __str__(self):
+        return f"{self.resume} / {self.jd}: {self.score:.2f}"
+
+    class Meta:
+        verbose_name = "Match Score"
+        verbose_name_plural = "Match Scores"
+        constraints = [
+            models.UniqueConstraint(fields=['resume', 'jd'], name='unique_match_score_per_pair'),
+        ]
+
+class ResumeEmbedding(models.Model):
+    """
+    Embedding vector of a resume, stored as raw little-endian float32 bytes.
+
+    One row per resume and embedding model; fingerprint is the Drive content
+    fingerprint of the resume version the vector was computed from.
+    """
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='embeddings')
+    model_name = models.CharField(max_length=100, help_text="Name of the embedder that produced the vector.")
+    fingerprint = models.CharField(max_length=255, help_text="Drive fingerprint of the embedded resume version.")
+    vector = models.BinaryField(help_text="Embedding as little-endian float32 bytes.")
+
+    def __str__(self):
+        return f"{self.resume} ({self.model_name})"
+
+    class Meta:
+        verbose_name = "Resume Embedding"
+        verbose_name_plural = "Resume Embeddings"
+        constraints = [
+            models.UniqueConstraint(fields=['resume', 'model_name'], name='unique_resume_embedding_per_model'),
+        ]
+
+class JDEmbedding(models.Model):
+    """
+    Embedding vector of a job description, stored as raw little-endian float32 bytes.
+
+    One row per JD and embedding model; fingerprint is the hash of the structured
+    JD text the vector was computed from.
+    """
+    jd = models.ForeignKey(JD, on_delete=models.CASCADE, related_name='embeddings')
+    model_name = models.CharField(max_length=100, help_text="Name of the embedder that produced the vector.")
+    fingerprint = models.CharField(max_length=255, help_text="Hash of the embedded structured JD text.")
+    vector = models.BinaryField(help_text="Embedding as little-endian float32 bytes.")
+
+    def __str__(self):
+        return f"{self.jd} ({self.model_name})"
+
+    class Meta:
+        verbose_name = "JD Embedding"
+        verbose_name_plural = "JD Embeddings"
+        constraints = [
+            models.UniqueConstraint(fields=['jd', 'model_name'], name='unique_jd_embedding_per_model'),
+        ]
+
+class ZstdDictionary(models.Model):
+    """
+    Trained zstandard dictionary used by CompressedJSONField.
+
+    dict_id is the ID recorded in every zstd frame compressed with the
+    dictionary. Rows are never deleted, as stored values may still need them.
+    """
+    name = models.CharField(max_length=100, help_text="Dictionary set the dictionary belongs to (e.g. 'results').")
+    dict_id = models.PositiveIntegerField(unique=True, help_text="zstd dictionary ID.")
+    data = models.BinaryField(help_text="Dictionary content.")
+    sample_count = models.PositiveIntegerField(default=0, help_text="Number of samples the dictionary was trained on.")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp of when the dictionary was trained.")
+
+    def __str__(self):
+        return f"{self.name} dictionary {self.dict_id}"
+
+    class Meta:
+        verbose_name = "Zstd Dictionary"
+        verbose_name_plural = "Zstd Dictionaries"
+
+class DriveSyncState(models.Model):
+    """
+    Position of the Drive folder sync in the Drive changes feed.
+
+    One row per synced set of folders; page_token is the changes page token to
+    resume from, empty until the first full sync has listed the folders.
+    """
+    key = models.CharField(max_length=255, unique=True, help_text="Identifies the synced folders (JD and resume folder IDs).")
+    page_token = models.CharField(max_length=255, blank=True, help_text="Drive changes page token to continue from.")
+    last_full_sync_at = models.DateTimeField(null=True, blank=True, help_text="Timestamp of the last full listing of the folders.")
+    last_synced_at = models.DateTimeField(null=True, blank=True, help_text="Timestamp of the last completed sync pass.")
+
+    def __str__(self):
+        return f"Drive sync {self.key}"
+
+    class Meta:
+        verbose_name = "Drive Sync State"
+        verbose_name_plural = "Drive Sync States"
+
+class AnalysisJob(models.Model):
+    """
+    Model to track a background run of the resume analysis pipeline.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, help_text="Current state of the job.")
+    stage = models.CharField(max_length=100, blank=True, help_text="Pipeline stage the job is currently in.")
+    percent_complete = models.PositiveSmallIntegerField(default=0, help_text="Progress of the job, from 0 to 100.")
+    message = models.TextField(blank=True, help_text="Warnings or the error message produced by the job.")
+    incremental = models.BooleanField(default=False, help_text="Only score new or changed resumes and JDs, reusing stored scores.")
+    session_key = models.CharField(max_length=40, blank=True, help_text="Session of the user who queued the job; the worker reads the OpenAI API key from it. Cleared when the job finishes.")
+    results = models.ForeignKey(Results, null=True, blank=True, on_delete=models.SET_NULL, related_name='jobs', help_text="Results produced by the job, once it has succeeded.")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp of when the job was queued.")
+    updated_at = models.DateTimeField(auto_now=True, help_text="Timestamp of the last progress update.")
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    def __str__(self):
+        return f"Analysis job {self.pk} ({self.status})"
+
+    class Meta:
+        verbose_name = "Analysis Job"
+        verbose_name_plural = "Analysis Jobs"
+        ordering = ['-created_at']
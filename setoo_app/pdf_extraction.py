@@ -0,0 +1,143 @@
+"""
+Pluggable PDF text extraction backends.
+
+Backends are looked up by name in EXTRACTORS (settings.PDF_EXTRACTOR_BACKEND
+picks the default). PyMuPDF is the fast default; PyPDF2 is kept as the
+fallback for documents PyMuPDF cannot read or when it is not installed.
+
+Pages are joined with PAGE_SEPARATOR (form feed), so later stages can still
+tell page boundaries apart.
+
+This module must stay importable without configured Django settings: it is
+imported by the worker processes of extract_texts_parallel().
+"""
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+
+import PyPDF2
+
+try:
+    import pymupdf  # Not "import fitz": requirements.txt also pins an unrelated package named fitz
+except ImportError:  # pragma: no cover - optional dependency
+    pymupdf = None
+
+PAGE_SEPARATOR = "\f"
+
+
+class PDFExtractor:
+    """Base class for PDF text extraction backends."""
+    name = None
+
+    def is_available(self):
+        return True
+
+    def extract_pages(self, file_content):
+        """Returns the text of each page of a PDF given as bytes."""
+        raise NotImplementedError
+
+    def extract(self, file_content):
+        return PAGE_SEPARATOR.join(self.extract_pages(file_content))
+
+
+class PyMuPDFExtractor(PDFExtractor):
+    """Extracts text with PyMuPDF (MuPDF, implemented in C)."""
+    name = 'pymupdf'
+
+    def is_available(self):
+        return pymupdf is not None
+
+    def extract_pages(self, file_content):
+        with pymupdf.open(stream=file_content, filetype='pdf') as document:
+            return [page.get_text() for page in document]
+
+
+class PyPDF2Extractor(PDFExtractor):
+    """Extracts text with pure-Python PyPDF2."""
+    name = 'pypdf2'
+
+    def extract_pages(self, file_content):
+        reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+        return [page.extract_text() or "" for page in reader.pages]
+
+
+EXTRACTORS = {
+    PyMuPDFExtractor.name: PyMuPDFExtractor(),
+    PyPDF2Extractor.name: PyPDF2Extractor(),
+}
+
+
+def register_extractor(extractor):
+    """Registers an extractor instance under its name, making it selectable as a backend."""
+    EXTRACTORS[extractor.name] = extractor
+    return extractor
+
+
+def get_extractor(name):
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown PDF extractor backend: {name!r} (available: {', '.join(EXTRACTORS)})")
+
+
+def extract_text(file_content, backend, fallback=None):
+    """
+    Extracts the text of a PDF with the given backend, retrying with the fallback backend on failure.
+
+    Raises the last error if no backend could extract the document.
+    """
+    names = [backend] + ([fallback] if fallback and fallback != backend else [])
+    error = None
+    for name in names:
+        extractor = get_extractor(name)
+        if not extractor.is_available():
+            continue
+        try:
+            return extractor.extract(file_content)
+        except Exception as e:
+            error = e
+    raise error or RuntimeError(f"No available PDF extractor among: {', '.join(names)}")
+
+
+def _extract_in_worker(key, file_content, backend, fallback):
+    start = time.perf_counter()
+    try:
+        return key, extract_text(file_content, backend, fallback), None, time.perf_counter() - start
+    except Exception as e:
+        return key, None, str(e), time.perf_counter() - start
+
+
+def extract_texts_parallel(documents, backend, fallback=None, max_workers=None):
+    """
+    Extracts many PDFs on a pool of worker processes, yielding each result as it completes.
+
+    documents is consumed lazily: at most 2 * max_workers documents are held in flight,
+    so it can be a generator of downloads that is only advanced as workers free up.
+
+    Args:
+        documents: Iterable of (key, pdf_bytes) pairs.
+        backend (str): Extractor backend name.
+        fallback (str): Backend retried when the primary one fails, or None.
+        max_workers (int): Worker processes (default: number of CPUs).
+
+    Yields:
+        tuple: (key, text, error, seconds) - text is None and error is a message if extraction failed;
+        seconds is the time the worker spent on the document.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    documents = iter(documents)
+    # "spawn" workers do not inherit the parent's threads, locks or database connections
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = {
+            executor.submit(_extract_in_worker, key, content, backend, fallback)
+            for key, content in islice(documents, 2 * max_workers)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                for key, content in islice(documents, 1):
+                    pending.add(executor.submit(_extract_in_worker, key, content, backend, fallback))
@@ -0,0 +1,143 @@
+"""
+The resume analysis pipeline behind "Process Resumes & Analyze".
+
+run_analysis() is called from the background job in tasks.py, so the
+manage_files view only has to enqueue it.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics
+from .models import JD, Resume, Results, ResumeMatch, UnmatchedResume
+from .utils import (
+    get_drive_service,
+    get_pdf_texts,
+    structure_jds,
+    process_resumes_and_match_cosine,  # Make sure to choose either process_resumes_and_match_cosine or process_resumes_and_match_agent in utils.py
+    process_resumes_and_match_incremental,
+    process_resumes_and_match_embeddings,
+)
+
+
+def _report(progress, stage, percent):
+    if progress is not None:
+        progress(stage, percent)
+
+
+def save_results(matched_resumes, unmatched_resumes, analytics):
+    """Persists an analysis run as a Results row plus one ResumeMatch row per matched resume and one UnmatchedResume row per unmatched resume."""
+    resume_ids = {match.get('resume', {}).get('id') for matches in matched_resumes.values() for match in matches}
+    with transaction.atomic():
+        existing_resume_ids = set(Resume.objects.filter(pk__in=resume_ids).values_list('pk', flat=True)) # Resumes may be deleted while a job runs
+        results = Results.objects.create(
+            matched_resumes=matched_resumes,
+            unmatched_resumes=unmatched_resumes,
+            unmatched_count=len(unmatched_resumes),
+            analytics=analytics,
+        )
+        ResumeMatch.objects.bulk_create(
+            (
+                ResumeMatch(
+                    results=results,
+                    role=role,
+                    resume_id=match.get('resume', {}).get('id') if match.get('resume', {}).get('id') in existing_resume_ids else None,
+                    resume_filename=match['resume_filename'],
+                    score=match.get('score') or 0.0,
+                    explanation=match.get('explanation', ''),
+                )
+                for role, matches in matched_resumes.items()
+                for match in matches
+            ),
+            batch_size=5000,
+        )
+        UnmatchedResume.objects.bulk_create(
+            (UnmatchedResume(results=results, resume_filename=filename) for filename in unmatched_resumes),
+            batch_size=5000,
+        )
+    return results
+
+
+def run_analysis(openai_api_key, progress=None, service_factory=None, incremental=False, llm=None):
+    """
+    Runs the full analysis: JD extraction and structuring, resume matching and persisting Results.
+
+    Every stage is timed as a metrics span (setoo_stage_duration_seconds), as is the whole run
+    (stage="analysis").
+
+    Args:
+        openai_api_key (str): OpenAI API key used to structure the JDs.
+        progress: Optional callable(stage, percent_complete) invoked as the pipeline advances.
+        service_factory: Callable returning a Drive service, called for the main thread and once per
+            download thread (default: clients from drive_clients.drive_client_pool).
+        incremental (bool): Only score new or changed resumes and JDs, reusing the stored scores of earlier runs
+            (term matching only; see settings.MATCHING_BACKEND).
+        llm: LLM client used to structure the JDs and, if enabled, to parse resume profiles (default: OpenAI; see structure_jds).
+
+    Returns:
+        tuple: (results, warnings) - the saved Results object and a list of user-facing warning messages.
+    """
+    try:
+        with metrics.span('analysis'):
+            outcome = _run_analysis(openai_api_key, progress, service_factory, incremental, llm)
+    except Exception:
+        metrics.ANALYSES.inc(status='failed')
+        raise
+    else:
+        metrics.ANALYSES.inc(status='succeeded')
+        return outcome
+    finally:
+        metrics.REGISTRY.flush() # Publish this worker's metrics to the /metrics endpoint right away
+
+
+def _run_analysis(openai_api_key, progress=None, service_factory=None, incremental=False, llm=None):
+    """Body of run_analysis, without the run-level metrics bookkeeping."""
+    service = service_factory() if service_factory else get_drive_service()
+    if service is None:
+        raise RuntimeError("Google Drive service not initialized.")
+
+    _report(progress, "Fetching job descriptions", 0)
+    with metrics.span('jd_text_fetch'):
+        jds = list(JD.objects.all())
+        jd_texts = get_pdf_texts(service, jds, service_factory=service_factory) # Served from the text cache unless the file changed in Drive
+
+    _report(progress, "Structuring job descriptions", 20)
+    with metrics.span('jd_structuring'):
+        structured_data = structure_jds(
+            {jd.original_filename: jd_texts[jd.drive_file_id] for jd in jds if jd_texts.get(jd.drive_file_id)},
+            openai_api_key,
+            llm=llm,
+            progress=lambda done, total: _report(progress, "Structuring job descriptions", 20 + 30 * done // max(total, 1)),
+        )
+
+    _report(progress, "Matching resumes", 50)
+    resumes = Resume.objects.all()
+    if settings.MATCHING_BACKEND == 'embeddings':
+        match_resumes = process_resumes_and_match_embeddings # Always incremental: stored vectors are reused per document version
+    else:
+        match_resumes = process_resumes_and_match_incremental if incremental else process_resumes_and_match_cosine
+    with metrics.span('matching', backend=settings.MATCHING_BACKEND, incremental=incremental):
+        matched_resumes, unmatched_resumes, analytics = match_resumes(
+            structured_data, resumes, service, openai_api_key, service_factory=service_factory, llm=llm
+        )
+
+    # Handle "Insufficient information" cases *after* processing all resumes
+    warnings = []
+    insufficient_info_resumes = []
+    for role, matches in matched_resumes.items():
+        insufficient_info_resumes.extend(
+            match['resume_filename'] for match in matches if match.get('explanation', '').startswith("Insufficient")
+        )
+        matches[:] = [match for match in matches if not match.get('explanation', '').startswith("Insufficient")]
+
+    # Remove empty roles after processing insufficient resumes
+    matched_resumes = {k: v for k, v in matched_resumes.items() if v}
+
+    if insufficient_info_resumes:
+        filenames_str = ", ".join(insufficient_info_resumes)
+        warnings.append(f"The following resumes had insufficient information for a proper match: {filenames_str}. Please check and try again.")
+
+    _report(progress, "Saving results", 90)
+    with metrics.span('results_save'):
+        results = save_results(matched_resumes, unmatched_resumes, analytics)
+    _report(progress, "Done", 100)
+    return results, warnings
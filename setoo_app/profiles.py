@@ -0,0 +1,352 @@
+"""
+Structured resume profiles: skills, years of experience, education level and job titles.
+
+Each resume is parsed once per content version and extractor version into a
+ResumeProfile row. A fast rule-based extractor fills every field; when
+settings.RESUME_PROFILE_LLM is set, the new or changed resumes of a run are
+also sent to the LLM concurrently (see llm.complete_concurrently) and its
+answers refine the rule-based fields. Profiles are keyed by extractor version,
+so changing the rules or the prompt reparses every resume on its next run,
+while profiles of the previous version stay readable until then.
+
+Matching (with settings.RESUME_MATCH_SOURCE = 'profile') and analytics read
+the stored profiles, so unchanged resumes need no text at all.
+"""
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+from datetime import date
+
+from django.conf import settings
+from langchain.llms import OpenAI
+from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+
+from . import compaction, metrics
+from .llm import complete_concurrently
+from .models import ResumeProfile
+from .skills import COMMON_SKILLS, SKILL_INDEX_VERSION, SKILL_SEPARATOR_RE, parse_skills, text_skills
+
+logger = logging.getLogger(__name__)
+
+PROFILE_RULES_VERSION = 2  # Bump when the rule-based extractor changes: every resume is reparsed
+PROFILE_BATCH_SIZE = 1000  # Resumes parsed and stored per batch
+MAX_TITLES = 10
+MAX_TITLE_WORDS = 6
+MAX_TITLE_LINE_WORDS = 12  # Longer lines are sentences, not headings
+MAX_YEARS_EXPERIENCE = 60
+
+MONTHS = {month: i for i, month in enumerate(('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), start=1)}
+_MONTH = r"(?:\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?\s*|\b(\d{1,2})/)?"
+DATE_RANGE_RE = re.compile(
+    _MONTH + r"((?:19|20)\d{2})\s*(?:-|–|—|to|until)\s*(?:" + _MONTH + r"((?:19|20)\d{2})\b|(present|current|now|today|date)\b)",
+    re.IGNORECASE,
+)
+EXPERIENCE_RES = (
+    re.compile(r"(\d{1,2}(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)'?\.?\s+(?:of\s+)?(?:[a-z/&-]+\s+){0,3}?(?:experience|exp)\b"),
+    re.compile(r"\bexperience\s*[:-]\s*(\d{1,2}(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)\b"),
+)
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+EDUCATION_PATTERNS = ( # Highest level first; a lookahead, not \b, ends the alternatives that end in a dot (b.s., m.a.)
+    (ResumeProfile.EDUCATION_DOCTORATE, re.compile(r"\b(ph\.?\s?d|doctorate|doctoral|doctor of)\b")),
+    (ResumeProfile.EDUCATION_MASTER, re.compile(
+        r"\b(masters?|master's|m\.?\s?sc|m\.?\s?tech|m\.?\s?eng|mba|mca|m\.?\s?com|m\.s\.|m\.a\.|ms in|ma in|post-?graduate)(?=\W|$)"
+    )),
+    (ResumeProfile.EDUCATION_BACHELOR, re.compile(
+        r"\b(bachelors?|bachelor's|b\.?\s?sc|b\.?\s?tech|b\.?\s?eng|b\.e\.|b\.?\s?com|bca|bba|b\.s\.|b\.a\.|bs in|ba in|undergraduate degree)(?=\W|$)"
+    )),
+    (ResumeProfile.EDUCATION_ASSOCIATE, re.compile(r"\b(associate degree|associate of|associate's|(?<!school )diploma)\b")),
+    (ResumeProfile.EDUCATION_HIGH_SCHOOL, re.compile(r"\b(high school|secondary school|higher secondary|hsc|ssc|ged|a-levels?)\b")),
+)
+EDUCATION_CONTEXT_RE = re.compile(r"\b(university|college|school|institute|academy|degree|graduat\w*)\b")
+
+TITLE_RE = re.compile(
+    r"\b(engineer|developer|programmer|manager|analyst|accountant|designer|consultant|architect|scientist|administrator|"
+    r"specialist|lead|intern|director|officer|executive|coordinator|recruiter|auditor|technician|representative|"
+    r"assistant|president|founder|trainee|controller|strategist|researcher|teacher|editor|writer)s?\b",
+    re.IGNORECASE,
+)
+TITLE_SPLIT_RE = re.compile(r"\s+(?:at|@)\s+|\s*[|,•·(]\s*|\s+[-–—]\s+|\)")
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+
+
+def education_level(text):
+    """Returns the highest education level mentioned in a (lower-cased) text, or EDUCATION_NONE."""
+    for level, pattern in EDUCATION_PATTERNS:
+        if pattern.search(text):
+            return level
+    return ResumeProfile.EDUCATION_NONE
+
+
+def _month_index(month_name, month_number, year, default_month):
+    month = MONTHS.get(month_name.lower()) if month_name else int(month_number) if month_number else default_month
+    return int(year) * 12 + min(max(month, 1), 12) - 1
+
+
+def employment_months(text, today=None):
+    """
+    Returns the total months covered by the date ranges of a (lower-cased) text, overlaps counted once.
+
+    Ranges on lines mentioning a school or degree are ignored, as they are studies, not employment.
+    """
+    today = today or date.today()
+    now = today.year * 12 + today.month - 1
+    intervals = []
+    for line in text.splitlines():
+        if EDUCATION_CONTEXT_RE.search(line) or education_level(line):
+            continue
+        for start_name, start_number, start_year, end_name, end_number, end_year, ongoing in DATE_RANGE_RE.findall(line):
+            start = _month_index(start_name, start_number, start_year, 1)
+            end = now if ongoing else _month_index(end_name, end_number, end_year, 1) + bool(end_name or end_number) # Named end months are inclusive
+            if start <= end and start <= now:
+                intervals.append((start, min(end, now)))
+
+    months = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        months += current_end - current_start
+    return months
+
+
+def years_of_experience(text, today=None):
+    """Returns the years of experience stated in or implied by the date ranges of a (lower-cased) text, or None."""
+    stated = [float(match) for pattern in EXPERIENCE_RES for match in pattern.findall(text)]
+    candidates = [years for years in stated if years <= MAX_YEARS_EXPERIENCE]
+    months = employment_months(text, today)
+    if months:
+        candidates.append(min(months / 12, MAX_YEARS_EXPERIENCE))
+    return round(max(candidates), 1) if candidates else None
+
+
+def job_titles(text):
+    """Returns the job titles found in the heading-like lines of a text, in order of appearance."""
+    titles = {}
+    for line in text.splitlines():
+        line = YEAR_RE.sub(" ", DATE_RANGE_RE.sub(" ", line))
+        if not line.strip() or len(line.split()) > MAX_TITLE_LINE_WORDS:
+            continue
+        for part in TITLE_SPLIT_RE.split(line):
+            words = part.strip(" .:;-–—*").split()
+            if not words or len(words) > MAX_TITLE_WORDS or not TITLE_RE.search(part) or education_level(part.lower()):
+                continue
+            title = " ".join(words)
+            titles.setdefault(title.lower(), title)
+            if len(titles) >= MAX_TITLES:
+                return list(titles.values())
+    return list(titles.values())
+
+
+def parse_resume(text, today=None):
+    """
+    Extracts the profile fields of a resume text with rules only.
+
+    Returns:
+        dict: skills (sorted skill terms), years_experience (float or None), education_level and titles.
+    """
+    lowered = text.lower()
+    return {
+        'skills': sorted(text_skills(text, COMMON_SKILLS)),
+        'years_experience': years_of_experience(lowered, today),
+        'education_level': education_level(lowered),
+        'titles': job_titles(text),
+    }
+
+
+RESUME_RESPONSE_SCHEMAS = [
+    ResponseSchema(name="skills", description="Technical and soft skills of the candidate, comma separated"),
+    ResponseSchema(name="years_experience", description="Total years of professional experience, as a number (blank if unknown)"),
+    ResponseSchema(name="education_level", description="Highest education level: high school, associate, bachelor, master or doctorate (blank if unknown)"),
+    ResponseSchema(name="titles", description="Job titles held by the candidate, most recent first, comma separated"),
+]
+
+RESUME_PROMPT_TEMPLATE = """
+    Your task is to parse the text of a resume and extract the candidate's profile, structuring it in JSON format.
+    Ensure that the extracted information is concise and directly answers the categories. If a category is not mentioned, leave it blank.
+
+    Text of Resume:
+    ```text
+    {resume_text}
+    ```
+
+    Structure your output to match the following format instructions:
+    {format_instructions}
+    """
+
+# Any edit to the prompt, the schema or the text compaction yields a new version, so profiles are reparsed.
+RESUME_PROMPT_VERSION = hashlib.sha256(
+    json.dumps([
+        RESUME_PROMPT_TEMPLATE,
+        [(schema.name, schema.description) for schema in RESUME_RESPONSE_SCHEMAS],
+        compaction.COMPACTION_VERSION,
+        settings.RESUME_PROMPT_TOKEN_BUDGET,
+    ]).encode('utf-8')
+).hexdigest()[:16]
+
+resume_output_parser = StructuredOutputParser.from_response_schemas(RESUME_RESPONSE_SCHEMAS)
+
+
+def extractor_version():
+    """Returns the version of the configured extractor: the rules (and skill normalization), plus the LLM prompt if enabled."""
+    version = f"rules-{PROFILE_RULES_VERSION}.{SKILL_INDEX_VERSION}"
+    if settings.RESUME_PROFILE_LLM:
+        version += f"+llm-{RESUME_PROMPT_VERSION}"
+    return version
+
+
+def build_resume_prompt(resume_text):
+    """Builds the profile prompt of a resume from its compacted text; returns (prompt, prompt token count)."""
+    compacted, _ = compaction.compact_jd_text(resume_text, settings.RESUME_PROMPT_TOKEN_BUDGET, settings.LLM_TOKENIZER_MODEL)
+    prompt = RESUME_PROMPT_TEMPLATE.format(resume_text=compacted, format_instructions=resume_output_parser.get_format_instructions())
+    return prompt, compaction.count_tokens(prompt, settings.LLM_TOKENIZER_MODEL)
+
+
+def merge_llm_fields(fields, data):
+    """
+    Refines rule-based profile fields with a parsed LLM answer.
+
+    Skills are merged (normalized like the skill index); the LLM's years of experience,
+    education level and titles replace the rule-based ones when it gave any.
+    """
+    fields = dict(fields)
+    fields['skills'] = sorted(set(fields['skills']) | parse_skills(data.get('skills')))
+    years = NUMBER_RE.search(str(data.get('years_experience') or ''))
+    if years and float(years.group()) <= MAX_YEARS_EXPERIENCE:
+        fields['years_experience'] = round(float(years.group()), 1)
+    fields['education_level'] = education_level(str(data.get('education_level') or '').lower()) or fields['education_level']
+    titles = data.get('titles')
+    if not isinstance(titles, (list, tuple)):
+        titles = SKILL_SEPARATOR_RE.split(str(titles or ''))
+    titles = list(dict.fromkeys(" ".join(str(title).split()) for title in titles if str(title).strip()))[:MAX_TITLES]
+    if titles:
+        fields['titles'] = titles
+    return fields
+
+
+def refine_with_llm(parsed, texts, llm, openai_api_key=None):
+    """
+    Sends resumes to the LLM concurrently and refines their rule-based fields with the answers.
+
+    Args:
+        parsed (dict): Resume ID -> rule-based fields (see parse_resume).
+        texts (dict): Resume ID -> resume text.
+        llm: LLM client with an async ainvoke() method (default: a new OpenAI client).
+
+    Returns:
+        dict: Resume ID -> refined fields, for the resumes whose call succeeded and could be parsed.
+    """
+    prompts = {}
+    prompt_tokens = {}
+    for resume_id in parsed:
+        prompts[resume_id], prompt_tokens[resume_id] = build_resume_prompt(texts[resume_id])
+    metrics.LLM_TOKENS.inc(sum(prompt_tokens.values()), kind='prompt')
+    if llm is None:
+        llm = OpenAI(openai_api_key=openai_api_key)
+
+    token_counts = {prompts[resume_id]: tokens for resume_id, tokens in prompt_tokens.items()}
+    refined = {}
+    results = complete_concurrently(
+        prompts,
+        llm,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        completion_tokens=settings.LLM_COMPLETION_TOKENS,
+        max_retries=settings.LLM_MAX_RETRIES,
+        token_counter=lambda prompt: token_counts[prompt],
+    )
+    for resume_id, response, error in results:
+        if error is not None:
+            logger.error("Error parsing resume %s with the LLM: %s", resume_id, error)
+            continue
+        try:
+            refined[resume_id] = merge_llm_fields(parsed[resume_id], resume_output_parser.parse(response))
+        except Exception as e:
+            logger.warning("Error parsing the LLM profile of resume %s: %s, Response was: %s", resume_id, e, response)
+    return refined
+
+
+def get_profiles(resumes, fingerprints, get_texts, llm=None, openai_api_key=None):
+    """
+    Returns the profiles of the given resumes, parsing only new or changed ones.
+
+    Stored profiles of the current extractor version whose fingerprint matches the
+    resume's current Drive fingerprint are loaded; the other resumes are parsed from
+    their text in batches of PROFILE_BATCH_SIZE and upserted. When the LLM pass is
+    enabled, resumes whose LLM call fails get their rule-based profile for this run
+    but it is not stored, so they are retried next run.
+
+    Args:
+        resumes (list): Resume objects.
+        fingerprints (dict): Drive file ID -> current content fingerprint.
+        get_texts: Callable(list of resumes) -> dict of Drive file ID -> text (None if unavailable).
+        llm: LLM client for the LLM pass (see refine_with_llm).
+        openai_api_key (str): OpenAI API key of the default LLM client.
+
+    Returns:
+        dict: Resume ID -> ResumeProfile, for the resumes that have text.
+    """
+    version = extractor_version()
+    profiles = {}
+    stored = ResumeProfile.objects.filter(resume__in=[r.id for r in resumes], extractor_version=version)
+    current = {r.id: fingerprints.get(r.drive_file_id) for r in resumes}
+    for profile in stored.iterator(chunk_size=10000):
+        if profile.fingerprint == current[profile.resume_id]:
+            profiles[profile.resume_id] = profile
+
+    stale = [r for r in resumes if r.id not in profiles and current[r.id]]
+    if stale:
+        logger.info("Parsing %d new or changed resume profiles (%s)", len(stale), version)
+    for start in range(0, len(stale), PROFILE_BATCH_SIZE):
+        batch = stale[start:start + PROFILE_BATCH_SIZE]
+        texts = get_texts(batch)
+        texts = {r.id: texts[r.drive_file_id] for r in batch if texts.get(r.drive_file_id)}
+        parsed = {resume_id: parse_resume(text) for resume_id, text in texts.items()}
+        refined = refine_with_llm(parsed, texts, llm, openai_api_key) if settings.RESUME_PROFILE_LLM and parsed else {}
+
+        new_profiles = [
+            ResumeProfile(
+                resume=r, extractor_version=version, fingerprint=current[r.id],
+                parsed_with_llm=r.id in refined, **refined.get(r.id, parsed[r.id]),
+            )
+            for r in batch if r.id in parsed
+        ]
+        ResumeProfile.objects.bulk_create(
+            [profile for profile in new_profiles if profile.parsed_with_llm or not settings.RESUME_PROFILE_LLM],
+            update_conflicts=True,
+            unique_fields=['resume', 'extractor_version'],
+            update_fields=['fingerprint', 'skills', 'years_experience', 'education_level', 'titles', 'parsed_with_llm', 'parsed_at'],
+        )
+        profiles.update((profile.resume_id, profile) for profile in new_profiles)
+    return profiles
+
+
+def profile_to_text(profile):
+    """Flattens a profile into the text used for matching: titles, skills and education level."""
+    parts = [*profile.titles, *profile.skills]
+    if profile.education_level:
+        parts.append(profile.get_education_level_display())
+    return " ".join(parts)
+
+
+def profile_analytics(profiles, top_skills=10):
+    """
+    Summarizes the profiles of a role's matched resumes.
+
+    Returns:
+        dict: avg_years_experience (None if unknown for all), education_levels (level -> count)
+            and top_skills ([skill, count] pairs, most common first).
+    """
+    years = [profile.years_experience for profile in profiles if profile.years_experience is not None]
+    return {
+        'avg_years_experience': round(sum(years) / len(years), 1) if years else None,
+        'education_levels': dict(Counter(profile.education_level for profile in profiles if profile.education_level)),
+        'top_skills': [[skill, count] for skill, count in Counter(skill for profile in profiles for skill in profile.skills).most_common(top_skills)],
+    }
@@ -0,0 +1,208 @@
+"""
+Skill inverted index for pre-filtering match candidates.
+
+Resumes are indexed against a skill vocabulary: a built-in list of common
+skills plus every skill listed by the structured JDs. The index maps each
+normalized skill term to the resumes mentioning it (ResumeSkill rows), so the
+resumes sharing at least K skills with a JD are found with one indexed query
+per role, and only those are scored.
+
+The index is maintained incrementally. A resume is (re)indexed when its
+content changes (Resume.skills_fingerprint no longer matches its Drive
+fingerprint). Deleted resumes drop their postings by cascade. When the JDs
+bring new skill terms, only those terms are looked up in the already indexed
+resumes, from the extracted text cache.
+"""
+import logging
+import re
+
+import numpy as np
+from django.db.models import Count
+
+from .models import IndexedSkill, Resume, ResumeSkill
+
+logger = logging.getLogger(__name__)
+
+SKILL_INDEX_VERSION = 1  # Bump when tokenization or normalization changes: every resume is reindexed
+MAX_SKILL_WORDS = 4  # Longer "skills" are sentences, not terms
+INDEX_BATCH_SIZE = 2000  # Resumes indexed per batch
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")  # Keeps c++, c#, node.js, asp.net together
+SKILL_SEPARATOR_RE = re.compile(r"[,;/|\n•·()]|\band\b|\bor\b")
+
+SKILL_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'nodejs': 'node.js',
+    'node': 'node.js',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'golang': 'go',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'amazon web services': 'aws',
+    'google cloud': 'gcp',
+    'ms excel': 'excel',
+    'microsoft excel': 'excel',
+}
+
+COMMON_SKILLS = frozenset((
+    "python django flask fastapi sql postgresql mysql mongodb redis java spring kotlin scala javascript typescript "
+    "react angular vue node.js html css c++ c# asp.net go rust ruby rails php swift android ios aws azure gcp docker "
+    "kubernetes terraform ansible linux git jenkins graphql rest api microservices kafka spark hadoop airflow "
+    "pandas numpy tableau excel powerbi selenium testing agile scrum jira figma marketing sales accounting audit "
+    "tax finance recruiting seo crm salesforce sap logistics networking security leadership communication"
+).split()) | {
+    'machine learning', 'deep learning', 'data analysis', 'data science', 'project management', 'product management',
+    'customer support', 'customer service', 'power bi', 'artificial intelligence', 'natural language processing',
+    'computer vision', 'ci cd', 'unit testing', 'financial reporting', 'digital marketing', 'business development',
+}
+
+
+def tokenize(text):
+    """Lower-cases a text and splits it into skill tokens."""
+    return [token.rstrip('.') for token in TOKEN_RE.findall(text.lower())]
+
+
+def normalize_skill(phrase):
+    """Returns the index term of a skill phrase (aliases resolved), or None if it is empty or too long."""
+    tokens = tokenize(phrase)
+    if not tokens or len(tokens) > MAX_SKILL_WORDS:
+        return None
+    term = " ".join(tokens)
+    return SKILL_ALIASES.get(term, term)
+
+
+def parse_skills(value):
+    """
+    Returns the set of index terms in a structured JD's skills field.
+
+    The LLM returns skills as a comma/semicolon/bullet separated string or a list
+    (possibly nested); both are accepted.
+    """
+    if isinstance(value, dict):
+        return set().union(*(parse_skills(item) for item in value.values()))
+    if isinstance(value, (list, tuple)):
+        return set().union(*(parse_skills(item) for item in value))
+    if not value:
+        return set()
+    terms = (normalize_skill(phrase) for phrase in SKILL_SEPARATOR_RE.split(str(value).lower()))
+    return {term for term in terms if term}
+
+
+def text_skills(text, vocabulary):
+    """Returns the vocabulary terms mentioned in a text (as 1 to MAX_SKILL_WORDS word n-grams or their aliases)."""
+    tokens = tokenize(text)
+    found = set()
+    for n in range(1, MAX_SKILL_WORDS + 1):
+        for i in range(len(tokens) - n + 1):
+            term = " ".join(tokens[i:i + n])
+            term = SKILL_ALIASES.get(term, term)
+            if term in vocabulary:
+                found.add(term)
+    return found
+
+
+def skills_fingerprint(drive_fingerprint):
+    return f"{SKILL_INDEX_VERSION}:{drive_fingerprint}"
+
+
+def update_skill_index(resumes, fingerprints, vocabulary, get_texts):
+    """
+    Brings the skill index of the given resumes up to date.
+
+    Resumes whose content changed since they were indexed are reindexed against the
+    whole vocabulary; the others are only searched for vocabulary terms that are not
+    indexed yet. Resumes without text are left unindexed (and retried next time).
+
+    Args:
+        resumes (list): Resume objects.
+        fingerprints (dict): Drive file ID -> current content fingerprint.
+        vocabulary (set): Skill terms that must be indexed.
+        get_texts: Callable(list of resumes) -> dict of Drive file ID -> text (None if unavailable).
+    """
+    indexed_terms = set(IndexedSkill.objects.values_list('term', flat=True))
+    new_terms = set(vocabulary) - indexed_terms
+    full_vocabulary = indexed_terms | new_terms
+    stale = [r for r in resumes if fingerprints.get(r.drive_file_id) and r.skills_fingerprint != skills_fingerprint(fingerprints[r.drive_file_id])]
+    stale_ids = {r.id for r in stale}
+    backfill = [r for r in resumes if r.id not in stale_ids and r.skills_fingerprint] if new_terms else []
+    if stale or backfill:
+        logger.info("Skill index: indexing %d new or changed resumes, %d new terms in %d indexed resumes", len(stale), len(new_terms), len(backfill))
+
+    for start in range(0, len(stale), INDEX_BATCH_SIZE):
+        batch = stale[start:start + INDEX_BATCH_SIZE]
+        texts = get_texts(batch)
+        indexed = [r for r in batch if texts.get(r.drive_file_id)]
+        ResumeSkill.objects.filter(resume__in=indexed).delete()
+        ResumeSkill.objects.bulk_create(
+            [ResumeSkill(resume=r, skill=term) for r in indexed for term in text_skills(texts[r.drive_file_id], full_vocabulary)],
+            batch_size=10000,
+            ignore_conflicts=True,
+        )
+        for r in indexed:
+            r.skills_fingerprint = skills_fingerprint(fingerprints[r.drive_file_id])
+        Resume.objects.bulk_update(indexed, ['skills_fingerprint'], batch_size=1000)
+
+    for start in range(0, len(backfill), INDEX_BATCH_SIZE):
+        batch = backfill[start:start + INDEX_BATCH_SIZE]
+        texts = get_texts(batch)
+        ResumeSkill.objects.bulk_create(
+            [ResumeSkill(resume=r, skill=term) for r in batch if texts.get(r.drive_file_id) for term in text_skills(texts[r.drive_file_id], new_terms)],
+            batch_size=10000,
+            ignore_conflicts=True,
+        )
+
+    IndexedSkill.objects.bulk_create([IndexedSkill(term=term) for term in new_terms], ignore_conflicts=True)
+
+
+def role_candidates(role_skills, resume_ids, min_shared):
+    """
+    Returns the candidate resumes of each role from the skill index.
+
+    Args:
+        role_skills (dict): Role name -> set of skill terms of the role's JD.
+        resume_ids (set): IDs of the resumes taking part in the run.
+        min_shared (int): Skills a resume must share with a role; roles listing fewer skills require all of them.
+
+    Returns:
+        dict: Role name -> set of candidate resume IDs, or None for roles without skills (every resume is a candidate).
+    """
+    candidates = {}
+    for role_name, skills in role_skills.items():
+        candidates[role_name] = resume_ids.intersection(candidate_resume_ids(skills, min_shared)) if skills else None
+    return candidates
+
+
+def candidate_resume_ids(skills, min_shared):
+    """Returns a queryset (usable as a subquery) of the IDs of the indexed resumes sharing min(min_shared, len(skills)) of skills."""
+    return (
+        ResumeSkill.objects
+        .filter(skill__in=skills)
+        .values('resume_id')
+        .annotate(shared=Count('skill'))
+        .filter(shared__gte=min(min_shared, len(skills)))
+        .values_list('resume_id', flat=True)
+    )
+
+
+def candidate_mask(resumes, role_names, candidates):
+    """
+    Returns the (len(resumes), len(role_names)) boolean mask of candidate pairs, or None if every pair is a candidate.
+
+    Args:
+        candidates (dict): Role name -> set of candidate resume IDs or None (see role_candidates), or None.
+    """
+    if candidates is None:
+        return None
+    resume_ids = np.fromiter((r.id for r in resumes), dtype=np.int64, count=len(resumes))
+    mask = np.ones((len(resumes), len(role_names)), dtype=bool)
+    for j, role_name in enumerate(role_names):
+        role_ids = candidates.get(role_name)
+        if role_ids is not None:
+            mask[:, j] = np.isin(resume_ids, np.fromiter(role_ids, dtype=np.int64, count=len(role_ids)))
+    return mask
@@ -0,0 +1,66 @@
+# setoo_app/tasks.py
+import logging
+from importlib import import_module
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from . import drive_sync
+from .models import AnalysisJob
+from .pipeline import run_analysis
+
+logger = logging.getLogger(__name__)
+
+
+def get_job_api_key(session_key):
+    """Returns the OpenAI API key stored in the session that queued a job, or None if the session is gone."""
+    if not session_key:
+        return None
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    return session_store(session_key).get('openai_api_key')
+
+
+@shared_task
+def run_analysis_job(job_id, incremental=False):
+    """
+    Runs the analysis pipeline for an AnalysisJob, recording its stage and progress as it goes.
+
+    The OpenAI API key is read from the session that queued the job (AnalysisJob.session_key),
+    so it is never part of the task message held by the broker or written to worker logs.
+    """
+    jobs = AnalysisJob.objects.filter(pk=job_id)
+    openai_api_key = get_job_api_key(jobs.values_list('session_key', flat=True).first())
+    if not openai_api_key:
+        jobs.update(
+            status=AnalysisJob.STATUS_FAILED, session_key='', updated_at=timezone.now(),
+            message="The OpenAI API key for this job is no longer available (the session has expired). Please start the analysis again.",
+        )
+        return None
+    jobs.update(status=AnalysisJob.STATUS_RUNNING, updated_at=timezone.now())
+
+    def progress(stage, percent):
+        jobs.update(stage=stage, percent_complete=percent, updated_at=timezone.now())
+
+    try:
+        results, warnings = run_analysis(openai_api_key, progress=progress, incremental=incremental)
+    except Exception as e:
+        logger.exception("Analysis job %s failed", job_id)
+        jobs.update(status=AnalysisJob.STATUS_FAILED, message=f"Error during analysis: {e}", session_key='', updated_at=timezone.now())
+        return None
+
+    jobs.update(
+        status=AnalysisJob.STATUS_SUCCEEDED,
+        results=results,
+        percent_complete=100,
+        message="\n".join(warnings),
+        session_key='',
+        updated_at=timezone.now(),
+    )
+    return results.id
+
+
+@shared_task
+def sync_drive_folders(full=False):
+    """Syncs the JD and resume tables with their Drive folders (run periodically by Celery beat)."""
+    return drive_sync.sync_drive_folders(full=full)
@@ -1,3 +1,503 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import random
+import time
+from datetime import date
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.test import AsyncClient, TestCase, override_settings
+
+from . import compressed_json, embeddings, exports, llm, metrics
+from .benchmarking import synthetic_jd_text, synthetic_pdf, synthetic_resume_text
+from .compressed_json import CompressedValue
+from .drive_clients import is_transport_error
+from .drive_sync import apply_changes
+from .embeddings import HashingEmbedder
+from .async_drive import AsyncDriveClient
+from .fakes import FakeCredentials, FakeDriveService, FakeDriveTransport, FakeHttpError, FakeLLM, FakeRateLimitError
+from .listing import keyset_page
+from .matching import best_matches, top_k_indices, vectorize
+from .models import JD, ExtractedText, Results, Resume, ResumeEmbedding, ResumeMatch, ResumeProfile
+from .pipeline import run_analysis, save_results
+from .profiles import education_level, employment_months, years_of_experience
+from .skills import parse_skills, text_skills
+from .uploads import split_duplicate_uploads
+from .utils import delete_files_from_drive, execute_drive_batch, fetch_files_from_drive
+
+
+class DriveHelpersTests(TestCase):
+    """Drive download, batch and delete helpers, run offline against FakeDriveService."""
+
+    def setUp(self):
+        self.drive = FakeDriveService()
+        self.file_ids = [self.drive.add_file(f"resume_{i}.pdf", f"content {i}".encode(), 'resumes') for i in range(5)]
+
+    def test_fetch_files_from_drive_downloads_every_file(self):
+        fetched = dict(fetch_files_from_drive(self.file_ids, max_workers=3, service_factory=lambda: self.drive))
+        self.assertEqual(fetched, {file_id: f"content {i}".encode() for i, file_id in enumerate(self.file_ids)})
+        self.assertEqual(self.drive.request_count, 5)
+
+    def test_fetch_files_from_drive_reports_missing_files_as_none(self):
+        fetched = dict(fetch_files_from_drive([self.file_ids[0], 'fake-missing'], max_workers=2, service_factory=lambda: self.drive))
+        self.assertEqual(fetched, {self.file_ids[0]: b"content 0", 'fake-missing': None})
+
+    def test_execute_drive_batch_returns_each_response_or_error(self):
+        requests = {file_id: self.drive.files().get(fileId=file_id) for file_id in self.file_ids[:2]}
+        requests['missing'] = self.drive.files().get(fileId='fake-missing')
+        results = execute_drive_batch(self.drive, requests)
+        self.assertEqual(results[self.file_ids[0]][0]['name'], "resume_0.pdf")
+        self.assertIsNone(results[self.file_ids[1]][1])
+        self.assertIsNone(results['missing'][0])
+        self.assertEqual(results['missing'][1].resp.status, 404)
+
+    def test_delete_files_from_drive_counts_missing_files_as_deleted(self):
+        ExtractedText.objects.create(drive_file_id=self.file_ids[0], fingerprint='f', text="cached")
+        ExtractedText.objects.create(drive_file_id=self.file_ids[1], fingerprint='f', text="kept")
+        errors = delete_files_from_drive(self.drive, [self.file_ids[0], 'fake-missing'])
+        self.assertEqual(errors, {self.file_ids[0]: None, 'fake-missing': None})
+        self.assertEqual(list(ExtractedText.objects.values_list('drive_file_id', flat=True)), [self.file_ids[1]])
+        fetched = dict(fetch_files_from_drive([self.file_ids[0]], max_workers=1, service_factory=lambda: self.drive))
+        self.assertIsNone(fetched[self.file_ids[0]])
+
+    def test_delete_files_from_drive_without_service(self):
+        errors = delete_files_from_drive(None, self.file_ids[:2])
+        self.assertTrue(all(errors[file_id] for file_id in self.file_ids[:2]))
+
+    def test_missing_file_is_an_http_error_not_a_transport_error(self):
+        with self.assertRaises(FakeHttpError) as raised:
+            self.drive.files().get_media(fileId='fake-missing').execute()
+        self.assertEqual(raised.exception.resp.status, 404)
+        self.assertFalse(is_transport_error(raised.exception))
+
+
+def counter_total(counter):
+    return sum(value for _, value in counter.snapshot())
+
+
+def make_resume(name, drive_file_id=None):
+    return Resume.objects.create(original_filename=name, drive_file_id=drive_file_id or f"drive-{name}", drive_folder_id='resumes', content_hash=name)
+
+
+class EmbeddingsTests(TestCase):
+    """get_embeddings with the offline HashingEmbedder: storage round trip and re-embedding of changed documents."""
+
+    def setUp(self):
+        self.embedder = HashingEmbedder(dimensions=64)
+        self.resumes = [make_resume(f"resume_{i}.pdf") for i in range(3)]
+        self.texts = {r.id: f"python django developer number {i}" for i, r in enumerate(self.resumes)}
+        self.texts[self.resumes[2].id] = "" # No text: cannot be embedded
+        self.requested = []
+
+    def get_texts(self, owners):
+        self.requested.extend(owner.id for owner in owners)
+        return {owner.id: self.texts[owner.id] for owner in owners}
+
+    def embed(self, fingerprints):
+        return embeddings.get_embeddings(ResumeEmbedding, 'resume', self.resumes, fingerprints, self.get_texts, self.embedder)
+
+    def test_hashing_embedder_is_deterministic_and_normalized(self):
+        vectors = self.embedder.embed(["python developer", "python developer", "accountant"])
+        np.testing.assert_array_equal(vectors[0], vectors[1])
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+
+    def test_vectors_round_trip_through_the_database(self):
+        fingerprints = {r.id: 'v1' for r in self.resumes}
+        matrix, embedded = self.embed(fingerprints)
+        self.assertEqual([r.id for r in embedded], [r.id for r in self.resumes[:2]])
+        self.assertEqual(matrix.shape, (2, 64))
+
+        stored = bytes(ResumeEmbedding.objects.get(resume=self.resumes[0]).vector)
+        np.testing.assert_array_equal(embeddings.bytes_to_vector(stored), matrix[0])
+        self.assertEqual(embeddings.bytes_to_vector(stored).dtype, embeddings.VECTOR_DTYPE)
+
+        self.requested.clear()
+        reloaded, _ = self.embed(fingerprints)
+        self.assertEqual(self.requested, [self.resumes[2].id]) # Only the resume without text is retried
+        np.testing.assert_array_equal(reloaded, matrix)
+
+    def test_changed_fingerprint_is_re_embedded(self):
+        self.embed({r.id: 'v1' for r in self.resumes})
+        self.texts[self.resumes[0].id] = "certified public accountant"
+        self.requested.clear()
+        matrix, _ = self.embed({self.resumes[0].id: 'v2', self.resumes[1].id: 'v1', self.resumes[2].id: 'v1'})
+        self.assertEqual(self.requested, [self.resumes[0].id, self.resumes[2].id])
+        np.testing.assert_array_equal(matrix[0], self.embedder.embed(["certified public accountant"])[0])
+        row = ResumeEmbedding.objects.get(resume=self.resumes[0])
+        self.assertEqual(row.fingerprint, 'v2')
+        self.assertEqual(ResumeEmbedding.objects.filter(resume=self.resumes[0]).count(), 1) # Upserted, not duplicated
+
+    def test_other_embedder_vectors_are_not_reused(self):
+        self.embed({r.id: 'v1' for r in self.resumes})
+        self.embedder = HashingEmbedder(dimensions=32)
+        matrix, _ = self.embed({r.id: 'v1' for r in self.resumes})
+        self.assertEqual(matrix.shape, (2, 32))
+
+
+class CompleteConcurrentlyTests(TestCase):
+    """complete_concurrently against FakeLLM: concurrency cap, 429 retries and the token budget."""
+
+    def test_every_prompt_is_answered_within_the_concurrency_cap(self):
+        fake_llm = FakeLLM(latency=0.01)
+        prompts = {i: f"Role {i}\nRequirements:\npython sql" for i in range(20)}
+        results = {key: (response, error) for key, response, error in llm.complete_concurrently(prompts, fake_llm, max_concurrency=4)}
+        self.assertEqual(set(results), set(prompts))
+        self.assertTrue(all(error is None and '"skills": "python, sql"' in response for response, error in results.values()))
+        self.assertLessEqual(fake_llm.max_in_flight, 4)
+
+    def test_rate_limited_calls_are_retried(self):
+        fake_llm = FakeLLM(rate_limit_every=3)
+        rate_limited_before = counter_total(metrics.LLM_RATE_LIMITED)
+        results = list(llm.complete_concurrently({i: f"Role {i}" for i in range(6)}, fake_llm, max_concurrency=2))
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertGreater(fake_llm.call_count, 6)
+        self.assertEqual(counter_total(metrics.LLM_RATE_LIMITED) - rate_limited_before, fake_llm.call_count - 6)
+
+    def test_rate_limit_errors_are_reported_after_max_retries(self):
+        fake_llm = FakeLLM(rate_limit_every=1) # Every call is rate limited
+        [(key, response, error)] = llm.complete_concurrently({'jd': "Role"}, fake_llm, max_concurrency=1, max_retries=2)
+        self.assertIsNone(response)
+        self.assertIsInstance(error, FakeRateLimitError)
+        self.assertEqual(fake_llm.call_count, 2)
+
+    def test_token_budget_delays_calls_beyond_it(self):
+        prompts = {'a': "3000", 'b': "3000", 'c': "60"} # 6000 tokens per minute = 100 per second; 'c' waits about 0.6s
+        start = time.monotonic()
+        results = list(llm.complete_concurrently(
+            prompts, FakeLLM(), max_concurrency=1, tokens_per_minute=6000, completion_tokens=0, token_counter=int,
+        ))
+        self.assertEqual(len(results), 3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.5)
+
+    def test_token_bucket_clamps_oversized_requests_to_capacity(self):
+        async def acquire_twice():
+            bucket = llm.TokenBucket(60000) # 1000 tokens per second
+            await bucket.acquire(10 ** 9) # More than the whole budget: takes the full bucket instead of waiting forever
+            start = time.monotonic()
+            await bucket.acquire(200)
+            return time.monotonic() - start
+
+        self.assertAlmostEqual(asyncio.run(acquire_twice()), 0.2, delta=0.1)
+
+    def test_prompts_are_reported_if_the_event_loop_dies(self):
+        class CancellingLLM:
+            async def ainvoke(self, prompt):
+                raise asyncio.CancelledError() # BaseException: escapes the per-prompt error handling
+
+        results = list(llm.complete_concurrently({i: "prompt" for i in range(3)}, CancellingLLM(), max_concurrency=3))
+        self.assertEqual(sorted(key for key, _, _ in results), [0, 1, 2])
+        self.assertTrue(all(response is None and isinstance(error, RuntimeError) for _, response, error in results))
+
+
+class MatchingTests(TestCase):
+    """Vectorized matching: best JD per resume, the skill pre-filter mask and top-k selection."""
+
+    def setUp(self):
+        self.jd_matrix = vectorize(["python django sql developer", "accounting audit tax finance"])
+        self.resume_matrix = vectorize(["senior python django engineer", "tax audit specialist", "python sql accounting"])
+
+    def test_best_matches_picks_the_highest_scoring_jd(self):
+        best_index, best_score = best_matches(self.resume_matrix, self.jd_matrix, chunk_size=2) # Two score blocks
+        self.assertEqual(list(best_index[:2]), [0, 1])
+        scores = (self.resume_matrix @ self.jd_matrix.T).toarray()
+        np.testing.assert_allclose(best_score, scores.max(axis=1), rtol=1e-6)
+
+    def test_best_matches_only_scores_allowed_pairs(self):
+        allowed = np.array([[False, True], [False, False], [True, True]])
+        best_index, best_score = best_matches(self.resume_matrix, self.jd_matrix, allowed=allowed)
+        self.assertEqual(best_index[0], 1)
+        self.assertEqual((best_index[1], best_score[1]), (-1, 0.0)) # No candidate JD
+        self.assertIn(best_index[2], (0, 1))
+
+    def test_best_matches_without_jds(self):
+        best_index, best_score = best_matches(self.resume_matrix, self.jd_matrix[:0])
+        self.assertEqual(len(best_index), 3)
+        self.assertFalse(best_score.any())
+
+    def test_top_k_indices(self):
+        values = np.array([0.2, 0.9, 0.5, 0.9, 0.1])
+        self.assertEqual(list(top_k_indices(values, 2)), [1, 3]) # Ties keep index order
+        self.assertEqual(list(top_k_indices(values, 3)), [1, 3, 2])
+        self.assertEqual(list(top_k_indices(values)), [1, 3, 2, 0, 4])
+        self.assertEqual(list(top_k_indices(values, 10)), [1, 3, 2, 0, 4])
+        self.assertEqual(len(top_k_indices(values, 0)), 0)
+
+
+class KeysetPageTests(TestCase):
+    """File list pagination by primary key cursor."""
+
+    def test_pages_cover_every_row_once(self):
+        ids = sorted((make_resume(f"resume_{i}.pdf").id for i in range(5)), reverse=True)
+        pages, after = [], None
+        while True:
+            rows, after = keyset_page(Resume.objects.all(), after, page_size=2)
+            pages.append([row.id for row in rows])
+            if after is None:
+                break
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:]])
+
+    def test_exact_last_page_has_no_cursor(self):
+        for i in range(4):
+            make_resume(f"resume_{i}.pdf")
+        rows, after = keyset_page(Resume.objects.all(), page_size=2)
+        rows, after = keyset_page(Resume.objects.all(), after, page_size=2)
+        self.assertEqual((len(rows), after), (2, None))
+
+
+class MatchPageTests(TestCase):
+    """Results match pagination: keyset cursors over ResumeMatch rows, offsets over legacy JSON blobs."""
+
+    def setUp(self):
+        self.matched_resumes = {
+            'Backend Developer': [{'resume': {'id': None}, 'resume_filename': f"b{i}.pdf", 'score': score, 'explanation': ""} for i, score in enumerate([0.5, 0.9, 0.5, 0.7])],
+            'Accountant': [{'resume': {'id': None}, 'resume_filename': "a0.pdf", 'score': 0.8, 'explanation': ""}],
+        }
+
+    def walk(self, results, role=None, page_size=2):
+        matches, after = [], None
+        while True:
+            page, cursor = exports.match_page(results, role, after, page_size)
+            matches.extend(match['resume_filename'] for match in page)
+            if cursor is None:
+                return matches
+            after = exports.decode_cursor(cursor)
+
+    def test_cursor_round_trip_over_match_rows(self):
+        results = save_results(self.matched_resumes, [], {})
+        self.assertEqual(self.walk(results), ["a0.pdf", "b1.pdf", "b3.pdf", "b2.pdf", "b0.pdf"]) # Role order, then best score (ties: newest row) first
+        self.assertEqual(self.walk(results, role='Backend Developer', page_size=3), ["b1.pdf", "b3.pdf", "b2.pdf", "b0.pdf"])
+
+    def test_legacy_blob_is_paged_by_offset(self):
+        results = Results.objects.create(matched_resumes=self.matched_resumes, unmatched_resumes=[], analytics={})
+        self.assertFalse(exports.has_match_rows(results))
+        self.assertEqual(self.walk(results), ["a0.pdf", "b1.pdf", "b3.pdf", "b0.pdf", "b2.pdf"])
+
+    def test_invalid_cursors_start_over(self):
+        key = ['Accountant', 0.8, 7]
+        self.assertEqual(exports.decode_cursor(exports.encode_cursor(key)), key)
+        for value in (None, "", "not base64!", exports.encode_cursor({'role': 'x'})):
+            self.assertIsNone(exports.decode_cursor(value))
+
+
+class CompressedJSONTests(TestCase):
+    """Compressed JSON encoding and the lazily decoded Results fields."""
+
+    def test_encode_decode_round_trip(self):
+        value = {'roles': [{'score': np.float32(0.5), 'name': "Backend"}], 1: None}
+        data = compressed_json.encode(value)
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(compressed_json.decode(data), {'roles': [{'score': 0.5, 'name': "Backend"}], '1': None}) # Keys coerced like json.dumps
+
+    def test_fields_are_decoded_on_first_access(self):
+        matched_resumes = {'Accountant': [{'resume_filename': "a.pdf", 'score': 0.8}]}
+        results_id = Results.objects.create(matched_resumes=matched_resumes, unmatched_resumes=["u.pdf"], analytics=None).id
+        results = Results.objects.get(pk=results_id)
+        self.assertIsInstance(results.__dict__['matched_resumes'], CompressedValue)
+        self.assertEqual(results.unmatched_resumes, ["u.pdf"])
+        self.assertIsInstance(results.__dict__['matched_resumes'], CompressedValue) # Other fields stay compressed
+        self.assertIsNone(results.analytics)
+
+        results.save() # Unread values are written back as they are
+        self.assertEqual(Results.objects.get(pk=results_id).matched_resumes, matched_resumes)
+
+
+class DriveSyncChangesTests(TestCase):
+    """apply_changes: one page of the Drive changes feed applied to the JD and Resume tables."""
+
+    folders = {'jds': JD, 'resumes': Resume}
+
+    def change(self, file_id, name, parent, **fields):
+        return {'fileId': file_id, 'file': {'id': file_id, 'name': name, 'mimeType': 'application/pdf', 'parents': [parent], **fields}}
+
+    def test_new_renamed_moved_and_trashed_files(self):
+        Resume.objects.create(original_filename="old name.pdf", drive_file_id='renamed', drive_folder_id='resumes')
+        Resume.objects.create(original_filename="moved.pdf", drive_file_id='moved', drive_folder_id='resumes')
+        Resume.objects.create(original_filename="trashed.pdf", drive_file_id='trashed', drive_folder_id='resumes')
+        ExtractedText.objects.create(drive_file_id='trashed', fingerprint='f', text="cached")
+
+        upserted, deleted = apply_changes([
+            self.change('new', "new.pdf", 'resumes', md5Checksum='abc'),
+            self.change('renamed', "new name.pdf", 'resumes'),
+            self.change('moved', "moved.pdf", 'jds'),
+            self.change('trashed', "trashed.pdf", 'resumes', trashed=True),
+            {'fileId': None, 'removed': False}, # Shared drive change
+        ], self.folders)
+
+        self.assertEqual((upserted, deleted), (3, 2))
+        self.assertEqual(
+            dict(Resume.objects.values_list('drive_file_id', 'original_filename')),
+            {'new': "new.pdf", 'renamed': "new name.pdf"},
+        )
+        self.assertEqual(list(JD.objects.values_list('drive_file_id', 'drive_folder_id')), [('moved', 'jds')])
+        self.assertEqual(Resume.objects.get(drive_file_id='new').content_hash, 'abc')
+        self.assertFalse(ExtractedText.objects.filter(drive_file_id='trashed').exists())
+
+    def test_files_outside_the_synced_folders_are_removed(self):
+        Resume.objects.create(original_filename="left.pdf", drive_file_id='left', drive_folder_id='resumes')
+        upserted, deleted = apply_changes([self.change('left', "left.pdf", 'elsewhere'), {'fileId': 'gone', 'removed': True}], self.folders)
+        self.assertEqual((upserted, deleted), (0, 1))
+        self.assertFalse(Resume.objects.exists())
+
+
+class DuplicateUploadTests(TestCase):
+    """split_duplicate_uploads: content already stored, or repeated within the batch."""
+
+    def test_split_duplicate_uploads(self):
+        stored = Resume.objects.create(original_filename="stored.pdf", drive_file_id='stored', drive_folder_id='resumes', content_hash=hashlib.md5(b"stored").hexdigest())
+        files = [
+            SimpleUploadedFile("a.pdf", b"new"),
+            SimpleUploadedFile("b.pdf", b"stored"),
+            SimpleUploadedFile("c.pdf", b"new"),
+            SimpleUploadedFile("d.pdf", b"other"),
+        ]
+        new_files, duplicates = split_duplicate_uploads(Resume, files)
+        self.assertEqual([f.name for f in new_files], ["a.pdf", "d.pdf"])
+        self.assertEqual([(f.name, original) for f, original in duplicates], [("b.pdf", stored), ("c.pdf", files[0])])
+
+
+class SkillParsingTests(TestCase):
+    """Skill terms of structured JDs and resume texts."""
+
+    def test_parse_skills(self):
+        self.assertEqual(
+            parse_skills("Python, JS; React.js and Postgres • k8s / machine learning (ML)"),
+            {'python', 'javascript', 'react', 'postgresql', 'kubernetes', 'machine learning'},
+        )
+        self.assertEqual(parse_skills({'required': ["SQL", ["Docker"]], 'nice': "Go"}), {'sql', 'docker', 'go'})
+        self.assertEqual(parse_skills("excellent written and verbal communication skills in english"), {'excellent written'}) # Over MAX_SKILL_WORDS: dropped
+        self.assertEqual(parse_skills(None), set())
+
+    def test_text_skills(self):
+        vocabulary = {'node.js', 'react', 'machine learning', 'java', 'c++'}
+        text = "Built Node.js APIs and ReactJS dashboards in C++. Applied ML, not JavaScript."
+        self.assertEqual(text_skills(text, vocabulary), {'node.js', 'react', 'machine learning', 'c++'})
+
+
+@override_settings(LLM_TOKENS_PER_MINUTE=None, PDF_EXTRACTION_PROCESSES=1)
+class RunAnalysisTests(TestCase):
+    """run_analysis end to end on a small synthetic corpus, with Google Drive and the LLM faked."""
+
+    roles = ['Backend Developer', 'Accountant']
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.drive = FakeDriveService()
+        for i, role in enumerate(self.roles):
+            filename = f"jd_{i}.pdf"
+            JD.objects.create(original_filename=filename, drive_folder_id='jds', drive_file_id=self.drive.add_file(filename, synthetic_pdf([synthetic_jd_text(rng, role)]), 'jds'))
+        self.expected_matches = {} # Resume -> JD of its role (matches are grouped by JD filename)
+        for i in range(6):
+            filename = f"resume_{i}.pdf"
+            Resume.objects.create(original_filename=filename, drive_folder_id='resumes', drive_file_id=self.drive.add_file(filename, synthetic_pdf([synthetic_resume_text(rng, self.roles[i % 2])]), 'resumes'))
+            self.expected_matches[filename] = f"jd_{i % 2}.pdf"
+
+    def test_run_analysis_matches_resumes_to_their_roles(self):
+        fake_llm = FakeLLM()
+        stages = []
+        results, warnings = run_analysis(None, progress=lambda stage, percent: stages.append(stage), service_factory=lambda: self.drive, llm=fake_llm)
+
+        self.assertEqual(warnings, [])
+        self.assertEqual(fake_llm.call_count, 2) # One structuring call per JD
+        self.assertEqual(stages[0], "Fetching job descriptions")
+        self.assertEqual(stages[-1], "Done")
+        self.assertEqual(dict(ResumeMatch.objects.filter(results=results).values_list('resume_filename', 'role')), self.expected_matches)
+        self.assertEqual(results.unmatched_count, 0)
+        self.assertEqual(exports.role_counts(results), {'jd_0.pdf': 3, 'jd_1.pdf': 3})
+
+    def test_incremental_rerun_reuses_cached_texts_and_structured_jds(self):
+        run_analysis(None, service_factory=lambda: self.drive, llm=FakeLLM())
+        requests_before = self.drive.request_count
+        fake_llm = FakeLLM()
+        results, _ = run_analysis(None, service_factory=lambda: self.drive, incremental=True, llm=fake_llm)
+
+        self.assertEqual(fake_llm.call_count, 0)
+        self.assertLess(self.drive.request_count - requests_before, 8) # Metadata only: no file is downloaded again
+        self.assertEqual(dict(ResumeMatch.objects.filter(results=results).values_list('resume_filename', 'role')), self.expected_matches)
+
+
+class ProfileRulesTests(TestCase):
+    """Rule-based resume profile parsing: education levels and employment dates."""
+
+    def test_dotted_degree_abbreviations(self):
+        self.assertEqual(education_level("b.s. computer science"), ResumeProfile.EDUCATION_BACHELOR)
+        self.assertEqual(education_level("b.e. in mechanical engineering, pune university"), ResumeProfile.EDUCATION_BACHELOR)
+        self.assertEqual(education_level("m.s. in data science"), ResumeProfile.EDUCATION_MASTER)
+        self.assertEqual(education_level("m.a. english, delhi university 2015"), ResumeProfile.EDUCATION_MASTER)
+        self.assertEqual(education_level("degree: b.a."), ResumeProfile.EDUCATION_BACHELOR)
+
+    def test_abbreviations_inside_words_are_not_degrees(self):
+        self.assertEqual(education_level("bash scripting, msword, mbaas platforms"), ResumeProfile.EDUCATION_NONE)
+        self.assertEqual(education_level("high school diploma"), ResumeProfile.EDUCATION_HIGH_SCHOOL)
+
+    def test_degree_date_ranges_are_not_employment(self):
+        text = "software engineer, acme corp\njan 2015 - present\nb.s. computer science, mit 2011 - 2015"
+        today = date(2026, 9, 15)
+        self.assertEqual(employment_months(text, today), 140) # Jan 2015 to Sep 2026; not from 2011
+        self.assertEqual(years_of_experience(text, today), 11.7)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], RESULTS_EXPORT_CHUNK_SIZE=2)
+class ExportResultsTests(TestCase):
+    """CSV and NDJSON exports, served by sync generators under WSGI and async generators under ASGI."""
+
+    def setUp(self):
+        matched_resumes = {role: [{'resume': {'id': None}, 'resume_filename': f"{role}_{i}.pdf", 'score': i / 10, 'explanation': "ok"} for i in range(3)] for role in ('a', 'b')}
+        self.results = save_results(matched_resumes, [], {})
+        self.legacy = Results.objects.create(matched_resumes=matched_resumes, unmatched_resumes=[], analytics={})
+
+    def urls(self):
+        for results in (self.results, self.legacy):
+            for export_format in ('csv', 'ndjson'):
+                yield reverse(f'export_results_{export_format}', args=[results.id])
+
+    def test_wsgi_export(self):
+        response = self.client.get(reverse('export_results_csv', args=[self.results.id]), {'role': 'b'})
+        self.assertFalse(response.is_async)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ["role,resume_id,resume_filename,score,explanation", "b,,b_2.pdf,0.2,ok", "b,,b_1.pdf,0.1,ok", "b,,b_0.pdf,0.0,ok"])
+
+    async def test_asgi_export_is_streamed_by_async_generators(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = await AsyncClient().get(url)
+                self.assertTrue(response.is_async)
+                content = b"".join([part async for part in response.streaming_content])
+                expected = await sync_to_async(lambda: b"".join(self.client.get(url).streaming_content))()
+                self.assertEqual(content, expected)
+
+
+@override_settings(DRIVE_UPLOAD_CHUNK_SIZE=1000)
+class AsyncDriveUploadTests(TestCase):
+    """AsyncDriveClient uploads through FakeDriveTransport, including resumable sessions that store partial chunks."""
+
+    content = bytes(range(256)) * 14 # 3584 bytes: four resumable chunks
+
+    def upload(self, content, **transport_options):
+        drive = FakeDriveService()
+        transport = FakeDriveTransport(drive, **transport_options)
+
+        async def upload():
+            client = AsyncDriveClient(transport, FakeCredentials())
+            return await client.upload(SimpleUploadedFile("resume.pdf", content, 'application/pdf'), 'resumes')
+
+        file_id = asyncio.run(upload())
+        return drive, drive.files().get_media(fileId=file_id).execute()
+
+    def test_small_file_is_one_multipart_request(self):
+        drive, stored = self.upload(b"%PDF-1.4 small")
+        self.assertEqual(stored, b"%PDF-1.4 small")
+
+    def test_resumable_upload(self):
+        _, stored = self.upload(self.content)
+        self.assertEqual(stored, self.content)
+
+    def test_resumable_upload_resumes_after_partially_stored_chunks(self):
+        _, stored = self.upload(self.content, max_chunk_bytes=700) # Drive keeps 700 bytes of each 1000 byte chunk
+        self.assertEqual(stored, self.content)
+
+    def test_resumable_upload_fails_if_nothing_is_stored(self):
+        with self.assertRaises(RuntimeError):
+            self.upload(self.content, max_chunk_bytes=0)
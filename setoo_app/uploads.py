@@ -0,0 +1,89 @@
+"""
+Content hashing and deduplication of uploaded JD/resume files.
+
+The upload handlers below compute the MD5 of each uploaded file while Django
+reads it from the request (no extra pass over the data) and attach it to the
+UploadedFile as content_hash. MD5 is what Drive reports as md5Checksum, so
+files uploaded here and files picked up by the Drive folder sync are hashed
+the same way. JD/Resume.content_hash is unique, so a file whose content is
+already stored is reported against the existing record instead of being
+uploaded again.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+class ContentHashMixin:
+    """Upload handler mixin hashing each file's chunks as they are received."""
+
+    def new_file(self, *args, **kwargs):
+        self.content_hasher = hashlib.md5() # Before super(): an activated memory handler raises StopFutureHandlers
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if getattr(self, 'activated', True): # An inactive memory handler passes the chunk on to the next handler
+            self.content_hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if uploaded_file is not None:
+            uploaded_file.content_hash = self.content_hasher.hexdigest()
+        return uploaded_file
+
+
+class HashingMemoryFileUploadHandler(ContentHashMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(ContentHashMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def get_content_hash(uploaded_file):
+    """Returns the MD5 hex digest of an uploaded file, computed by the upload handler or, failing that, read now."""
+    content_hash = getattr(uploaded_file, 'content_hash', None)
+    if content_hash is None:
+        hasher = hashlib.md5()
+        for chunk in uploaded_file.chunks():
+            hasher.update(chunk)
+        content_hash = uploaded_file.content_hash = hasher.hexdigest()
+    return content_hash
+
+
+def split_duplicate_uploads(model, uploaded_files):
+    """
+    Separates uploaded files whose content is already stored, or repeated within the batch.
+
+    Args:
+        model: JD or Resume.
+        uploaded_files (list): Django UploadedFile objects.
+
+    Returns:
+        tuple: (new_files, duplicates) - new_files keeps the first copy of each new content;
+            duplicates is a list of (uploaded_file, original), where original is the stored
+            JD/Resume or the earlier UploadedFile of the batch with the same content.
+    """
+    hashes = [get_content_hash(uploaded_file) for uploaded_file in uploaded_files]
+    originals = {record.content_hash: record for record in model.objects.filter(content_hash__in=set(hashes))}
+    return _split_duplicates(uploaded_files, hashes, originals)
+
+
+async def asplit_duplicate_uploads(model, uploaded_files):
+    """Async variant of split_duplicate_uploads."""
+    hashes = [get_content_hash(uploaded_file) for uploaded_file in uploaded_files]
+    originals = {record.content_hash: record async for record in model.objects.filter(content_hash__in=set(hashes))}
+    return _split_duplicates(uploaded_files, hashes, originals)
+
+
+def _split_duplicates(uploaded_files, hashes, originals):
+    new_files, duplicates = [], []
+    for uploaded_file, content_hash in zip(uploaded_files, hashes):
+        original = originals.get(content_hash)
+        if original is not None:
+            duplicates.append((uploaded_file, original))
+        else:
+            originals[content_hash] = uploaded_file
+            new_files.append(uploaded_file)
+    return new_files, duplicates
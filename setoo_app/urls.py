@@ -5,6 +5,17 @@ from. import views
 urlpatterns = [
     path('get_api_key/', views.get_api_key, name='get_api_key'),
     path('manage_files/', views.manage_files, name='manage_files'),
+    path('bulk_delete_files/', views.bulk_delete_files, name='bulk_delete_files'),
+    path('files/<str:file_type>/', views.list_files_json, name='list_files_json'),
+    path('async/manage_files/', views.manage_files_async, name='manage_files_async'), # Async variants, for ASGI deployments
+    path('async/bulk_delete_files/', views.bulk_delete_files_async, name='bulk_delete_files_async'),
+    path('async/files/<str:file_type>/', views.list_files_json_async, name='list_files_json_async'),
+    path('analysis_jobs/<int:job_id>/', views.analysis_job_status, name='analysis_job_status'),
     path('analysis_results/<int:results_id>/', views.analysis_results, name='analysis_results'),
+    path('analysis_results/<int:results_id>/matches/', views.results_matches_json, name='results_matches_json'),
+    path('analysis_results/<int:results_id>/unmatched/', views.results_unmatched_json, name='results_unmatched_json'),
+    path('analysis_results/<int:results_id>/export.csv', views.export_results, {'export_format': 'csv'}, name='export_results_csv'),
+    path('analysis_results/<int:results_id>/export.ndjson', views.export_results, {'export_format': 'ndjson'}, name='export_results_ndjson'),
     path('display_top_resumes/<int:results_id>/', views.display_top_resumes, name='display_top_resumes'),
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file
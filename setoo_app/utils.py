@@ -1,45 +1,67 @@
 import os
-import tempfile
-from googleapiclient.http import MediaFileUpload
-import io
+import logging
 from django.conf import settings
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-import time
-import PyPDF2
-import re
+from googleapiclient.http import MediaIoBaseUpload
 from langchain.llms import OpenAI
 from langchain.output_parsers import StructuredOutputParser, ResponseSchema
 import json
+import matplotlib
+matplotlib.use('Agg')  # Headless backend; plots are rendered inside request threads
 import matplotlib.pyplot as plt
+from filelock import FileLock
 import uuid  # For generating unique filenames
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+import numpy as np
+import hashlib
+from functools import lru_cache
+from django.db import transaction
+from django.db.models import Q
+from .models import JD, Resume, ExtractedText, StructuredJD, MatchScore, ResumeEmbedding, JDEmbedding
+from . import compaction, embeddings, matching, metrics, pdf_extraction, profiles, skills
+from .drive_clients import build_drive_client, drive_client_pool
+from .llm import complete_concurrently
+
+
+logger = logging.getLogger(__name__)
+
+def build_drive_service():
+    """
+    Builds and returns a new, unshared Google Drive API service.
 
-
-# Global Drive service variable
-service = None
+    googleapiclient services (and their httplib2 transport) are not thread-safe,
+    so every worker thread needs its own client. Prefer get_drive_service() or
+    drive_client_pool, which reuse clients and their connections.
+    """
+    try:
+        return build_drive_client()
+    except Exception as e:
+        logger.error("Error initializing Google Drive service: %s", e)
+        return None
 
 def get_drive_service():
-    """Initializes and returns the Google Drive API service."""
-    global service
-    if service:
-        return service  # Return existing service if already initialized
-
-    creds = service_account.Credentials.from_service_account_file(
-        settings.GOOGLE_DRIVE_CREDENTIALS_FILE, scopes=settings.GOOGLE_DRIVE_SCOPES)
+    """
+    Returns the calling thread's Google Drive API service (see drive_clients.drive_client_pool).
 
+    Each thread gets its own client, so this is safe under a threaded server. A client
+    that hits a transport error is replaced on the thread's next call.
+    """
     try:
-        service = build('drive', 'v3', credentials=creds)
-        print("Connected to Google Drive!")
-        return service
+        return drive_client_pool.thread_client()
     except Exception as e:
-        print(f"Error initializing Google Drive service: {e}")
+        logger.error("Error initializing Google Drive service: %s", e)
         return None
 
 def upload_to_drive(service, uploaded_file, drive_folder_id):
     """
-    Uploads a file to Google Drive, handling temporary file creation and cleanup,
-    with retry logic for deletion on failure.
+    Streams an uploaded file to Google Drive with a resumable media upload.
+
+    The content is read straight from the Django UploadedFile (memory, or the upload
+    handler's own temporary file) in settings.DRIVE_UPLOAD_CHUNK_SIZE chunks, so no
+    extra copy is written to disk.
 
     Args:
         service: Google Drive service object.
@@ -50,123 +72,387 @@ def upload_to_drive(service, uploaded_file, drive_folder_id):
         str: Google Drive file ID of the uploaded file, or None on error.
     """
     if service is None:
-        print("Google Drive service not initialized. Cannot upload file.")
+        logger.error("Google Drive service not initialized. Cannot upload file.")
         return None
 
     try:
         file_metadata = {'name': uploaded_file.name, 'parents': [drive_folder_id]}
-        temp_file_path = None
-        temp_file = None  # Declare temp_file outside the with block
-
-        try: # Start of inner try block for file operations and Drive upload
-            print(f"UPLOAD START: Creating temp file for {uploaded_file.name}...")
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") # Create temp file, but don't delete automatically on close yet
-            temp_file_path = temp_file.name # Get the temporary file path immediately
-            print(f"UPLOAD PROGRESS: Temp file created at {temp_file_path}")
-
-            print(f"UPLOAD PROGRESS: Writing content to temp file {temp_file_path}...")
-            for chunk in uploaded_file.chunks(): # Iterate through file chunks from Django upload
-                temp_file.write(chunk) # Write each chunk to the temp file
-
-            print(f"UPLOAD PROGRESS: Explicitly closing temp file {temp_file_path} BEFORE upload...")
-            temp_file.close() # Important: Explicitly close the temp file object to release file handle
-
-            print(f"UPLOAD PROGRESS: Starting Google Drive upload from {temp_file_path}...")
-            media = MediaFileUpload(temp_file_path, mimetype=uploaded_file.content_type) # Prepare media upload from temp file path
-            file = service.files().create(body=file_metadata, media_body=media, fields='id').execute() # Execute the Drive file creation request
-            drive_file_id = file.get('id') # Get the Drive file ID from the response
-            print(f"UPLOAD SUCCESS: File ID: {drive_file_id} for {uploaded_file.name}")
-            return drive_file_id # Return the Drive file ID on successful upload
-
-        finally:  # Cleanup block - Executes whether upload succeeds or fails (within the inner try block)
-            if temp_file_path: # Check if temp_file_path was actually created
-                print(f"CLEANUP START: Attempting to remove temp file {temp_file_path} for {uploaded_file.name}...")
-                max_retries = 5  # Number of retry attempts for deletion
-                retry_delay = 2  # Delay between retry attempts in seconds
-                for retry_attempt in range(max_retries): # Retry loop for file deletion
-                    try:
-                        time.sleep(retry_delay)  # Wait before attempting deletion
-                        os.remove(temp_file_path) # Attempt to delete the temporary file
-                        print(f"CLEANUP SUCCESS: Temp file {temp_file_path} removed after {retry_attempt+1} attempt(s) for {uploaded_file.name}")
-                        break  # If deletion succeeds, exit the retry loop
-                    except Exception as e_delete: # Catch any exception during deletion
-                        if retry_attempt < max_retries - 1: # If not the last retry attempt
-                            print(f"CLEANUP RETRY {retry_attempt+2}/{max_retries}: Error removing temp file {temp_file_path} for {uploaded_file.name}: {e_delete}. Retrying in {retry_delay} seconds...")
-                            time.sleep(retry_delay) # Wait before retrying
-                        else: # Last retry attempt failed
-                            print(f"CLEANUP ERROR: Final attempt failed to remove temp file {temp_file_path} for {uploaded_file.name} after {max_retries} retries: {e_delete}")
-                            break # Exit retry loop after final failure
-                else: # else block of for loop: Executed if loop completes without 'break' (deletion successful in one of the retries)
-                    pass # Deletion was successful in one of the retries, no further action needed
-                # No need for a nested finally block here - the outer finally already ensures cleanup
-                if temp_file and not temp_file.closed: # Ensure temp_file is closed in case of errors before explicit close
-                    temp_file.close() # Ensure temp_file is closed in finally block as well
-
-    except Exception as e: # Catch any errors during the entire upload process (outer try block)
-        print(f"UPLOAD ERROR: General error during Drive upload for {uploaded_file.name}: {e}")
-        return None # Return None to indicate upload failure
-    
+        uploaded_file.seek(0)
+        media = MediaIoBaseUpload(
+            uploaded_file,
+            mimetype=uploaded_file.content_type or 'application/octet-stream',
+            chunksize=settings.DRIVE_UPLOAD_CHUNK_SIZE,
+            resumable=True,
+        )
+        with metrics.span('drive_upload', file=uploaded_file.name):
+            request = service.files().create(body=file_metadata, media_body=media, fields='id')
+            response = None
+            while response is None:
+                _, response = request.next_chunk() # Each call sends one chunk; the last one returns the file resource
+        metrics.DRIVE_BYTES.inc(uploaded_file.size or 0, direction='upload')
+        return response.get('id')
+    except Exception as e:
+        drive_client_pool.report_error(service, e)
+        logger.error("Error during Drive upload of %s: %s", uploaded_file.name, e)
+        return None
+
+
+def upload_files_to_drive(uploaded_files, drive_folder_id, max_workers=None, service_factory=None):
+    """
+    Uploads many files to Google Drive in parallel, yielding each one as soon as it completes.
+
+    Args:
+        uploaded_files: Iterable of Django UploadedFile objects.
+        drive_folder_id: ID of the Google Drive folder to upload to.
+        max_workers (int): Concurrent uploads (default settings.DRIVE_UPLOAD_CONCURRENCY).
+        service_factory: Callable returning a Drive service, called once per worker thread.
+
+    Yields:
+        tuple: (uploaded_file, drive_file_id) in completion order; drive_file_id is None on error.
+    """
+    if max_workers is None:
+        max_workers = settings.DRIVE_UPLOAD_CONCURRENCY
+
+    def upload(service, uploaded_file):
+        return uploaded_file, upload_to_drive(service, uploaded_file, drive_folder_id)
+
+    return run_with_drive_clients(upload, uploaded_files, max_workers, service_factory)
+
+
 def delete_file_from_drive(service, file_id):
     if service is None:
-        print("Google Drive service not initialized. Cannot delete file.")
+        logger.error("Google Drive service not initialized. Cannot delete file.")
         return False
 
     try:
-        service.files().delete(fileId=file_id).execute()
+        with metrics.span('drive_delete'):
+            service.files().delete(fileId=file_id).execute()
+        ExtractedText.objects.filter(drive_file_id=file_id).delete() # Invalidate cached text for the deleted file
         return True
     except Exception as e:
-        print(f"Error deleting file from Drive: {e}")
+        drive_client_pool.report_error(service, e)
+        logger.error("Error deleting file %s from Drive: %s", file_id, e)
         return False
 
 
+DRIVE_BATCH_SIZE = 100  # Maximum number of calls the Drive API accepts in one batch request
+
+
+def execute_drive_batch(service, requests):
+    """
+    Executes many Drive API requests grouped into batch HTTP requests.
+
+    Args:
+        service: Google Drive service object.
+        requests (dict): Mapping of key -> unexecuted request, e.g. service.files().delete(fileId=...).
+
+    Returns:
+        dict: Mapping of key -> (response, error); error is None for successful calls.
+    """
+    results = {}
+    items = list(requests.items())
+    for start in range(0, len(items), DRIVE_BATCH_SIZE):
+        chunk = dict(enumerate(items[start:start + DRIVE_BATCH_SIZE]))
+
+        def callback(request_id, response, exception):
+            results[chunk[int(request_id)][0]] = (response, exception)
+
+        batch = service.new_batch_http_request(callback=callback)
+        for i, (key, request) in chunk.items():
+            batch.add(request, request_id=str(i))
+        try:
+            with metrics.span('drive_batch', requests=len(chunk)):
+                batch.execute()
+        except Exception as e: # The whole batch request failed
+            drive_client_pool.report_error(service, e)
+            logger.error("Error executing Drive batch request: %s", e)
+            for key, _ in chunk.values():
+                results.setdefault(key, (None, e))
+    return results
+
+
+def _is_not_found(error):
+    return getattr(getattr(error, 'resp', None), 'status', None) == 404
+
+
+def delete_files_from_drive(service, file_ids):
+    """
+    Deletes many Drive files using batch requests and drops their cached text.
+
+    Files that are already gone from Drive count as deleted.
+
+    Returns:
+        dict: Mapping of file ID -> error message, or None if the file was deleted.
+    """
+    if service is None:
+        logger.error("Google Drive service not initialized. Cannot delete files.")
+        return {file_id: "Google Drive service not initialized." for file_id in file_ids}
+
+    responses = execute_drive_batch(service, {file_id: service.files().delete(fileId=file_id) for file_id in file_ids})
+    errors = {
+        file_id: None if error is None or _is_not_found(error) else str(error)
+        for file_id, (_, error) in responses.items()
+    }
+    ExtractedText.objects.filter(drive_file_id__in=[file_id for file_id, error in errors.items() if error is None]).delete()
+    return errors
+
+
 def fetch_file_content_from_drive(service, file_id):
     if service is None:
-        print("Google Drive service not initialized. Cannot fetch file.")
+        logger.error("Google Drive service not initialized. Cannot fetch file.")
         return None
 
     try:
-        request = service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
-        while done is False:
-            status, done = downloader.next_chunk()
-            print("Download %d%%." % int(status.progress() * 100))
-        fh.seek(0)
-        return fh.getvalue()
+        with metrics.span('drive_download'):
+            content = service.files().get_media(fileId=file_id).execute() # Whole file in a single round trip
+        metrics.DRIVE_BYTES.inc(len(content or b""), direction='download')
+        return content
     except Exception as e:
-        print(f"Error fetching file from Google Drive: {e}")
+        drive_client_pool.report_error(service, e)
+        logger.error("Error fetching file %s from Google Drive: %s", file_id, e)
         return None
 
+
+def run_with_drive_clients(func, items, max_workers, service_factory=None):
+    """
+    Calls func(service, item) for every item on a bounded thread pool, yielding results as they complete.
+
+    Each call borrows a Drive client from drive_client_pool, so no client is ever used by two
+    threads at once and warm connections are reused across calls. If service_factory is given,
+    each worker thread instead gets its own client from it. At most 2 * max_workers items are
+    queued at once, so memory stays bounded even if the consumer is slower than the workers.
+    """
+    thread_state = threading.local()
+
+    def call(item):
+        if service_factory is None:
+            with drive_client_pool.client() as service:
+                return func(service, item)
+        if not hasattr(thread_state, 'service'):
+            thread_state.service = service_factory() # One client per worker thread
+        return func(thread_state.service, item)
+
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(call, item) for item in islice(items, 2 * max_workers)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                for item in islice(items, 1):
+                    pending.add(executor.submit(call, item))
+
+
+def fetch_files_from_drive(file_ids, max_workers=None, service_factory=None):
+    """
+    Downloads many Drive files concurrently, yielding each one as soon as it completes.
+
+    Args:
+        file_ids: Iterable of Google Drive file IDs.
+        max_workers (int): Concurrent downloads (default settings.DRIVE_DOWNLOAD_CONCURRENCY).
+        service_factory: Callable returning a Drive service; called once per worker thread
+            (default: clients borrowed from drive_client_pool). Pass a factory returning a fake service to run offline.
+
+    Yields:
+        tuple: (file_id, content) in completion order; content is None if the download failed.
+    """
+    if max_workers is None:
+        max_workers = settings.DRIVE_DOWNLOAD_CONCURRENCY
+
+    def fetch(service, file_id):
+        return file_id, fetch_file_content_from_drive(service, file_id)
+
+    return run_with_drive_clients(fetch, file_ids, max_workers, service_factory)
+
+
 def extract_text_from_pdf(file_content, filename="document.pdf"):
-    """Extracts text content from a PDF file content."""
+    """Extracts text content from a PDF file content (see settings.PDF_EXTRACTOR_BACKEND)."""
     try:
-        pdf_file = io.BytesIO(file_content)
-        reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page_num in range(len(reader.pages)):
-            page = reader.pages[page_num]
-            text += page.extract_text()
+        with metrics.span('pdf_extraction'):
+            text = pdf_extraction.extract_text(file_content, settings.PDF_EXTRACTOR_BACKEND, settings.PDF_EXTRACTOR_FALLBACK)
+        metrics.DOCUMENTS_EXTRACTED.inc(result='ok')
         return text
     except Exception as e:
-        print(f"Error extracting text from PDF {filename}: {e}")
+        metrics.DOCUMENTS_EXTRACTED.inc(result='failed')
+        logger.warning("Error extracting text from PDF %s: %s", filename, e)
         return None
 
-def clean_and_structure_jd(jd_text, openai_api_key):
-    """Cleans and structures job description text using OpenAI."""
 
-    parser = StructuredOutputParser.from_response_schemas([
-        ResponseSchema(name="job_title", description="Job title as extracted from the job description"),
-        ResponseSchema(name="department", description="Department or team for this job"),
-        ResponseSchema(name="responsibilities", description="Key responsibilities and tasks"),
-        ResponseSchema(name="skills", description="Technical and soft skills required"),
-        ResponseSchema(name="experience", description="Years and type of experience needed"),
-        ResponseSchema(name="education", description="Educational qualifications required"),
-    ])
+def extract_texts_from_pdfs(documents, filenames, parallel=False):
+    """
+    Extracts text from many PDFs, yielding (key, text) as each document is done.
+
+    Args:
+        documents: Iterable of (key, pdf_bytes) pairs; consumed lazily.
+        filenames (dict): key -> filename, for error messages.
+        parallel (bool): Extract on settings.PDF_EXTRACTION_PROCESSES worker processes
+            instead of in this process.
+    """
+    if not parallel or multiprocessing.current_process().daemon: # Daemonic processes cannot start a pool
+        for key, content in documents:
+            yield key, extract_text_from_pdf(content, filenames.get(key, key))
+        return
+
+    results = pdf_extraction.extract_texts_parallel(
+        documents, settings.PDF_EXTRACTOR_BACKEND, settings.PDF_EXTRACTOR_FALLBACK, max_workers=settings.PDF_EXTRACTION_PROCESSES
+    )
+    for key, text, error, seconds in results:
+        metrics.observe('pdf_extraction', seconds) # Timed in the worker process
+        if error:
+            metrics.DOCUMENTS_EXTRACTED.inc(result='failed')
+            metrics.STAGE_ERRORS.inc(stage='pdf_extraction')
+            logger.warning("Error extracting text from PDF %s: %s", filenames.get(key, key), error)
+        else:
+            metrics.DOCUMENTS_EXTRACTED.inc(result='ok')
+        yield key, text
+
+def _fingerprint_from_metadata(metadata):
+    """Returns the content fingerprint (md5Checksum, falling back to modifiedTime) from Drive file metadata."""
+    return metadata.get('md5Checksum') or metadata.get('modifiedTime')
+
+
+def get_file_fingerprints(service, file_ids):
+    """Fetches the content fingerprints of many Drive files with batch requests (files that fail are omitted)."""
+    if service is None or not file_ids:
+        return {}
+
+    responses = execute_drive_batch(
+        service, {file_id: service.files().get(fileId=file_id, fields='md5Checksum, modifiedTime') for file_id in file_ids}
+    )
+    return {
+        file_id: _fingerprint_from_metadata(metadata)
+        for file_id, (metadata, error) in responses.items()
+        if error is None and metadata
+    }
+
+
+def get_folder_fingerprints(service, folder_id):
+    """
+    Lists a Drive folder and returns the content fingerprint of every file in it.
+
+    One paginated list call covers up to 1000 files, so this is far cheaper than
+    asking for the metadata of each file separately.
 
-    format_instructions = parser.get_format_instructions()
+    Returns:
+        dict: Mapping of Drive file ID to fingerprint (empty on error).
+    """
+    fingerprints = {}
+    if service is None:
+        logger.error("Google Drive service not initialized. Cannot list folder.")
+        return fingerprints
+
+    try:
+        page_token = None
+        while True:
+            with metrics.span('drive_list'):
+                response = service.files().list(
+                    q=f"'{folder_id}' in parents and trashed = false",
+                    fields='nextPageToken, files(id, md5Checksum, modifiedTime)',
+                    pageSize=1000,
+                    pageToken=page_token,
+                ).execute()
+            for metadata in response.get('files', []):
+                fingerprints[metadata['id']] = _fingerprint_from_metadata(metadata)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+    except Exception as e:
+        drive_client_pool.report_error(service, e)
+        logger.error("Error listing Google Drive folder %s: %s", folder_id, e)
+    return fingerprints
 
-    prompt = f"""
+
+def get_current_fingerprints(service, files):
+    """
+    Returns the current Drive content fingerprint of each given JD/Resume.
+
+    Uses one paginated listing per Drive folder, plus batched metadata requests for
+    files that were not found in their folder.
+
+    Returns:
+        dict: Mapping of Drive file ID to fingerprint (files that could not be looked up are omitted).
+    """
+    fingerprints = {}
+    for folder_id in {f.drive_folder_id for f in files}:
+        fingerprints.update(get_folder_fingerprints(service, folder_id))
+    fingerprints.update(get_file_fingerprints(service, [f.drive_file_id for f in files if f.drive_file_id not in fingerprints])) # e.g. files moved to another folder
+    return fingerprints
+
+
+def get_pdf_texts(service, files, service_factory=None, fingerprints=None):
+    """
+    Returns the extracted text of each given JD/Resume, using the persisted text cache.
+
+    The current fingerprint of every file is looked up with get_current_fingerprints(),
+    unless already known and passed in. Files whose cached text was extracted from the same fingerprint are served from the
+    database; only new or changed files are downloaded (concurrently, see
+    fetch_files_from_drive) and parsed, and the cache is updated.
+
+    Args:
+        service: Google Drive service object, used for the folder listings.
+        files: Iterable of JD or Resume objects.
+        service_factory: Per-thread Drive service factory for the downloads (default: pooled clients).
+        fingerprints (dict): Already known Drive file ID -> fingerprint mapping for the files.
+
+    Returns:
+        dict: Mapping of Drive file ID to extracted text (None if it could not be extracted).
+    """
+    files = list(files)
+    if fingerprints is None:
+        fingerprints = get_current_fingerprints(service, files)
+
+    cached = ExtractedText.objects.filter(drive_file_id__in=[f.drive_file_id for f in files]).only('drive_file_id', 'fingerprint', 'text')
+    cached = {entry.drive_file_id: entry for entry in cached}
+
+    texts = {}
+    to_fetch = {}
+    for f in files:
+        fingerprint = fingerprints.get(f.drive_file_id)
+        entry = cached.get(f.drive_file_id)
+        if fingerprint and entry and entry.fingerprint == fingerprint:
+            texts[f.drive_file_id] = entry.text
+        else:
+            to_fetch[f.drive_file_id] = (f, fingerprint)
+    metrics.TEXT_CACHE_LOOKUPS.inc(len(texts), result='hit')
+    metrics.TEXT_CACHE_LOOKUPS.inc(len(to_fetch), result='miss')
+
+    def downloaded():
+        for file_id, content in fetch_files_from_drive(to_fetch, service_factory=service_factory):
+            if content:
+                yield file_id, content
+            else:
+                texts[file_id] = None
+
+    # Extract while the remaining downloads continue; large batches are spread over worker processes
+    parallel = len(to_fetch) >= settings.PDF_EXTRACTION_PARALLEL_MIN_FILES
+    filenames = {file_id: f.original_filename for file_id, (f, _) in to_fetch.items()}
+    to_store = []
+    for file_id, text in extract_texts_from_pdfs(downloaded(), filenames, parallel=parallel):
+        texts[file_id] = text
+        fingerprint = to_fetch[file_id][1]
+        if text is not None and fingerprint:
+            to_store.append(ExtractedText(drive_file_id=file_id, fingerprint=fingerprint, text=text))
+
+    if to_store:
+        ExtractedText.objects.bulk_create(
+            to_store,
+            update_conflicts=True,
+            unique_fields=['drive_file_id'],
+            update_fields=['fingerprint', 'text', 'extracted_at'],
+        )
+    return texts
+
+
+JD_RESPONSE_SCHEMAS = [
+    ResponseSchema(name="job_title", description="Job title as extracted from the job description"),
+    ResponseSchema(name="department", description="Department or team for this job"),
+    ResponseSchema(name="responsibilities", description="Key responsibilities and tasks"),
+    ResponseSchema(name="skills", description="Technical and soft skills required"),
+    ResponseSchema(name="experience", description="Years and type of experience needed"),
+    ResponseSchema(name="education", description="Educational qualifications required"),
+]
+
+JD_PROMPT_TEMPLATE = """
     Your task is to parse the text of a job description and extract key information, structuring it in JSON format.
     Ensure that the extracted information is concise and directly answers the categories. If a category is not mentioned, leave it blank.
 
@@ -181,53 +467,573 @@ def clean_and_structure_jd(jd_text, openai_api_key):
      কাঠামোগত আউটপুট শুধুমাত্র JSON বিন্যাসে প্রদান করুন। অন্য কোনো ফর্ম্যাট গ্রহণযোগ্য নয়।
     """
 
-    llm = OpenAI(openai_api_key=openai_api_key)
-    response = llm(prompt)
+# Any edit to the prompt, the schema or the JD text compaction yields a new version, so stale structured JDs are never reused.
+JD_PROMPT_VERSION = hashlib.sha256(
+    json.dumps([
+        JD_PROMPT_TEMPLATE,
+        [(schema.name, schema.description) for schema in JD_RESPONSE_SCHEMAS],
+        compaction.COMPACTION_VERSION,
+        settings.JD_PROMPT_TOKEN_BUDGET,
+    ]).encode('utf-8')
+).hexdigest()[:16]
+
+jd_output_parser = StructuredOutputParser.from_response_schemas(JD_RESPONSE_SCHEMAS)
+
+
+@lru_cache(maxsize=8)
+def get_llm(openai_api_key):
+    """Returns a shared OpenAI LLM client for the given API key."""
+    return OpenAI(openai_api_key=openai_api_key)
+
+
+def hash_text(text):
+    """Returns the SHA-256 hex digest of a text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def clean_and_structure_jd(jd_text, openai_api_key):
+    """
+    Cleans and structures job description text using OpenAI.
+
+    The text is compacted before it is sent (see build_jd_prompt). Results are memoized in the StructuredJD store by JD text hash and prompt version,
+    so an unchanged JD is only sent to the LLM once per prompt version.
+    """
+    text_hash = hash_text(jd_text)
+    cached = StructuredJD.objects.filter(text_hash=text_hash, prompt_version=JD_PROMPT_VERSION).values_list('data', flat=True).first()
+    if cached is not None:
+        return cached
+
+    prompt, stats = build_jd_prompt(jd_text)
+    metrics.LLM_TOKENS.inc(stats['raw_tokens'], kind='raw')
+    metrics.LLM_TOKENS.inc(stats['prompt_tokens'], kind='prompt')
+    with metrics.span('llm_call'):
+        response = get_llm(openai_api_key)(prompt)
+    structured_output = parse_jd_response(response)
+    if "error" not in structured_output: # Never memoize failed parses, so they are retried next run
+        StructuredJD.objects.get_or_create(
+            text_hash=text_hash, prompt_version=JD_PROMPT_VERSION, defaults={'data': structured_output, **token_stats_fields(stats)}
+        )
+    return structured_output
+
+
+def build_jd_prompt(jd_text):
+    """
+    Builds the structuring prompt for a JD from its compacted text.
+
+    Page furniture and duplicate lines are removed and the JD text is cut to
+    settings.JD_PROMPT_TOKEN_BUDGET tokens, dropping the least useful sections first
+    (see compaction.compact_jd_text).
+
+    Returns:
+        tuple: (prompt, stats) - stats has raw_tokens, compacted_tokens, truncated and prompt_tokens.
+    """
+    compacted, stats = compaction.compact_jd_text(jd_text, settings.JD_PROMPT_TOKEN_BUDGET, settings.LLM_TOKENIZER_MODEL)
+    prompt = JD_PROMPT_TEMPLATE.format(jd_text=compacted, format_instructions=jd_output_parser.get_format_instructions())
+    stats['prompt_tokens'] = compaction.count_tokens(prompt, settings.LLM_TOKENIZER_MODEL)
+    return prompt, stats
+
+
+def token_stats_fields(stats):
+    """Maps build_jd_prompt() stats to StructuredJD fields."""
+    return {'raw_token_count': stats['raw_tokens'], 'prompt_token_count': stats['prompt_tokens'], 'was_truncated': stats['truncated']}
 
+
+def parse_jd_response(response):
+    """Parses an LLM response into a structured JD dict (an error dict if it cannot be parsed)."""
     try:
-        structured_output = parser.parse(response)
+        structured_output = jd_output_parser.parse(response)
         return structured_output
     except Exception as e:
-        print(f"Error parsing OpenAI response: {e}, Response was: {response}")
+        logger.warning("Error parsing OpenAI response: %s, Response was: %s", e, response)
         return {"error": "Failed to parse structured output from OpenAI", "raw_response": response}
 
 
-def process_resumes_and_match_cosine(roles_data, resumes, service, openai_api_key): # Example Cosine Similarity based function (rename this to process_resumes_and_match to use)
-    """Processes resumes, matches them to job descriptions using cosine similarity (example), and generates analytics."""
-    # Placeholder for cosine similarity based matching logic.
-    # Replace with your actual cosine similarity implementation.
-    matched_resumes = {}
-    unmatched_resumes = []
-    analytics = {}
+def structure_jd_with_llm(jd_text, openai_api_key):
+    """Sends a job description to OpenAI and parses the structured output (no caching)."""
+    prompt, _ = build_jd_prompt(jd_text)
+    response = get_llm(openai_api_key)(prompt)
+    return parse_jd_response(response)
 
-    print("process_resumes_and_match_cosine function is a placeholder. Implement your cosine similarity matching logic here.")
-    messages = [] # Placeholder for messages
 
-    # Example structure for matched_resumes (replace with your actual logic results)
-    for role_name in roles_data.keys():
-        matched_resumes[role_name] = [] # Initialize empty list for each role
+def structure_jds(jd_texts, openai_api_key, llm=None, progress=None):
+    """
+    Cleans and structures many job descriptions, sending the uncached ones to the LLM concurrently.
 
-    for resume in resumes:
-        # ... (Your cosine similarity matching logic here to compare resume to each JD in roles_data) ...
-        # ... (Determine best role match based on cosine similarity score) ...
+    Like clean_and_structure_jd, results are memoized in the StructuredJD store. JDs that are not
+    cached are structured with llm.complete_concurrently(), limited by settings.LLM_MAX_CONCURRENCY
+    and settings.LLM_TOKENS_PER_MINUTE, with rate-limited calls retried (settings.LLM_MAX_RETRIES).
+    A JD whose call fails gets an error dict instead of failing the whole run.
 
-        best_role_match = None # Replace with your logic to find the best match or None if no match
-        similarity_score = 0.0 # Replace with your similarity score
+    Args:
+        jd_texts (dict): Key (e.g. JD filename) -> extracted JD text.
+        openai_api_key (str): OpenAI API key.
+        llm: LLM client with an async ainvoke() method (default: a new OpenAI client; see fakes.FakeLLM for tests).
+        progress: Optional callable(done, total), called from the calling thread as JDs complete.
 
-        if best_role_match:
-            matched_resumes[best_role_match].append({
+    Returns:
+        dict: Key -> structured JD dict (or {"error": ...} for JDs that could not be structured).
+    """
+    text_hashes = {key: hash_text(jd_text) for key, jd_text in jd_texts.items()}
+    cached = dict(
+        StructuredJD.objects.filter(text_hash__in=set(text_hashes.values()), prompt_version=JD_PROMPT_VERSION)
+        .values_list('text_hash', 'data')
+    )
+    structured = {key: cached[text_hash] for key, text_hash in text_hashes.items() if text_hash in cached}
+
+    prompts = {}
+    prompt_stats = {}
+    keys_by_hash = {}
+    for key, text_hash in text_hashes.items():
+        if text_hash not in cached:
+            keys_by_hash.setdefault(text_hash, []).append(key)
+            if text_hash not in prompts: # Identical JDs are sent once
+                prompts[text_hash], prompt_stats[text_hash] = build_jd_prompt(jd_texts[key])
+    if prompt_stats:
+        raw_tokens = sum(stats['raw_tokens'] for stats in prompt_stats.values())
+        compacted_tokens = sum(stats['compacted_tokens'] for stats in prompt_stats.values())
+        metrics.LLM_TOKENS.inc(raw_tokens, kind='raw')
+        metrics.LLM_TOKENS.inc(sum(stats['prompt_tokens'] for stats in prompt_stats.values()), kind='prompt')
+        logger.info(
+            "Compacted %d JDs from %d to %d tokens (%d truncated to the token budget)",
+            len(prompt_stats), raw_tokens, compacted_tokens, sum(stats['truncated'] for stats in prompt_stats.values()),
+        )
+
+    if progress is not None:
+        progress(len(structured), len(jd_texts))
+    if prompts and llm is None:
+        llm = OpenAI(openai_api_key=openai_api_key) # Not get_llm(): its async HTTP client would be tied to this call's event loop
+
+    prompt_stats_by_prompt = {prompts[text_hash]: stats['prompt_tokens'] for text_hash, stats in prompt_stats.items()}
+    to_store = []
+    results = complete_concurrently(
+        prompts,
+        llm,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        completion_tokens=settings.LLM_COMPLETION_TOKENS,
+        max_retries=settings.LLM_MAX_RETRIES,
+        token_counter=lambda prompt: prompt_stats_by_prompt[prompt],
+    )
+    for text_hash, response, error in results:
+        if error is not None:
+            logger.error("Error structuring JD %s: %s", ", ".join(keys_by_hash[text_hash]), error)
+            structured_output = {"error": f"OpenAI call failed: {error}"}
+        else:
+            structured_output = parse_jd_response(response)
+            if "error" not in structured_output: # Never memoize failed parses, so they are retried next run
+                to_store.append(StructuredJD(
+                    text_hash=text_hash, prompt_version=JD_PROMPT_VERSION, data=structured_output, **token_stats_fields(prompt_stats[text_hash])
+                ))
+        for key in keys_by_hash[text_hash]:
+            structured[key] = structured_output
+        if progress is not None:
+            progress(len(structured), len(jd_texts))
+
+    StructuredJD.objects.bulk_create(to_store, ignore_conflicts=True)
+    return structured
+
+
+def structured_jd_to_text(structured_jd):
+    """Flattens a structured JD dict into the text used for matching (empty for failed parses)."""
+    if not isinstance(structured_jd, dict) or "error" in structured_jd:
+        return ""
+
+    def flatten(value):
+        if isinstance(value, dict):
+            return " ".join(flatten(v) for v in value.values())
+        if isinstance(value, (list, tuple)):
+            return " ".join(flatten(v) for v in value)
+        return str(value) if value is not None else ""
+
+    parts = [flatten(value) for value in structured_jd.values()]
+    parts.append(flatten(structured_jd.get("skills"))) # Count skills twice: they are the strongest matching signal
+    return " ".join(parts)
+
+
+def get_resume_profiles(service, resumes, fingerprints, service_factory=None, llm=None, openai_api_key=None, texts=None):
+    """
+    Returns the profiles of the given resumes, parsing only new or changed ones (see profiles.get_profiles).
+
+    Args:
+        service: Google Drive service object.
+        resumes (list): Resume objects.
+        fingerprints (dict): Drive file ID -> current fingerprint of the resumes.
+        service_factory: Per-thread Drive service factory for resume downloads.
+        llm: LLM client for the optional LLM pass (settings.RESUME_PROFILE_LLM).
+        openai_api_key (str): OpenAI API key of the default LLM client.
+        texts (dict): Already read Drive file ID -> text of the resumes, if any (otherwise read through the text cache).
+
+    Returns:
+        dict: Resume ID -> ResumeProfile.
+    """
+    def get_texts(batch):
+        if texts is not None:
+            return texts
+        return get_pdf_texts(service, batch, service_factory=service_factory, fingerprints=fingerprints)
+
+    with metrics.span('resume_profiles'):
+        return profiles.get_profiles(resumes, fingerprints, get_texts, llm=llm, openai_api_key=openai_api_key)
+
+
+def get_resume_match_texts(service, resumes, fingerprints, service_factory=None, llm=None, openai_api_key=None):
+    """
+    Returns the text each resume is matched on, and the resumes' profiles.
+
+    With settings.RESUME_MATCH_SOURCE = 'profile' the text is the flattened profile, so only
+    resumes without an up-to-date profile are read; otherwise it is the full extracted text.
+
+    Returns:
+        tuple: (texts, resume_profiles) - Drive file ID -> text (None or empty: nothing to match), and resume ID -> ResumeProfile.
+    """
+    if settings.RESUME_MATCH_SOURCE == 'profile':
+        resume_profiles = get_resume_profiles(service, resumes, fingerprints, service_factory, llm, openai_api_key)
+        texts = {r.drive_file_id: profiles.profile_to_text(resume_profiles[r.id]) if r.id in resume_profiles else None for r in resumes}
+    else:
+        texts = get_pdf_texts(service, resumes, service_factory=service_factory, fingerprints=fingerprints)
+        resume_profiles = get_resume_profiles(service, resumes, fingerprints, service_factory, llm, openai_api_key, texts=texts)
+    return texts, resume_profiles
+
+
+def resume_match_fingerprint(fingerprint):
+    """Returns the fingerprint of what a resume is matched on, given its Drive fingerprint (None stays None)."""
+    if fingerprint and settings.RESUME_MATCH_SOURCE == 'profile':
+        return f"{fingerprint}:{profiles.extractor_version()}" # A new extractor version changes the profile text
+    return fingerprint
+
+
+def build_match_results(role_names, resumes, best_role_index, best_score, top_k=None, threshold=None, method="cosine similarity"):
+    """
+    Builds the matched_resumes/unmatched_resumes output from each resume's best role and score.
+
+    Args:
+        role_names (list): Role names, indexed by best_role_index.
+        resumes (list): Resume objects, aligned with best_role_index and best_score.
+        best_role_index (np.ndarray): Index of each resume's best role, or -1 for no match.
+        best_score (np.ndarray): Score of each resume against its best role.
+        top_k (int): Maximum number of matches kept per role (the rest become unmatched), or None.
+        threshold (float): Minimum score of a match (default settings.MATCH_SCORE_THRESHOLD).
+        method (str): Scoring method named in the match explanations.
+
+    Returns:
+        tuple: (matched_resumes, unmatched_resumes)
+    """
+    if threshold is None:
+        threshold = settings.MATCH_SCORE_THRESHOLD
+    matched_resumes = {role_name: [] for role_name in role_names}
+    is_match = (best_role_index >= 0) & (best_score >= threshold)
+
+    for role_index, role_name in enumerate(role_names):
+        members = np.flatnonzero(is_match & (best_role_index == role_index))
+        ranked = members[matching.top_k_indices(best_score[members], top_k)]
+        for i in ranked:
+            resume = resumes[i]
+            similarity_score = float(best_score[i])
+            matched_resumes[role_name].append({
                 'resume_filename': resume.original_filename,
-                'resume': {"id": resume.id, "filename": resume.original_filename}, # Basic resume info
-                'role': best_role_match,
-                'score': similarity_score, # Example score
-                'explanation': f"Matched to {best_role_match} role based on cosine similarity score: {similarity_score:.2f} (Example Explanation - Replace with actual)", # Example explanation
-                # ... (Add more details as needed)
+                'resume': {"id": resume.id, "filename": resume.original_filename},
+                'role': role_name,
+                'score': similarity_score,
+                'explanation': f"Matched to {role_name} role based on {method} score: {similarity_score:.2f}",
             })
+        is_match[np.setdiff1d(members, ranked, assume_unique=True)] = False # Beyond top_k for this role
+
+    unmatched_resumes = [resumes[i].original_filename for i in np.flatnonzero(~is_match)]
+    return matched_resumes, unmatched_resumes
+
+
+def _index_role_skills(roles_data, role_names, resumes, service, fingerprints, service_factory=None):
+    """Brings the skill index of the resumes up to date and returns role name -> skill terms, for the roles whose JD structured successfully."""
+    role_skills = {}
+    for role_name in role_names:
+        structured_jd = roles_data.get(role_name)
+        if isinstance(structured_jd, dict) and "error" not in structured_jd:
+            role_skills[role_name] = skills.parse_skills(structured_jd.get("skills"))
+
+    skills.update_skill_index(
+        resumes, fingerprints, skills.COMMON_SKILLS.union(*role_skills.values()),
+        lambda batch: get_pdf_texts(service, batch, service_factory=service_factory, fingerprints=fingerprints),
+    )
+    return role_skills
+
+
+def prefilter_by_skills(roles_data, role_names, resumes, service, fingerprints, service_factory=None):
+    """
+    Narrows the resumes of a run to those sharing at least settings.SKILL_PREFILTER_MIN_SHARED skills with a role.
+
+    The skill index is brought up to date first (see skills.update_skill_index): only new or
+    changed resumes are indexed, from the text cache. Roles whose JD failed to structure get
+    no candidates; roles whose JD lists no skills accept every resume.
+
+    Args:
+        roles_data (dict): Role name -> structured JD dict.
+        role_names (list): Roles taking part in the run.
+        resumes (list): Resume objects.
+        service: Google Drive service object.
+        fingerprints (dict): Drive file ID -> current fingerprint of every resume.
+        service_factory: Per-thread Drive service factory for resume downloads.
+
+    Returns:
+        tuple: (candidates, role_candidates) - the candidate resumes, and role name -> set of candidate resume IDs (or None).
+    """
+    with metrics.span('skill_prefilter'):
+        role_skills = _index_role_skills(roles_data, role_names, resumes, service, fingerprints, service_factory)
+        role_candidates = skills.role_candidates(role_skills, {r.id for r in resumes}, settings.SKILL_PREFILTER_MIN_SHARED)
+        role_candidates.update((role_name, set()) for role_name in role_names if role_name not in role_skills)
+
+        if any(ids is None for ids in role_candidates.values()):
+            candidates = resumes
         else:
-            unmatched_resumes.append(resume.original_filename)
+            candidate_ids = set().union(*role_candidates.values())
+            candidates = [r for r in resumes if r.id in candidate_ids]
+    logger.info("Skill pre-filter: %d of %d resumes are candidates", len(candidates), len(resumes))
+    return candidates, role_candidates
 
 
-    analytics = generate_analytics(matched_resumes)
+def skill_candidate_pairs(roles_data, jds_by_role, resumes, service, fingerprints, service_factory=None):
+    """
+    Returns a MatchScore filter keeping only the skill pre-filter's candidate (resume, JD) pairs.
+
+    The incremental counterpart of prefilter_by_skills, with the same candidates: the index is
+    updated the same way, and each role's candidates are a ResumeSkill subquery evaluated by the
+    database, so the stored scores (which cover every pair) never need rescoring when the
+    setting changes.
+
+    Args:
+        jds_by_role (dict): Role name -> JD of the roles taking part in the run.
+
+    Returns:
+        Q: Filter for MatchScore querysets.
+    """
+    with metrics.span('skill_prefilter'):
+        role_skills = _index_role_skills(roles_data, list(jds_by_role), resumes, service, fingerprints, service_factory)
+        pairs = Q(pk__in=[]) # Roles whose JD failed to structure get no candidates
+        for role_name, role_skill_terms in role_skills.items():
+            jd_id = jds_by_role[role_name].id
+            if role_skill_terms:
+                pairs |= Q(jd_id=jd_id, resume_id__in=skills.candidate_resume_ids(role_skill_terms, settings.SKILL_PREFILTER_MIN_SHARED))
+            else:
+                pairs |= Q(jd_id=jd_id) # A JD listing no skills accepts every resume
+    return pairs
+
+
+def process_resumes_and_match_cosine(roles_data, resumes, service, openai_api_key, top_k=None, service_factory=None, llm=None):
+    """
+    Processes resumes, matches them to job descriptions using cosine similarity, and generates analytics.
+
+    All resumes and all structured JDs are vectorized into one sparse term-weight matrix each and
+    every resume x JD pair is scored with matrix products. Each resume is assigned to its best
+    scoring role if that score reaches settings.MATCH_SCORE_THRESHOLD. When top_k (default
+    settings.MATCH_TOP_K_PER_ROLE) is set, only the k best resumes per role are kept as matches
+    and the rest are reported as unmatched. When settings.SKILL_PREFILTER_MIN_SHARED is set, only
+    the skill index candidates of each role are read and scored (see prefilter_by_skills).
+    Resumes are matched on their text or their profile (settings.RESUME_MATCH_SOURCE, see
+    get_resume_match_texts), and the analytics summarize the matched resumes' profiles.
+
+    Args:
+        roles_data (dict): Role name -> structured JD dict (as returned by clean_and_structure_jd).
+        resumes: Iterable of Resume objects.
+        service: Google Drive service object, used to read resume text through the text cache.
+        openai_api_key (str): Unused; kept for parity with process_resumes_and_match_agent.
+        top_k (int): Maximum number of matches kept per role, or None for no limit.
+        service_factory: Per-thread Drive service factory for resume downloads (see fetch_files_from_drive).
+        llm: LLM client for the optional resume profile LLM pass (see get_resume_profiles).
+
+    Returns:
+        tuple: (matched_resumes, unmatched_resumes, analytics)
+    """
+    if top_k is None:
+        top_k = settings.MATCH_TOP_K_PER_ROLE
+
+    role_names = list(roles_data.keys())
+    resumes = list(resumes)
+    fingerprints = get_current_fingerprints(service, resumes)
+    candidates, role_candidates = resumes, None
+    if settings.SKILL_PREFILTER_MIN_SHARED and role_names:
+        candidates, role_candidates = prefilter_by_skills(roles_data, role_names, resumes, service, fingerprints, service_factory)
+    resume_texts, resume_profiles = get_resume_match_texts(service, candidates, fingerprints, service_factory, llm, openai_api_key)
+    scored_resumes = [resume for resume in candidates if resume_texts.get(resume.drive_file_id)]
+
+    best_index = np.full(len(scored_resumes), -1, dtype=np.intp)
+    best_score = np.zeros(len(scored_resumes), dtype=np.float32)
+    if scored_resumes and role_names:
+        resume_matrix = matching.vectorize([resume_texts[resume.drive_file_id] for resume in scored_resumes])
+        jd_matrix = matching.vectorize([structured_jd_to_text(roles_data[role_name]) for role_name in role_names])
+        best_index, best_score = matching.best_matches(
+            resume_matrix, jd_matrix, allowed=skills.candidate_mask(scored_resumes, role_names, role_candidates)
+        )
+
+    matched_resumes, unmatched_resumes = build_match_results(role_names, scored_resumes, best_index, best_score, top_k)
+    unmatched_resumes = [resume.original_filename for resume in resumes if not resume_texts.get(resume.drive_file_id)] + unmatched_resumes # Nothing to match without text (or not a candidate)
+
+    analytics = generate_analytics(matched_resumes, resume_profiles)
+
+    return matched_resumes, unmatched_resumes, analytics
+
+
+def process_resumes_and_match_incremental(roles_data, resumes, service, openai_api_key, top_k=None, service_factory=None, llm=None):
+    """
+    Incremental variant of process_resumes_and_match_cosine that reuses the scores of the previous run.
+
+    Pair scores are kept in MatchScore, and every JD/Resume remembers the fingerprint it was
+    last scored at (JD: hash of its structured text and the score threshold; Resume: its Drive
+    content fingerprint, see resume_match_fingerprint). Only new or changed resumes are scored against all JDs, and unchanged
+    resumes only against new or changed JDs; pairs of deleted files are dropped by cascade.
+    The result is then built from the merged stored scores, so the cost of a run is
+    proportional to what changed rather than to the size of the corpus. When
+    settings.SKILL_PREFILTER_MIN_SHARED is set, each resume's best role is picked among its skill
+    index candidate pairs only (see skill_candidate_pairs), as in the full run.
+
+    Args and return value are the same as for process_resumes_and_match_cosine.
+    """
+    if top_k is None:
+        top_k = settings.MATCH_TOP_K_PER_ROLE
+    threshold = settings.MATCH_SCORE_THRESHOLD
+
+    jds_by_name = JD.objects.in_bulk(list(roles_data.keys()), field_name='original_filename')
+    role_names = [role_name for role_name in roles_data if role_name in jds_by_name]
+    jds = [jds_by_name[role_name] for role_name in role_names]
+    role_texts = [structured_jd_to_text(roles_data[role_name]) for role_name in role_names]
+    jd_fingerprints = [hash_text(f"{threshold}\n{text}") for text in role_texts] # A new threshold invalidates stored scores
+    changed_jd_indices = [i for i, jd in enumerate(jds) if jd.scored_fingerprint != jd_fingerprints[i]]
+
+    resumes = list(resumes)
+    resume_fingerprints = get_current_fingerprints(service, resumes)
+    match_fingerprints = {file_id: resume_match_fingerprint(fingerprint) for file_id, fingerprint in resume_fingerprints.items()}
+    changed_resumes = [r for r in resumes if not r.scored_fingerprint or r.scored_fingerprint != match_fingerprints.get(r.drive_file_id)]
+    changed_resume_ids = {r.id for r in changed_resumes}
+    unchanged_resumes = [r for r in resumes if r.id not in changed_resume_ids]
+
+    with transaction.atomic():
+        MatchScore.objects.filter(resume_id__in=changed_resume_ids).delete()
+        MatchScore.objects.filter(jd__in=[jds[i] for i in changed_jd_indices]).delete()
+
+    jd_matrix = matching.vectorize(role_texts) if role_texts else None
+
+    def score_against(resume_batch, jd_indices):
+        """Scores a batch of resumes against the given JDs and stores the pairs above the threshold."""
+        texts, _ = get_resume_match_texts(service, resume_batch, resume_fingerprints, service_factory, llm, openai_api_key)
+        scored = [r for r in resume_batch if texts.get(r.drive_file_id)]
+        if scored and jd_indices:
+            resume_matrix = matching.vectorize([texts[r.drive_file_id] for r in scored])
+            new_scores = []
+            for rows, cols, scores in matching.iter_pairs_above(resume_matrix, jd_matrix[jd_indices], threshold):
+                new_scores.extend(
+                    MatchScore(resume=scored[row], jd=jds[jd_indices[col]], score=float(score))
+                    for row, col, score in zip(rows, cols, scores)
+                )
+            MatchScore.objects.bulk_create(new_scores, batch_size=5000)
+        return scored
+
+    batch_size = settings.INCREMENTAL_SCORE_BATCH_SIZE
+    rescored_resumes = []
+    for start in range(0, len(changed_resumes), batch_size):
+        rescored_resumes.extend(score_against(changed_resumes[start:start + batch_size], list(range(len(jds)))))
+    if changed_jd_indices:
+        for start in range(0, len(unchanged_resumes), batch_size):
+            score_against(unchanged_resumes[start:start + batch_size], changed_jd_indices)
+
+    for resume in rescored_resumes: # Resumes without extractable text stay unscored and are retried next run
+        resume.scored_fingerprint = match_fingerprints.get(resume.drive_file_id, '')
+    Resume.objects.bulk_update(rescored_resumes, ['scored_fingerprint'], batch_size=1000)
+    for i in changed_jd_indices:
+        jds[i].scored_fingerprint = jd_fingerprints[i]
+    JD.objects.bulk_update([jds[i] for i in changed_jd_indices], ['scored_fingerprint'], batch_size=1000)
+
+    # Best stored role per resume, picked by the database (DISTINCT ON resume_id)
+    jd_index_by_id = {jd.id: i for i, jd in enumerate(jds)}
+    resume_index_by_id = {resume.id: i for i, resume in enumerate(resumes)}
+    best_index = np.full(len(resumes), -1, dtype=np.intp)
+    best_score = np.zeros(len(resumes), dtype=np.float32)
+    stored_pairs = MatchScore.objects.filter(jd_id__in=jd_index_by_id)
+    if settings.SKILL_PREFILTER_MIN_SHARED and jds:
+        stored_pairs = stored_pairs.filter(skill_candidate_pairs(
+            roles_data, dict(zip(role_names, jds)), resumes, service, resume_fingerprints, service_factory,
+        ))
+    best_pairs = (
+        stored_pairs
+        .order_by('resume_id', '-score')
+        .distinct('resume_id')
+        .values_list('resume_id', 'jd_id', 'score')
+    )
+    for resume_id, jd_id, score in best_pairs.iterator(chunk_size=10000):
+        i = resume_index_by_id.get(resume_id)
+        if i is not None:
+            best_index[i] = jd_index_by_id[jd_id]
+            best_score[i] = score
+
+    matched_resumes, unmatched_resumes = build_match_results(role_names, resumes, best_index, best_score, top_k)
+    matched_ids = {match['resume']['id'] for matches in matched_resumes.values() for match in matches}
+    resume_profiles = get_resume_profiles( # Stored for every resume scored above; only read for the matched ones
+        service, [r for r in resumes if r.id in matched_ids], resume_fingerprints, service_factory, llm, openai_api_key
+    )
+    analytics = generate_analytics(matched_resumes, resume_profiles)
+
+    return matched_resumes, unmatched_resumes, analytics
+
+
+def process_resumes_and_match_embeddings(roles_data, resumes, service, openai_api_key, top_k=None, service_factory=None, llm=None):
+    """
+    Embedding-based variant of process_resumes_and_match_cosine.
+
+    Resumes and structured JDs are embedded with embeddings.get_embedder() and the vectors are
+    persisted per document version (ResumeEmbedding/JDEmbedding), so only new or changed
+    documents are downloaded and embedded; all other vectors are loaded from the database.
+    Each resume is assigned to its best role by cosine similarity of the embeddings if that
+    score reaches settings.EMBEDDING_MATCH_SCORE_THRESHOLD. The skill pre-filter, the match source
+    (text or profile) and the profile analytics apply as for process_resumes_and_match_cosine.
+
+    Args and return value are the same as for process_resumes_and_match_cosine; openai_api_key
+    is used by the 'openai' embedding backend.
+    """
+    if top_k is None:
+        top_k = settings.MATCH_TOP_K_PER_ROLE
+    embedder = embeddings.get_embedder(openai_api_key)
+
+    jds_by_name = JD.objects.in_bulk(list(roles_data.keys()), field_name='original_filename')
+    role_names = [role_name for role_name in roles_data if role_name in jds_by_name]
+    jds = [jds_by_name[role_name] for role_name in role_names]
+    jd_texts = {jd.id: structured_jd_to_text(roles_data[jd.original_filename]) for jd in jds}
+    jd_matrix, embedded_jds = embeddings.get_embeddings(
+        JDEmbedding, 'jd', jds, {jd_id: hash_text(text) for jd_id, text in jd_texts.items() if text}, lambda batch: jd_texts, embedder
+    )
+
+    resumes = list(resumes)
+    drive_fingerprints = get_current_fingerprints(service, resumes)
+    candidates, role_candidates = resumes, None
+    if settings.SKILL_PREFILTER_MIN_SHARED and role_names:
+        candidates, role_candidates = prefilter_by_skills(roles_data, role_names, resumes, service, drive_fingerprints, service_factory)
+    resume_fingerprints = {r.id: resume_match_fingerprint(drive_fingerprints[r.drive_file_id]) for r in candidates if r.drive_file_id in drive_fingerprints}
+    resume_profiles = {}
+
+    def get_resume_texts(batch): # Only called for resumes without an up-to-date stored vector
+        texts, batch_profiles = get_resume_match_texts(service, batch, drive_fingerprints, service_factory, llm, openai_api_key)
+        resume_profiles.update(batch_profiles)
+        return {r.id: texts.get(r.drive_file_id) for r in batch}
+
+    resume_matrix, embedded_resumes = embeddings.get_embeddings(
+        ResumeEmbedding, 'resume', candidates, resume_fingerprints, get_resume_texts, embedder
+    )
+
+    embedded_role_names = [jd.original_filename for jd in embedded_jds]
+    best_index = np.full(len(embedded_resumes), -1, dtype=np.intp)
+    best_score = np.zeros(len(embedded_resumes), dtype=np.float32)
+    if embedded_resumes and embedded_jds:
+        best_index, best_score = matching.best_matches(
+            resume_matrix, jd_matrix, allowed=skills.candidate_mask(embedded_resumes, embedded_role_names, role_candidates)
+        )
+
+    matched_resumes, unmatched_resumes = build_match_results(
+        embedded_role_names, embedded_resumes, best_index, best_score, top_k,
+        threshold=settings.EMBEDDING_MATCH_SCORE_THRESHOLD, method="embedding similarity",
+    )
+    embedded_resume_ids = {r.id for r in embedded_resumes}
+    unmatched_resumes = [r.original_filename for r in resumes if r.id not in embedded_resume_ids] + unmatched_resumes # Nothing to match without text
+
+    matched_ids = {match['resume']['id'] for matches in matched_resumes.values() for match in matches}
+    resume_profiles.update(get_resume_profiles(
+        service, [r for r in embedded_resumes if r.id in matched_ids and r.id not in resume_profiles], drive_fingerprints, service_factory, llm, openai_api_key
+    ))
+    analytics = generate_analytics(matched_resumes, resume_profiles)
 
     return matched_resumes, unmatched_resumes, analytics
 
@@ -240,7 +1046,7 @@ def process_resumes_and_match_agent(roles_data, resumes, service, openai_api_key
     unmatched_resumes = []
     analytics = {}
 
-    print("process_resumes_and_match_agent function is a placeholder. Implement your Agent-based matching logic here.")
+    logger.warning("process_resumes_and_match_agent function is a placeholder. Implement your Agent-based matching logic here.")
     messages = [] # Placeholder messages
 
     # Example structure (replace with your agent-based matching results)
@@ -273,20 +1079,36 @@ def process_resumes_and_match_agent(roles_data, resumes, service, openai_api_key
     return matched_resumes, unmatched_resumes, analytics
 
 
-def generate_analytics(matched_resumes):
-    """Generates analytics data from matched resumes."""
+def generate_analytics(matched_resumes, resume_profiles=None):
+    """
+    Generates analytics data from matched resumes.
+
+    Args:
+        matched_resumes (dict): Role name -> list of match dicts.
+        resume_profiles (dict): Resume ID -> ResumeProfile; when given, each role also gets a summary
+            of its matched resumes' profiles (see profiles.profile_analytics).
+    """
     analytics_data = {}
     for role, matches in matched_resumes.items():
         analytics_data[role] = {
             "applied_count": len(matches), # In this example, 'applied_count' is same as matched count - adjust as per your logic if needed
             "passed_count": len(matches), # Assuming all matched resumes are considered 'passed' for this basic analytics - adjust as needed
         }
+        if resume_profiles is not None:
+            role_profiles = [resume_profiles[match['resume']['id']] for match in matches if match.get('resume', {}).get('id') in resume_profiles]
+            analytics_data[role].update(profiles.profile_analytics(role_profiles))
     return analytics_data
 
 
 def visualize_analytics(analytics_display_data):
     """
-    Generates a bar chart visualizing resume application analytics.
+    Generates (or reuses) a bar chart visualizing resume application analytics.
+
+    The plot is named after a hash of the analytics data, so it is rendered once and
+    reused by every later view of the same data. Rendering is serialized with a file
+    lock so concurrent views (in any process) never render the same chart twice, and
+    the new file is published atomically. Each render also prunes the plot cache
+    (see prune_analytics_plots).
 
     Args:
         analytics_display_data (dict): A dictionary where keys are role names
@@ -294,58 +1116,104 @@ def visualize_analytics(analytics_display_data):
                                       'applied_count' and 'passed_count'.
 
     Returns:
-        str: The filename (relative path under MEDIA_URL) of the generated plot image,
+        str: The filename (relative path under MEDIA_URL) of the plot image,
              or None if there's an error.
     """
     try:
-        role_names = list(analytics_display_data.keys())
-        applied_counts = [data['applied_count'] for data in analytics_display_data.values()]
-        passed_counts = [data['passed_count'] for data in analytics_display_data.values()]
-
-        # Set up matplotlib figure and axes
-        fig, ax = plt.subplots(figsize=(10, 6))  # Adjust figure size as needed
-
-        # Bar chart parameters
-        bar_width = 0.35
-        index = range(len(role_names))
-
-        # Create bars for Applied and Passed counts
-        bar1 = ax.bar(index, applied_counts, bar_width, label='Applied Resumes', color='#4c72b0') # Example colors
-        bar2 = ax.bar([i + bar_width for i in index], passed_counts, bar_width, label='Matched Resumes', color='#dd8452')
-
-        # Customize the plot
-        ax.set_xlabel('Job Roles', fontsize=12)
-        ax.set_ylabel('Number of Resumes', fontsize=12)
-        ax.set_title('Resume Application Analytics', fontsize=14)
-        ax.set_xticks([i + bar_width / 2 for i in index])
-        ax.set_xticklabels(role_names, rotation=45, ha="right", fontsize=10) # Rotate role names for better readability
-        ax.legend(fontsize=10)
-
-        # Add data labels on top of the bars
-        def add_labels(bars):
-            for bar in bars:
-                height = bar.get_height()
-                ax.annotate('{}'.format(height),
-                            xy=(bar.get_x() + bar.get_width() / 2, height),
-                            xytext=(0, 3),  # 3 points vertical offset
-                            textcoords="offset points",
-                            ha='center', va='bottom', fontsize=9)
-
-        add_labels(bar1)
-        add_labels(bar2)
-
-
-        # Save the plot to a file in MEDIA_ROOT/analytics_plots
-        plot_filename = f"analytics_plot_{uuid.uuid4().hex}.png" # Generate a unique filename
-        plot_filepath = os.path.join(settings.MEDIA_ROOT, 'analytics_plots', plot_filename)
-        os.makedirs(os.path.dirname(plot_filepath), exist_ok=True) # Ensure directory exists
+        plot_dir = os.path.join(settings.MEDIA_ROOT, 'analytics_plots')
+        plot_filename = f"analytics_plot_{hash_text(json.dumps(analytics_display_data, sort_keys=True))[:32]}.png"
+        plot_filepath = os.path.join(plot_dir, plot_filename)
+
+        if os.path.exists(plot_filepath):
+            os.utime(plot_filepath) # Mark as recently used for eviction
+            return os.path.join('analytics_plots', plot_filename)
+
+        os.makedirs(plot_dir, exist_ok=True) # Ensure directory exists
+        with FileLock(os.path.join(plot_dir, '.render.lock'), timeout=settings.ANALYTICS_PLOT_LOCK_TIMEOUT):
+            if not os.path.exists(plot_filepath): # Another request may have rendered it while we waited
+                temp_filepath = f"{plot_filepath}.{uuid.uuid4().hex}.tmp"
+                with metrics.span('analytics_plot'):
+                    _render_analytics_plot(analytics_display_data, temp_filepath)
+                os.replace(temp_filepath, plot_filepath) # Atomic: readers never see a partial PNG
+                prune_analytics_plots(plot_dir, keep=plot_filename)
+
+        return os.path.join('analytics_plots', plot_filename) # Return relative path for template
+
+    except Exception as e:
+        logger.error("Error generating analytics visualization: %s", e)
+        return None
+
 
+def _render_analytics_plot(analytics_display_data, plot_filepath):
+    """Renders the analytics bar chart to plot_filepath as a PNG."""
+    role_names = list(analytics_display_data.keys())
+    applied_counts = [data['applied_count'] for data in analytics_display_data.values()]
+    passed_counts = [data['passed_count'] for data in analytics_display_data.values()]
+
+    # Set up matplotlib figure and axes
+    fig, ax = plt.subplots(figsize=(10, 6))  # Adjust figure size as needed
+
+    # Bar chart parameters
+    bar_width = 0.35
+    index = range(len(role_names))
+
+    # Create bars for Applied and Passed counts
+    bar1 = ax.bar(index, applied_counts, bar_width, label='Applied Resumes', color='#4c72b0') # Example colors
+    bar2 = ax.bar([i + bar_width for i in index], passed_counts, bar_width, label='Matched Resumes', color='#dd8452')
+
+    # Customize the plot
+    ax.set_xlabel('Job Roles', fontsize=12)
+    ax.set_ylabel('Number of Resumes', fontsize=12)
+    ax.set_title('Resume Application Analytics', fontsize=14)
+    ax.set_xticks([i + bar_width / 2 for i in index])
+    ax.set_xticklabels(role_names, rotation=45, ha="right", fontsize=10) # Rotate role names for better readability
+    ax.legend(fontsize=10)
+
+    # Add data labels on top of the bars
+    def add_labels(bars):
+        for bar in bars:
+            height = bar.get_height()
+            ax.annotate('{}'.format(height),
+                        xy=(bar.get_x() + bar.get_width() / 2, height),
+                        xytext=(0, 3),  # 3 points vertical offset
+                        textcoords="offset points",
+                        ha='center', va='bottom', fontsize=9)
+
+    add_labels(bar1)
+    add_labels(bar2)
+
+    try:
         plt.tight_layout() # Adjust layout to fit everything nicely
-        plt.savefig(plot_filepath, bbox_inches='tight') # bbox_inches='tight' to prevent labels getting cut off
+        fig.savefig(plot_filepath, format='png', bbox_inches='tight') # bbox_inches='tight' to prevent labels getting cut off
+    finally:
         plt.close(fig)  # Close the figure to free up memory
 
-        return os.path.join('analytics_plots', plot_filename) # Return relative path for template
 
-    except Exception as e:
-        print(f"Error generating analytics visualization: {e}")
-        return None
\ No newline at end of file
+def prune_analytics_plots(plot_dir, keep=None):
+    """
+    Evicts cached analytics plots older than settings.ANALYTICS_PLOT_CACHE_MAX_AGE seconds, then
+    the least recently used ones until the cache fits in settings.ANALYTICS_PLOT_CACHE_MAX_BYTES.
+    """
+    now = time.time()
+    entries = []
+    for entry in os.scandir(plot_dir):
+        if not entry.name.startswith('analytics_plot_') or entry.name == keep:
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    if keep and os.path.exists(os.path.join(plot_dir, keep)):
+        total_bytes += os.path.getsize(os.path.join(plot_dir, keep))
+
+    for mtime, size, path in sorted(entries): # Oldest first
+        if now - mtime <= settings.ANALYTICS_PLOT_CACHE_MAX_AGE and total_bytes <= settings.ANALYTICS_PLOT_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total_bytes -= size
+        except FileNotFoundError:
+            pass
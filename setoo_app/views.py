@@ -1,21 +1,35 @@
 # views.py
-from django.db import IntegrityError
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count
 from django.shortcuts import render, redirect, get_object_or_404
 from django.conf import settings
-from .models import JD, Resume, Results
+from .models import JD, Resume, Results, AnalysisJob, ResumeProfile
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from .utils import (
-    fetch_file_content_from_drive,
     upload_to_drive,
+    upload_files_to_drive,
     delete_file_from_drive,
+    delete_files_from_drive,
     get_drive_service,
-    clean_and_structure_jd,
-    extract_text_from_pdf,
-    process_resumes_and_match_cosine ,  # Make sure to choose either process_resumes_and_match_cosine or process_resumes_and_match_agent in utils.py
     visualize_analytics
 )
+from .tasks import run_analysis_job
+from .listing import list_files, alist_files, parse_cursor, parse_page_size, SEARCH_MODES
+from .uploads import get_content_hash, split_duplicate_uploads, asplit_duplicate_uploads
+from . import async_drive
+from . import exports
+from . import metrics as pipeline_metrics
 import json
-import traceback
+import logging
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+EDUCATION_LABELS = dict(ResumeProfile.EDUCATION_CHOICES)
 
 def get_api_key(request):
     if request.method == 'POST':
@@ -28,6 +42,59 @@ def get_api_key(request):
             messages.error(request, "API key is required.")
     return render(request, 'setoo_app/api_key_form.html')
 
+def _search_params(request):
+    query = request.GET.get('q', '').strip()
+    mode = request.GET.get('mode') if request.GET.get('mode') in SEARCH_MODES else SEARCH_MODES[0]
+    return query, mode
+
+
+def _file_listing_context(request):
+    """Builds the paginated, searchable JD and resume listings of the manage_files page from its query string."""
+    query, mode = _search_params(request)
+    jd_page = list_files(JD, query, mode, after=parse_cursor(request.GET.get('jd_after')))
+    resume_page = list_files(Resume, query, mode, after=parse_cursor(request.GET.get('resume_after')))
+    return _listing_context(request, query, mode, jd_page, resume_page, bulk_delete_url=reverse('bulk_delete_files'))
+
+
+async def _afile_listing_context(request):
+    """Async variant of _file_listing_context, for manage_files_async."""
+    query, mode = _search_params(request)
+    jd_page = await alist_files(JD, query, mode, after=parse_cursor(request.GET.get('jd_after')))
+    resume_page = await alist_files(Resume, query, mode, after=parse_cursor(request.GET.get('resume_after')))
+    return _listing_context(request, query, mode, jd_page, resume_page, bulk_delete_url=reverse('bulk_delete_files_async'))
+
+
+def _listing_context(request, query, mode, jd_page, resume_page, bulk_delete_url):
+    (jds, jd_next), (resumes, resume_next) = jd_page, resume_page
+
+    def page_url(**changes):
+        params = request.GET.copy()
+        for key, value in changes.items():
+            params.pop(key, None)
+            if value is not None:
+                params[key] = value
+        return f"?{params.urlencode()}" if params else "?"
+
+    return {
+        'jds': jds,
+        'resumes': resumes,
+        'search_query': query,
+        'search_mode': mode,
+        'jd_next_url': page_url(jd_after=jd_next) if jd_next else None,
+        'jd_first_url': page_url(jd_after=None) if 'jd_after' in request.GET else None,
+        'resume_next_url': page_url(resume_after=resume_next) if resume_next else None,
+        'resume_first_url': page_url(resume_after=None) if 'resume_after' in request.GET else None,
+        'bulk_delete_url': bulk_delete_url,
+    }
+
+
+def _duplicate_message(kind, uploaded_file, original):
+    if isinstance(original, (JD, Resume)):
+        return (f"Skipped {uploaded_file.name}: same content as the existing {kind} '{original.original_filename}' "
+                f"(uploaded {original.uploaded_at:%Y-%m-%d %H:%M}).")
+    return f"Skipped {uploaded_file.name}: same content as {original.name} in this upload."
+
+
 def manage_files(request):
     openai_api_key = request.session.get('openai_api_key')
 
@@ -39,37 +106,42 @@ def manage_files(request):
 
     if service is None:
         messages.error(request, "Error: Google Drive service not initialized.")
-        return render(request, 'setoo_app/manage_files.html', {'jds': JD.objects.all(), 'resumes': Resume.objects.all(), 'openai_api_key': openai_api_key})
+        return render(request, 'setoo_app/manage_files.html', {**_file_listing_context(request), 'openai_api_key': openai_api_key})
 
     if request.method == 'POST':
         if 'add_jd' in request.POST and request.FILES.get('jd_file'):
             jd_file = request.FILES['jd_file']
             try:
-                drive_file_id = upload_to_drive(service, jd_file, settings.JD_DRIVE_FOLDER_ID)
-                if drive_file_id:
-                    jd = JD(original_filename=jd_file.name, drive_file_id=drive_file_id, drive_folder_id=settings.JD_DRIVE_FOLDER_ID)
-                    jd.save()
-                    messages.success(request, "JD uploaded successfully.")
+                _, duplicates = split_duplicate_uploads(JD, [jd_file])
+                if duplicates:
+                    messages.warning(request, _duplicate_message("JD", *duplicates[0]))
                 else:
-                    messages.error(request, "Error uploading JD to Drive.")
+                    drive_file_id = upload_to_drive(service, jd_file, settings.JD_DRIVE_FOLDER_ID)
+                    if drive_file_id:
+                        jd = JD(original_filename=jd_file.name, drive_file_id=drive_file_id, drive_folder_id=settings.JD_DRIVE_FOLDER_ID, content_hash=get_content_hash(jd_file))
+                        jd.save()
+                        messages.success(request, "JD uploaded successfully.")
+                    else:
+                        messages.error(request, "Error uploading JD to Drive.")
             except IntegrityError:
-                messages.error(request, f"A JD with that filename already exists.")
+                messages.error(request, f"A JD with that filename or content already exists.")
             except Exception as e:
                 messages.error(request, f"Error uploading JD: {e}")
 
         elif 'add_resumes' in request.POST and request.FILES.getlist('resume_files'):
-            resume_files = request.FILES.getlist('resume_files')
-            for resume_file in resume_files:
+            resume_files, duplicates = split_duplicate_uploads(Resume, request.FILES.getlist('resume_files')) # Known content is never uploaded
+            for resume_file, original in duplicates:
+                messages.warning(request, _duplicate_message("resume", resume_file, original))
+            for resume_file, drive_file_id in upload_files_to_drive(resume_files, settings.RESUME_DRIVE_FOLDER_ID): # Uploads run in parallel
                 try:
-                    drive_file_id = upload_to_drive(service, resume_file, settings.RESUME_DRIVE_FOLDER_ID)
                     if drive_file_id:
-                        resume = Resume(original_filename=resume_file.name, drive_file_id=drive_file_id, drive_folder_id=settings.RESUME_DRIVE_FOLDER_ID)
+                        resume = Resume(original_filename=resume_file.name, drive_file_id=drive_file_id, drive_folder_id=settings.RESUME_DRIVE_FOLDER_ID, content_hash=get_content_hash(resume_file))
                         resume.save()
                         messages.success(request, f"Resume {resume_file.name} uploaded successfully.") # Success message per file
                     else:
                         messages.error(request, f"Error uploading resume {resume_file.name} to Drive.")
                 except IntegrityError:
-                    messages.error(request, f"A resume with the filename '{resume_file.name}' already exists.")
+                    messages.error(request, f"A resume with the filename '{resume_file.name}' or the same content already exists.")
                 except Exception as e:
                     messages.error(request, f"Error uploading resume {resume_file.name}: {e}")
 
@@ -102,69 +174,17 @@ def manage_files(request):
                 messages.error(request, f"Error deleting resume: {e}")
 
         elif 'process_and_analyze' in request.POST:
-            jds = JD.objects.all()
-            structured_data = {}
-            for jd in jds:
-                jd_content = fetch_file_content_from_drive(service, jd.drive_file_id)
-                if jd_content:
-                    jd_text = extract_text_from_pdf(jd_content, jd.original_filename)
-                    if jd_text:
-                        structured_data[jd.original_filename] = clean_and_structure_jd(jd_text, openai_api_key)
-
-            resumes = Resume.objects.all()
-
+            job = AnalysisJob.objects.create(incremental='incremental' in request.POST, session_key=request.session.session_key)
             try:
-                matched_resumes, unmatched_resumes, analytics = process_resumes_and_match_cosine ( # IMPORTANT: Make sure utils.py has your chosen matching function renamed to process_resumes_and_match
-                    structured_data, resumes, service, openai_api_key  # Passed openai_api_key here!
-                )
-
-                # Handle "Insufficient information" cases *after* processing all resumes
-                insufficient_info_resumes = []
-                for role, matches in matched_resumes.items():
-                    matches_to_remove = []  # Store indices of matches to remove
-                    for i, match in enumerate(matches):
-                        explanation = match.get('explanation', '')
-                        if explanation.startswith("Insufficient"):  # More robust check
-                            insufficient_info_resumes.append(match['resume_filename'])
-                            matches_to_remove.append(i)
-
-                    # Remove the matches in reverse order to avoid index issues
-                    for i in sorted(matches_to_remove, reverse=True):
-                        del matches[i]
-
-                # Clean up empty roles (if any):
-                roles_to_remove = []
-                for role, matches in matched_resumes.items():
-                    if not matches:  # If the list of matches is empty
-                        roles_to_remove.append(role)
-
-                for role in roles_to_remove:
-                    del matched_resumes[role]
-
-
-                # Remove empty roles after processing insufficient resumes
-                matched_resumes = {k: v for k, v in matched_resumes.items() if v}
-
-
-                if insufficient_info_resumes:
-                    filenames_str = ", ".join(insufficient_info_resumes)
-                    messages.error(request, f"The following resumes had insufficient information for a proper match: {filenames_str}. Please check and try again.")
-                    # You might optionally log the insufficient_info_resumes for debugging
-
-                results = Results.objects.create(
-                    matched_resumes=matched_resumes,
-                    unmatched_resumes=unmatched_resumes,
-                    analytics=analytics,
-                )
-                messages.success(request, "Analysis completed successfully.")
-                return redirect('analysis_results', results_id=results.id)
-
+                run_analysis_job.delay(job.id, incremental=job.incremental) # Runs on a Celery worker; poll analysis_job_status for progress. The API key stays in the session
             except Exception as e:
-                messages.error(request, f"Error during analysis: {e}")
-                traceback.print_exc()
-
-            return redirect('manage_files')  # Redirect even if there are errors
-
+                job.status = AnalysisJob.STATUS_FAILED
+                job.message = f"Could not queue analysis: {e}"
+                job.save()
+                messages.error(request, job.message)
+                logger.exception("Could not queue analysis job %s", job.id)
+                return redirect('manage_files')
+            return redirect('analysis_job_status', job_id=job.id)
 
         elif 'edit_jd' in request.POST:
             jd_id = request.POST.get('jd_id')
@@ -186,21 +206,258 @@ def manage_files(request):
 
         return redirect('manage_files')
 
-    jds = JD.objects.all()
-    resumes = Resume.objects.all()
-    context = {'jds': jds, 'resumes': resumes, 'openai_api_key': openai_api_key}
+    context = {**_file_listing_context(request), 'openai_api_key': openai_api_key}
     return render(request, 'setoo_app/manage_files.html', context)
 
 
-def analysis_results(request, results_id):
-    results = get_object_or_404(Results, pk=results_id)
+ASYNC_FILE_ACTIONS = ('add_jd', 'add_resumes', 'delete_jd', 'delete_resume') # Handled natively by manage_files_async
+
+
+async def manage_files_async(request):
+    """
+    Async variant of manage_files for ASGI deployments.
+
+    Uploads and deletes await Drive (see setoo_app.async_drive) and the database (async ORM)
+    instead of holding a thread, so one ASGI worker serves many recruiters' uploads at once.
+    Other actions (analysis, edit links) are handed to manage_files in a worker thread.
+    """
+    openai_api_key = await request.session.aget('openai_api_key') # Also loads the session before the template reads messages from it
+
+    if not openai_api_key:
+        messages.error(request, "No OpenAI API key found in session.")
+        return redirect('get_api_key')
+
+    if request.method != 'POST':
+        context = {**await _afile_listing_context(request), 'openai_api_key': openai_api_key}
+        return render(request, 'setoo_app/manage_files.html', context)
+
+    if not any(action in request.POST for action in ASYNC_FILE_ACTIONS):
+        return await sync_to_async(manage_files)(request)
+
+    if 'add_jd' in request.POST and request.FILES.get('jd_file'):
+        jd_file = request.FILES['jd_file']
+        try:
+            _, duplicates = await asplit_duplicate_uploads(JD, [jd_file])
+            if duplicates:
+                messages.warning(request, _duplicate_message("JD", *duplicates[0]))
+            else:
+                drive_file_id = await async_drive.upload_to_drive(jd_file, settings.JD_DRIVE_FOLDER_ID)
+                if drive_file_id:
+                    await JD.objects.acreate(original_filename=jd_file.name, drive_file_id=drive_file_id, drive_folder_id=settings.JD_DRIVE_FOLDER_ID, content_hash=get_content_hash(jd_file))
+                    messages.success(request, "JD uploaded successfully.")
+                else:
+                    messages.error(request, "Error uploading JD to Drive.")
+        except IntegrityError:
+            messages.error(request, f"A JD with that filename or content already exists.")
+        except Exception as e:
+            messages.error(request, f"Error uploading JD: {e}")
+
+    elif 'add_resumes' in request.POST and request.FILES.getlist('resume_files'):
+        resume_files, duplicates = await asplit_duplicate_uploads(Resume, request.FILES.getlist('resume_files'))
+        for resume_file, original in duplicates:
+            messages.warning(request, _duplicate_message("resume", resume_file, original))
+        for resume_file, drive_file_id in await async_drive.upload_files_to_drive(resume_files, settings.RESUME_DRIVE_FOLDER_ID):
+            try:
+                if drive_file_id:
+                    await Resume.objects.acreate(original_filename=resume_file.name, drive_file_id=drive_file_id, drive_folder_id=settings.RESUME_DRIVE_FOLDER_ID, content_hash=get_content_hash(resume_file))
+                    messages.success(request, f"Resume {resume_file.name} uploaded successfully.")
+                else:
+                    messages.error(request, f"Error uploading resume {resume_file.name} to Drive.")
+            except IntegrityError:
+                messages.error(request, f"A resume with the filename '{resume_file.name}' or the same content already exists.")
+            except Exception as e:
+                messages.error(request, f"Error uploading resume {resume_file.name}: {e}")
+
+    elif 'delete_jd' in request.POST:
+        try:
+            jd = await JD.objects.aget(pk=request.POST.get('jd_to_delete'))
+            if await async_drive.delete_file_from_drive(jd.drive_file_id):
+                await jd.adelete()
+                messages.success(request, "JD deleted successfully.")
+            else:
+                messages.error(request, "Error deleting JD file from Drive.")
+        except JD.DoesNotExist:
+            messages.error(request, "JD not found.")
+        except Exception as e:
+            messages.error(request, f"Error deleting JD: {e}")
 
-    matched_resumes = results.matched_resumes or {}
-    unmatched_resumes = results.unmatched_resumes or []
+    elif 'delete_resume' in request.POST:
+        try:
+            resume = await Resume.objects.aget(pk=request.POST.get('resume_to_delete'))
+            if await async_drive.delete_file_from_drive(resume.drive_file_id):
+                await resume.adelete()
+                messages.success(request, "Resume deleted successfully.")
+            else:
+                messages.error(request, "Error deleting resume file from Drive.")
+        except Resume.DoesNotExist:
+            messages.error(request, "Resume not found.")
+        except Exception as e:
+            messages.error(request, f"Error deleting resume: {e}")
+
+    return redirect('manage_files_async')
+
+
+def list_files_json(request, file_type):
+    """
+    JSON listing of JDs or resumes for scripted use, with the same search and keyset pagination as manage_files.
+
+    Query parameters: q (filename search), mode ('contains' or 'prefix'), after (cursor from the
+    previous page's "next_after") and limit (page size, up to settings.FILE_LIST_MAX_PAGE_SIZE).
+    """
+    query, mode = _search_params(request)
+    rows, next_after = list_files(
+        _file_model(file_type), query, mode, after=parse_cursor(request.GET.get('after')), page_size=parse_page_size(request.GET.get('limit'))
+    )
+    return _file_list_response(request, rows, next_after)
+
+
+async def list_files_json_async(request, file_type):
+    """Async variant of list_files_json (same parameters and response)."""
+    query, mode = _search_params(request)
+    rows, next_after = await alist_files(
+        _file_model(file_type), query, mode, after=parse_cursor(request.GET.get('after')), page_size=parse_page_size(request.GET.get('limit'))
+    )
+    return _file_list_response(request, rows, next_after)
+
+
+def _file_model(file_type):
+    model = {'jds': JD, 'resumes': Resume}.get(file_type)
+    if model is None:
+        raise Http404("Unknown file type.")
+    return model
+
+
+def _file_list_response(request, rows, next_after):
+    next_url = None
+    if next_after is not None:
+        params = request.GET.copy()
+        params['after'] = next_after
+        next_url = f"{request.path}?{params.urlencode()}"
+    return JsonResponse({
+        'results': [
+            {'id': row.id, 'filename': row.original_filename, 'uploaded_at': row.uploaded_at.isoformat()}
+            for row in rows
+        ],
+        'next_after': next_after,
+        'next': next_url,
+    })
+
+
+def bulk_delete_files(request):
+    """Deletes the selected JDs and resumes from Drive in batch requests, then from the database."""
+    if request.method != 'POST':
+        return redirect('manage_files')
+
+    jds = list(JD.objects.filter(pk__in=request.POST.getlist('jd_ids')).values_list('id', 'drive_file_id', 'original_filename'))
+    resumes = list(Resume.objects.filter(pk__in=request.POST.getlist('resume_ids')).values_list('id', 'drive_file_id', 'original_filename'))
+    if not jds and not resumes:
+        messages.error(request, "No files selected.")
+        return redirect('manage_files')
+
+    service = get_drive_service()
+    errors = delete_files_from_drive(service, [drive_file_id for _, drive_file_id, _ in jds + resumes])
+    _delete_file_rows(_deleted_ids(jds, errors), _deleted_ids(resumes, errors))
+    _bulk_delete_messages(request, jds, resumes, errors)
+    return redirect('manage_files')
+
+
+async def bulk_delete_files_async(request):
+    """Async variant of bulk_delete_files: the Drive deletes run concurrently on the event loop."""
+    if request.method != 'POST':
+        return redirect('manage_files_async')
+
+    jds = [row async for row in JD.objects.filter(pk__in=request.POST.getlist('jd_ids')).values_list('id', 'drive_file_id', 'original_filename')]
+    resumes = [row async for row in Resume.objects.filter(pk__in=request.POST.getlist('resume_ids')).values_list('id', 'drive_file_id', 'original_filename')]
+    if not jds and not resumes:
+        messages.error(request, "No files selected.")
+        return redirect('manage_files_async')
+
+    errors = await async_drive.delete_files_from_drive([drive_file_id for _, drive_file_id, _ in jds + resumes])
+    await sync_to_async(_delete_file_rows)(_deleted_ids(jds, errors), _deleted_ids(resumes, errors)) # No async transactions in the ORM
+    _bulk_delete_messages(request, jds, resumes, errors)
+    return redirect('manage_files_async')
+
+
+def _deleted_ids(rows, errors):
+    return [pk for pk, drive_file_id, _ in rows if errors.get(drive_file_id, "Not processed") is None]
+
+
+def _delete_file_rows(jd_ids, resume_ids):
+    with transaction.atomic():
+        JD.objects.filter(pk__in=jd_ids).delete()
+        Resume.objects.filter(pk__in=resume_ids).delete()
+
+
+def _bulk_delete_messages(request, jds, resumes, errors):
+    deleted_jds, deleted_resumes = len(_deleted_ids(jds, errors)), len(_deleted_ids(resumes, errors))
+    if deleted_jds or deleted_resumes:
+        messages.success(request, f"Deleted {deleted_jds} JD(s) and {deleted_resumes} resume(s).")
+    for _, drive_file_id, filename in jds + resumes:
+        error = errors.get(drive_file_id, "Not processed")
+        if error is not None:
+            messages.error(request, f"Error deleting {filename} from Drive: {error}")
+
+
+def analysis_job_status(request, job_id):
+    """Shows the progress of a background analysis job and redirects to its results once it has finished."""
+    job = get_object_or_404(AnalysisJob, pk=job_id)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'id': job.id,
+            'status': job.status,
+            'stage': job.stage,
+            'percent_complete': job.percent_complete,
+            'message': job.message,
+            'results_url': reverse('analysis_results', kwargs={'results_id': job.results_id}) if job.results_id else None,
+        })
+
+    if job.status == AnalysisJob.STATUS_SUCCEEDED and job.results_id:
+        if job.message:
+            messages.error(request, job.message)
+        messages.success(request, "Analysis completed successfully.")
+        return redirect('analysis_results', results_id=job.results_id)
+
+    if job.status == AnalysisJob.STATUS_FAILED:
+        messages.error(request, job.message or "Analysis failed.")
+        return redirect('manage_files')
+
+    return render(request, 'setoo_app/analysis_job_status.html', {'job': job})
+
+
+def _results_url(view_name, results_id, **params):
+    """Absolute-path URL of a results JSON endpoint with the given query parameters (None values are left out)."""
+    params = {key: value for key, value in params.items() if value is not None}
+    url = reverse(view_name, args=[results_id])
+    return f"{url}?{urlencode(params)}" if params else url
+
+
+def analysis_results(request, results_id):
+    """
+    Analytics and the first page of matches per role (and of unmatched resumes) of an analysis run.
+
+    Further pages come from the JSON endpoints (results_matches_json, results_unmatched_json)
+    and the full lists from the streaming exports, so the page stays small for any run size.
+    """
+    results = get_object_or_404(Results.objects.defer('matched_resumes', 'unmatched_resumes'), pk=results_id) # The blobs are only loaded for legacy results
+
+    matched_resumes = {}
+    for role, count in exports.role_counts(results).items():
+        matches, next_after = exports.match_page(results, role=role)
+        matched_resumes[role] = {
+            'matches': matches,
+            'count': count,
+            'next_url': _results_url('results_matches_json', results_id, role=role, after=next_after) if next_after else None,
+            'csv_url': _results_url('export_results_csv', results_id, role=role),
+        }
+    unmatched_resumes, unmatched_next = exports.unmatched_page(results)
+    unmatched_count = exports.unmatched_count(results)
 
     analytics_display_data = {}
+    profile_display_data = {}
     total_applications = 0
     total_passed = 0
+    plot_filename = None
 
     if results.analytics:
         try:
@@ -216,8 +473,16 @@ def analysis_results(request, results_id):
                     }
                     total_applications += applied_count
                     total_passed += passed_count
+                    if 'top_skills' in data: # Summary of the matched resumes' profiles (runs since profiles were added)
+                        profile_display_data[role] = {
+                            "avg_years_experience": data.get('avg_years_experience'),
+                            "education_levels": ", ".join(
+                                f"{EDUCATION_LABELS.get(level, level)}: {count}" for level, count in data.get('education_levels', {}).items()
+                            ),
+                            "top_skills": ", ".join(skill for skill, _ in data['top_skills']),
+                        }
                 else:
-                    print(f"Warning: Unexpected data format for role '{role}': {data}") # Log warning
+                    logger.warning("Unexpected data format for role '%s': %s", role, data)
                     messages.error(request, "Error processing analytics data. Please check logs.")
                     analytics_display_data = {} # Reset to empty to avoid further errors
                     break # Exit the loop to avoid further errors
@@ -229,14 +494,19 @@ def analysis_results(request, results_id):
                 plot_filename = None
 
         except (json.JSONDecodeError, TypeError, AttributeError) as e:
-            print(f"Error processing analytics data: {e}. Raw data: {results.analytics}")
+            logger.error("Error processing analytics data: %s. Raw data: %s", e, results.analytics)
             analytics_display_data = {}  # Reset to empty on error
             messages.error(request, "Error processing analytics data.")
             plot_filename = None # Set to None if plot generation fails
     context = {
         'matched_resumes': matched_resumes,
         'unmatched_resumes': unmatched_resumes,
+        'unmatched_count': unmatched_count,
+        'unmatched_next_url': _results_url('results_unmatched_json', results_id, after=unmatched_next) if unmatched_next else None,
+        'export_csv_url': _results_url('export_results_csv', results_id),
+        'export_ndjson_url': _results_url('export_results_ndjson', results_id),
         'analytics_display_data': analytics_display_data,
+        'profile_display_data': profile_display_data,
         'total_applications': total_applications,
         'total_passed': total_passed,
         'results_id': results_id,
@@ -246,41 +516,111 @@ def analysis_results(request, results_id):
     return render(request, 'setoo_app/analysis_results.html', context)
 
 
-from django.shortcuts import render, get_object_or_404
-from .models import Results  # Import your Results model
+def results_matches_json(request, results_id):
+    """
+    JSON page of an analysis run's matches, best score first within each role.
+
+    Query parameters: role (only that role's matches; default all roles, in role order), after
+    (cursor from the previous page's "next_after") and limit (page size, up to
+    settings.RESULTS_MAX_PAGE_SIZE).
+    """
+    results = get_object_or_404(Results.objects.only('id'), pk=results_id) # The JSON blobs are only loaded for legacy results
+    role = request.GET.get('role') or None
+    limit = exports.parse_page_size(request.GET.get('limit'))
+    matches, next_after = exports.match_page(results, role=role, after=exports.decode_cursor(request.GET.get('after')), page_size=limit)
+    return JsonResponse({
+        'results': matches,
+        'next_after': next_after,
+        'next': _results_url('results_matches_json', results_id, role=role, after=next_after, limit=request.GET.get('limit')) if next_after else None,
+    })
+
+
+def results_unmatched_json(request, results_id):
+    """JSON page of an analysis run's unmatched resume filenames (query parameters: after and limit, as for results_matches_json)."""
+    results = get_object_or_404(Results.objects.only('id', 'unmatched_count'), pk=results_id) # The JSON blob is only loaded for legacy results
+    limit = exports.parse_page_size(request.GET.get('limit'))
+    filenames, next_after = exports.unmatched_page(results, after=exports.decode_cursor(request.GET.get('after')), page_size=limit)
+    return JsonResponse({
+        'results': filenames,
+        'next_after': next_after,
+        'next': _results_url('results_unmatched_json', results_id, after=next_after, limit=request.GET.get('limit')) if next_after else None,
+    })
+
+
+def export_results(request, results_id, export_format):
+    """
+    Streams every match of an analysis run (optionally only one role's, with ?role=) as CSV or NDJSON.
+
+    Rows are written from a database cursor as they are read (see exports), so memory use does
+    not depend on the number of matches. Under ASGI the rows are read and written by async generators.
+    """
+    results = get_object_or_404(Results.objects.only('id'), pk=results_id)
+    role = request.GET.get('role') or None
+    if isinstance(request, ASGIRequest): # A sync iterator would be read whole before streaming under ASGI
+        rows = exports.aiter_match_rows(results, role)
+        csv_stream, ndjson_stream = exports.acsv_stream, exports.andjson_stream
+    else:
+        rows = exports.iter_match_rows(results, role)
+        csv_stream, ndjson_stream = exports.csv_stream, exports.ndjson_stream
+    if export_format == 'csv':
+        stream, content_type = csv_stream(rows), 'text/csv; charset=utf-8'
+    else:
+        stream, content_type = ndjson_stream(rows), 'application/x-ndjson'
+    return StreamingHttpResponse(
+        stream,
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename="analysis_results_{results_id}.{export_format}"'},
+    )
+
 
 def display_top_resumes(request, results_id):
     try:
-        results = get_object_or_404(Results, pk=results_id)
-        matched_resumes = results.matched_resumes or {}  # Handle cases where matched_resumes is None
-        available_roles = list(matched_resumes.keys())
+        results = get_object_or_404(Results.objects.only('id'), pk=results_id) # The JSON blobs are only loaded for legacy results
+        role_counts = dict(results.matches.order_by('role').values_list('role').annotate(count=Count('id')))
+        has_match_rows = bool(role_counts)
+
+        if has_match_rows:
+            available_roles = list(role_counts)
+        else: # Results saved before ResumeMatch rows existed: fall back to the JSON blob
+            matched_resumes = results.matched_resumes or {}  # Handle cases where matched_resumes is None
+            available_roles = list(matched_resumes.keys())
+            role_counts = {role: len(matches) for role, matches in matched_resumes.items()}
 
         if request.method == 'POST':
             role_name = request.POST.get('role')
             top_n = int(request.POST.get('count', 5))  # Default to 5 if count is not provided
 
-            top_resumes = matched_resumes.get(role_name, [])
-
-            # Sort by score (if present), otherwise by filename (as a fallback)
-            sorted_resumes = sorted(top_resumes, key=lambda x: x.get('score', 0) if isinstance(x, dict) and x.get('score', 0) is not None else (x.get('score', 0) if isinstance(x, dict) else 0), reverse=True)
-
-            top_resumes_to_display = []
-            for match in sorted_resumes[:top_n]:
-                top_resumes_to_display.append({
-                    'resume': match.get('resume', {}),  # Handle cases where 'resume' might be missing or not a dict
-                    'similarity_score': match.get('score', 0),
-                })
-
+            if has_match_rows:
+                top_matches = results.matches.filter(role=role_name).order_by('-score').values('resume_id', 'resume_filename', 'score')[:top_n] # Index scan on (results, role, -score)
+                top_resumes_to_display = [
+                    {
+                        'resume': {'id': match['resume_id'], 'filename': match['resume_filename'], 'original_filename': match['resume_filename']},
+                        'similarity_score': match['score'],
+                    }
+                    for match in top_matches
+                ]
+            else:
+                top_resumes = matched_resumes.get(role_name, [])
+                sorted_resumes = sorted(top_resumes, key=lambda x: (x.get('score') or 0) if isinstance(x, dict) else 0, reverse=True)
+                top_resumes_to_display = []
+                for match in sorted_resumes[:top_n]:
+                    resume = dict(match.get('resume', {}))  # Handle cases where 'resume' might be missing or not a dict
+                    resume.setdefault('original_filename', resume.get('filename', match.get('resume_filename')))
+                    top_resumes_to_display.append({
+                        'resume': resume,
+                        'similarity_score': match.get('score', 0),
+                    })
 
             context = {
                 'role_name': role_name,
                 'top_resumes': top_resumes_to_display,
                 'available_roles': available_roles,
+                'role_counts': role_counts,
                 'results_id': results_id,
             }
             return render(request, 'setoo_app/top_resumes.html', context)
 
-        context = {'available_roles': available_roles, 'results_id': results_id}
+        context = {'available_roles': available_roles, 'role_counts': role_counts, 'results_id': results_id}
         return render(request, 'setoo_app/top_resumes.html', context)
 
     except Results.DoesNotExist:
@@ -288,5 +628,10 @@ def display_top_resumes(request, results_id):
         return redirect('manage_files')  # Redirect on error
     except Exception as e:
         messages.error(request, f"An error occurred: {e}")  # Use messages framework
-        traceback.print_exc()  # Print traceback for debugging
-        return redirect('manage_files')  # Redirect on error
\ No newline at end of file
+        logger.exception("Error displaying top resumes for results %s", results_id)
+        return redirect('manage_files')  # Redirect on error
+
+
+def metrics(request):
+    """Serves the pipeline metrics (all worker processes, see setoo_app.metrics) in the Prometheus text format."""
+    return HttpResponse(pipeline_metrics.REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
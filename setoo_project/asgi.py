@@ -3,6 +3,10 @@ ASGI config for setoo_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Under an ASGI server the async file views (the async/ URLs, see
+setoo_app.views.manage_files_async) await Google Drive and the database
+instead of holding a thread per request.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -0,0 +1,15 @@
+"""
+Celery application for setoo_project.
+
+Start a worker with:  celery -A setoo_project worker -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "setoo_project.settings")
+
+app = Celery("setoo_project")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()